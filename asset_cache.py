@@ -0,0 +1,220 @@
+"""
+Tartalom-címzett statikus asset cache a Playwright kérés-routingjához.
+
+A moziknál ugyanaz a verziózott React bundle (és CSS, fontok) mind a négy
+oldalon és minden héten újra letöltődik, a színházaknál ugyanígy. Ez a
+modul context.route()-tal elkapja a statikus asseteket (js, css, font,
+kép), és lemezről szolgálja ki őket:
+
+  <gyökér>/blobs/<sha256>   – a tartalom, hash szerint (több URL is mutathat rá)
+  <gyökér>/index.json       – URL → blob, válasz-headerek, ETag / Last-Modified,
+                              lejárat, utolsó használat
+
+- Friss bejegyzés (Cache-Control max-age / immutable, vagy hash-t
+  tartalmazó, verziózott URL): hálózat nélkül, a blobból.
+- Lejárt bejegyzés validátorral: feltételes kérés (If-None-Match /
+  If-Modified-Since); 304-nél a blobból.
+- Egyébként letöltés, és ha cache-elhető, mentés.
+Az index.json-t a save() írja ki; a méretkorlát fölött a legrégebben
+használt bejegyzések (LRU) és a rájuk már nem hivatkozó blobok törlődnek.
+Izolált módban (SZINHAZ_ISOLATED) a worker processzek párhuzamosan
+mentenek: az egyik GC-je törölheti a másik által épp letöltött, de az
+indexbe még be nem írt blobot. Ez önjavító – a hiányzó blobú bejegyzés
+következő használatkor egyszerű letöltésként fut, és újra mentődik –,
+ezért nincs processzek közötti zár.
+
+Bekapcsolás: SZINHAZ_ASSET_CACHE=<könyvtár>
+  SZINHAZ_ASSET_CACHE_MAX_MB=200 – méretkorlát
+Megjegyzés: a Playwright routing a böngésző saját HTTP cache-ét kikapcsolja
+a contextben, így tartós profillal együtt az assetek innen jönnek: a
+browser_session ilyenkor a profil disk cache-ét nem tartja meg, és a
+stats["cached"] a route handler találatait (friss + revalidált) számolja
+a CDP fromDiskCache helyett.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+
+
+DEFAULT_MAX_MB = 200
+ASSET_PATTERN = re.compile(r"\.(js|mjs|css|woff2?|ttf|otf|png|jpe?g|gif|svg|webp|ico)(\?|$)", re.IGNORECASE)
+ASSET_RESOURCE_TYPES = {"script", "stylesheet", "font", "image"}
+# Fájlnévben lévő hash vagy verzió-paraméter: a tartalom az URL-lel együtt változik
+VERSIONED_URL = re.compile(r"[.\-_][0-9a-f]{8,}\.|[?&](v|ver|version|hash)=", re.IGNORECASE)
+VERSIONED_MAX_AGE = 30 * 24 * 3600
+DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection",
+                "set-cookie", "date", "age", "keep-alive"}
+
+
+def cache_dir() -> str | None:
+    return os.environ.get("SZINHAZ_ASSET_CACHE", "").strip() or None
+
+
+def freshness(url: str, headers: dict) -> float:
+    """Hány másodpercig friss a válasz (0: minden használat előtt revalidálni kell)."""
+    cache_control = headers.get("cache-control", "").lower()
+    if "no-store" in cache_control or "no-cache" in cache_control:
+        return 0
+    if "immutable" in cache_control or VERSIONED_URL.search(url):
+        return VERSIONED_MAX_AGE
+    m = re.search(r"max-age=(\d+)", cache_control)
+    return float(m.group(1)) if m else 0
+
+
+class AssetCache:
+    def __init__(self, root: str, max_mb: float = DEFAULT_MAX_MB):
+        self.root = root
+        self.blob_dir = os.path.join(root, "blobs")
+        self.index_path = os.path.join(root, "index.json")
+        self.max_bytes = max_mb * 1024 * 1024
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self.index = self._load_index()
+        self.dirty = set()
+        self.stats = None
+        self.counts = {"hits": 0, "revalidated": 0, "misses": 0, "bytes_saved": 0}
+
+    def _load_index(self) -> dict:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, digest)
+
+    def _read_blob(self, entry: dict) -> bytes | None:
+        try:
+            with open(self._blob_path(entry["blob"]), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _store(self, url: str, status: int, headers: dict, body: bytes):
+        if status != 200 or "no-store" in headers.get("cache-control", "").lower():
+            return
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            tmp_path = f"{path}.tmp{os.getpid()}"
+            with open(tmp_path, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        self.index[url] = {
+            "blob": digest,
+            "size": len(body),
+            "headers": {k: v for k, v in headers.items() if k.lower() not in DROP_HEADERS},
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last-modified"),
+            "expires": time.time() + freshness(url, headers),
+            "used": time.time(),
+        }
+        self.dirty.add(url)
+
+    def _count(self, key: str, size: int = 0):
+        self.counts[key] += 1
+        if key != "misses":
+            self.counts["bytes_saved"] += size
+        if self.stats is not None:
+            self.stats[f"asset_{key}"] = self.stats.get(f"asset_{key}", 0) + 1
+            if key != "misses":
+                self.stats["cached"] = self.stats.get("cached", 0) + 1
+
+    def _handle(self, route, request):
+        if request.method != "GET" or request.resource_type not in ASSET_RESOURCE_TYPES:
+            route.fallback()
+            return
+        url = request.url
+        entry = self.index.get(url)
+        body = self._read_blob(entry) if entry else None
+
+        if entry and body is not None and entry["expires"] > time.time():
+            entry["used"] = time.time()
+            self.dirty.add(url)
+            self._count("hits", len(body))
+            route.fulfill(status=200, headers=entry["headers"], body=body)
+            return
+
+        headers = dict(request.headers)
+        if entry and body is not None:
+            if entry.get("etag"):
+                headers["if-none-match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["if-modified-since"] = entry["last_modified"]
+        try:
+            response = route.fetch(headers=headers)
+        except Exception:
+            route.fallback()
+            return
+
+        if response.status == 304 and entry and body is not None:
+            entry["expires"] = time.time() + freshness(url, response.headers)
+            entry["used"] = time.time()
+            self.dirty.add(url)
+            self._count("revalidated", len(body))
+            route.fulfill(status=200, headers=entry["headers"], body=body)
+            return
+
+        fetched = response.body()
+        self._store(url, response.status, response.headers, fetched)
+        self._count("misses")
+        route.fulfill(response=response, body=fetched)
+
+    def attach(self, context, stats: dict | None = None):
+        """A statikus assetek routolása a cache-en át a megadott contextben."""
+        self.stats = stats
+        if stats is not None:
+            stats.setdefault("cached", 0)
+        context.route(ASSET_PATTERN, self._handle)
+
+    def save(self):
+        """
+        Index mentése: a lemezen lévő (más processz által közben frissített)
+        indexbe olvasztja a saját változásait, majd LRU szerint a méretkorlátig vág.
+        """
+        if not self.dirty:
+            return
+        index = self._load_index()
+        for url in self.dirty:
+            if url in self.index:
+                index[url] = self.index[url]
+
+        total = sum(e["size"] for e in index.values())
+        for url, entry in sorted(index.items(), key=lambda item: item[1]["used"]):
+            if total <= self.max_bytes:
+                break
+            total -= entry["size"]
+            index.pop(url)
+
+        tmp_path = f"{self.index_path}.tmp{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+        referenced = {e["blob"] for e in index.values()}
+        for name in os.listdir(self.blob_dir):
+            if name not in referenced and ".tmp" not in name:
+                try:
+                    os.remove(self._blob_path(name))
+                except FileNotFoundError:   # egy párhuzamos worker már törölte
+                    pass
+
+        self.index = index
+        self.dirty.clear()
+        c = self.counts
+        print(f"[ASSET] {c['hits']} találat, {c['revalidated']} revalidálva, {c['misses']} letöltés, "
+              f"{c['bytes_saved'] / 2**20:.1f} MB megspórolva ({total / 2**20:.0f} MB a cache-ben)")
+
+
+def from_env() -> AssetCache | None:
+    root = cache_dir()
+    if root is None:
+        return None
+    try:
+        max_mb = float(os.environ.get("SZINHAZ_ASSET_CACHE_MAX_MB", DEFAULT_MAX_MB))
+    except ValueError:
+        max_mb = DEFAULT_MAX_MB
+    return AssetCache(root, max_mb)
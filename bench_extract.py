@@ -0,0 +1,116 @@
+"""
+A PBEST és Vígszínház HTML-kinyerés összevetése rögzített oldalakon:
+regex (a teljes dokumentumon) vs. BeautifulSoup + lefordított CSS szelektor.
+
+Oldalak: a megadott fájlok, vagy alapértelmezésben bench_pages/*.html és a
+diagnosztikai dumpok (debug_pbest_*.html, debug_vig_*.html). A fájlnév
+eleje dönti el a színházat (pbest / vig).
+
+Használat:
+  python bench_extract.py --record           # élő oldalak mentése bench_pages/-be (HTTP)
+  python bench_extract.py [-n 20] [fájlok...]
+"""
+
+import os
+import sys
+import glob
+import time
+import argparse
+import statistics
+from datetime import date
+
+import html_extract
+import pbest_last_date
+import vig_last_date
+from navigation import fetch_html
+
+
+PAGES_DIR = "bench_pages"
+DEFAULT_GLOBS = (f"{PAGES_DIR}/*.html", "debug_pbest_*.html", "debug_vig_*.html")
+EXTRACTORS = {
+    "pbest": (pbest_last_date.extract_events_regex, pbest_last_date.extract_events_soup),
+    "vig": (vig_last_date.extract_events_regex, vig_last_date.extract_events_soup),
+}
+
+
+def theatre_of(path: str) -> str | None:
+    name = os.path.basename(path).removeprefix("debug_")
+    return next((key for key in EXTRACTORS if name.startswith(key)), None)
+
+
+def record_pages(months: int = 3) -> list[str]:
+    """A PBEST műsor és az első néhány Víg hónap letöltése HTTP-n."""
+    os.makedirs(PAGES_DIR, exist_ok=True)
+    pages = {"pbest_musor.html": pbest_last_date.URL}
+    html = fetch_html(vig_last_date.URL)
+    pages["vig_0.html"] = vig_last_date.URL
+    template = vig_last_date.discover_month_template(html)
+    if template:
+        for i, url in enumerate(vig_last_date.month_urls(template, range(1, months), date.today()), start=1):
+            pages[f"vig_{i}.html"] = url
+    written = []
+    for name, url in pages.items():
+        path = os.path.join(PAGES_DIR, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(html if url == vig_last_date.URL else fetch_html(url))
+        written.append(path)
+    return written
+
+
+def time_ms(func, html: str, repeat: int) -> tuple[float, list]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        events = func(html)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), events
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Regex vs. soup HTML-kinyerés benchmark.")
+    parser.add_argument("files", nargs="*", help="rögzített HTML oldalak")
+    parser.add_argument("-n", "--repeat", type=int, default=20, help="ismétlések száma oldalanként")
+    parser.add_argument("--record", action="store_true", help="élő oldalak mentése a bench_pages/ könyvtárba")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.record:
+        for path in record_pages():
+            print(f"[BENCH] Mentve: {path}")
+        return 0
+    if not html_extract.available():
+        print("[BENCH] A beautifulsoup4 nincs telepítve (pip install -r requirements.txt)")
+        return 1
+
+    files = args.files or sorted({p for pattern in DEFAULT_GLOBS for p in glob.glob(pattern)})
+    files = [p for p in files if theatre_of(p)]
+    if not files:
+        print(f"[BENCH] Nincs rögzített oldal (python bench_extract.py --record, vagy {PAGES_DIR}/*.html)")
+        return 1
+
+    print(f"Parser: {html_extract.PARSER}, {args.repeat} ismétlés, medián")
+    print(f"{'oldal':<28} {'KB':>6} {'regex ms':>9} {'soup ms':>8} {'db':>5}  eltérés")
+    mismatches = 0
+    for path in files:
+        regex_func, soup_func = EXTRACTORS[theatre_of(path)]
+        with open(path, "r", encoding="utf-8") as f:
+            html = f.read()
+        regex_ms, regex_events = time_ms(regex_func, html, args.repeat)
+        soup_ms, soup_events = time_ms(soup_func, html, args.repeat)
+        only_regex = set(regex_events) - set(soup_events)
+        only_soup = set(soup_events) - set(regex_events)
+        note = "–" if not (only_regex or only_soup) else f"csak regex: {len(only_regex)}, csak soup: {len(only_soup)}"
+        mismatches += bool(only_regex or only_soup)
+        print(f"{os.path.basename(path):<28} {len(html) / 1024:>6.0f} {regex_ms:>9.2f} {soup_ms:>8.2f} "
+              f"{len(set(soup_events)):>5}  {note}")
+        for e in sorted(only_regex)[:5]:
+            print(f"    regex: {e.iso} – {e.title}")
+        for e in sorted(only_soup)[:5]:
+            print(f"    soup:  {e.iso} – {e.title}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
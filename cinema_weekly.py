@@ -1,21 +1,29 @@
 """
 Heti mozi összefoglaló – Művész, Puskin, Toldi, Corvin.
 
-Vasárnap futtatva összegyűjti a következő hét (hétfő–vasárnap) vetítéseit,
-lekéri a műfajokat a film-oldalakról, generál interaktív HTML-t,
-és emailben elküldi a GitHub Pages linket.
+Vasárnap futtatva összegyűjti a következő hét (--weeks N: a következő N hét)
+vetítéseit, lekéri a műfajokat a film-oldalakról, generál interaktív HTML-t
+(több hétnél hétváltóval), és emailben elküldi a GitHub Pages linket.
+
+A vetítéseket moziként és naponként a cinema_cache.json fájlban tartjuk:
+- elmúlt nap végleges, a cache-ből jön;
+- jövőbeli napot csak akkor kattintunk végig újra, ha az artmozi heti
+  adata (a hét kiválasztásakor letöltött JSON válaszok hash-e) változott.
+A műfajokat film URL szerint cache-eljük.
 """
 
 import os
 import re
-import ssl
 import json
-import smtplib
-from email.message import EmailMessage
+import hashlib
+import argparse
 from datetime import datetime, timedelta, date
 from zoneinfo import ZoneInfo
 
-from playwright.sync_api import sync_playwright
+import outbox
+import profiling
+from navigation import goto
+from scraper_utils import browser_session
 
 
 CINEMAS = [
@@ -36,6 +44,12 @@ HU_MONTH_PARSE = {
     "júl": 7, "aug": 8, "sze": 9, "szep": 9, "okt": 10, "nov": 11, "dec": 12,
 }
 
+HTML_PATH = "docs/moziheti.html"
+CACHE_PATH = "cinema_cache.json"
+CACHE_VERSION = 1
+DEFAULT_WEEKS = 1
+MAX_WEEKS = 4
+
 GITHUB_PAGES_URL = os.environ.get(
     "PAGES_URL",
     "https://USERNAME.github.io/REPO-NAME/moziheti.html"
@@ -56,6 +70,12 @@ def get_target_week() -> tuple[date, date]:
     return monday, sunday
 
 
+def get_target_weeks(weeks: int = DEFAULT_WEEKS) -> list[tuple[date, date]]:
+    """A célhét és az utána következő hetek (hétfő, vasárnap) párjai."""
+    monday, _ = get_target_week()
+    return [(monday + timedelta(weeks=i), monday + timedelta(weeks=i, days=6)) for i in range(weeks)]
+
+
 def parse_day_filter_date(date_text: str, year: int) -> date | None:
     m = re.match(r'([a-záéíóöőúüű]+)\.?\s+(\d{1,2})', date_text.strip().lower())
     if not m:
@@ -69,10 +89,34 @@ def parse_day_filter_date(date_text: str, year: int) -> date | None:
         return None
 
 
-def get_week_numbers_for_target(monday: date) -> tuple[int, int]:
-    prev_thursday = monday - timedelta(days=4)
-    this_thursday = monday + timedelta(days=3)
-    return prev_thursday.isocalendar()[1], this_thursday.isocalendar()[1]
+def cinema_week_of(d: date) -> int:
+    """Az artmozi hetek csütörtöktől szerdáig tartanak; a hét száma a csütörtök ISO hete."""
+    thursday = d - timedelta(days=(d.weekday() - 3) % 7)
+    return thursday.isocalendar()[1]
+
+
+def days_by_cinema_week(days: list[date]) -> list[tuple[int, list[date]]]:
+    """A napok mozis hetek szerint csoportosítva, sorrendben."""
+    groups = []
+    for d in days:
+        week = cinema_week_of(d)
+        if groups and groups[-1][0] == week:
+            groups[-1][1].append(d)
+        else:
+            groups.append((week, [d]))
+    return groups
+
+
+def screening_record(item: dict, target_date: date, cinema_name: str) -> dict:
+    return {
+        "film": item["film"],
+        "time": item["time"],
+        "url": item.get("url", ""),
+        "cinema": cinema_name,
+        "date": target_date.isoformat(),
+        "day_short": HU_DAYS_SHORT[target_date.weekday()],
+        "day_long": HU_DAYS_LONG[target_date.weekday()],
+    }
 
 
 def extract_screenings_for_day(page, target_date: date, cinema_name: str) -> list[dict]:
@@ -98,15 +142,64 @@ def extract_screenings_for_day(page, target_date: date, cinema_name: str) -> lis
         return results;
     }""")
 
-    return [{
-        "film": item["film"],
-        "time": item["time"],
-        "url": item.get("url", ""),
-        "cinema": cinema_name,
-        "date": target_date.isoformat(),
-        "day_short": HU_DAYS_SHORT[target_date.weekday()],
-        "day_long": HU_DAYS_LONG[target_date.weekday()],
-    } for item in data]
+    return [screening_record(item, target_date, cinema_name) for item in data]
+
+
+def load_cache(path: str = CACHE_PATH) -> dict:
+    """{"days": {mozi: {dátum: {"week_fp", "screenings"}}}, "genres": {film_url: [műfaj, ...]}}"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        cache = {}
+    if cache.get("version") != CACHE_VERSION:
+        cache = {"version": CACHE_VERSION, "days": {}, "genres": {}}
+    return cache
+
+
+def save_cache(cache: dict, keep_from: date, path: str = CACHE_PATH):
+    """Mentés a keep_from előtti napok és a már nem hivatkozott műfajok elhagyásával."""
+    cutoff = keep_from.isoformat()
+    for days in cache["days"].values():
+        for iso in [iso for iso in days if iso < cutoff]:
+            days.pop(iso)
+    urls = {item["url"] for days in cache["days"].values()
+            for entry in days.values() for item in entry["screenings"]}
+    cache["genres"] = {url: g for url, g in cache["genres"].items() if url in urls}
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def record_json_responses(page) -> list:
+    """A page JSON válaszait gyűjti (a body-t csak a week_fingerprint olvassa ki)."""
+    responses = []
+
+    def on_response(response):
+        if "json" in response.headers.get("content-type", ""):
+            responses.append(response)
+
+    page.on("response", on_response)
+    return responses
+
+
+def week_fingerprint(responses: list) -> str | None:
+    """
+    A hétválasztó kattintás óta gyűjtött JSON válaszok hash-e (sorrendtől
+    független), majd a lista ürítése. A hívó a kattintás előtt üríti a
+    listát, hogy az oldalbetöltés és az előző hét napjainak válaszai ne
+    kerüljenek bele. None, ha nem volt válasz vagy egy body már nem olvasható –
+    ilyenkor a hét napjait újra végig kell kattintani.
+    """
+    try:
+        hashes = sorted(hashlib.sha1(r.body()).hexdigest() for r in responses)
+    except Exception:
+        hashes = []
+    responses.clear()
+    if not hashes:
+        return None
+    return hashlib.sha1(",".join(hashes).encode()).hexdigest()[:16]
 
 
 def click_week(page, week_num: int) -> bool:
@@ -147,6 +240,75 @@ def click_day_and_scrape(page, target_date: date, cinema_name: str) -> list[dict
     return []
 
 
+def day_label(d: date) -> str:
+    return f"{HU_MONTHS[d.month]}. {d.day} ({HU_DAYS_SHORT[d.weekday()]})"
+
+
+def scrape_cinema(page, cinema: dict, days: list[date], cache: dict, today: date,
+                  responses: list, stats: dict) -> list[dict]:
+    """
+    Egy mozi vetítései a megadott napokra. Elmúlt nap a cache-ből jön;
+    jövőbeli nap is, ha a heti adat fingerprintje nem változott.
+    """
+    name = cinema["name"]
+    cached = cache["days"].setdefault(name, {})
+    screenings = {}
+
+    def from_cache(d: date, note: str) -> bool:
+        entry = cached.get(d.isoformat())
+        if entry is None:
+            return False
+        screenings[d] = [screening_record(item, d, name) for item in entry["screenings"]]
+        print(f"      {day_label(d)}: {len(screenings[d])} vetítés ({note})")
+        stats["reused"] += 1
+        return True
+
+    todo = []
+    for week, dates in days_by_cinema_week(days):
+        for d in dates:
+            if d < today:
+                from_cache(d, "elmúlt nap, cache")
+        live = [d for d in dates if d >= today]
+        if live:
+            todo.append((week, live))
+    if not todo:
+        return [s for d in days for s in screenings.get(d, [])]
+
+    try:
+        goto(page, cinema["url"], wait_until="networkidle", timeout=90000)
+        page.wait_for_timeout(5000)
+        try:
+            page.evaluate("document.querySelector('#block-artmozi-homepage-react-block')?.scrollIntoView()")
+            page.wait_for_timeout(2000)
+        except Exception:
+            pass
+
+        for week, dates in todo:
+            print(f"  Mozis hét {week:02d} ({day_label(dates[0])} – {day_label(dates[-1])})")
+            responses.clear()
+            fingerprint = week_fingerprint(responses) if click_week(page, week) else None
+            for d in dates:
+                entry = cached.get(d.isoformat())
+                if fingerprint and entry and entry["week_fp"] == fingerprint:
+                    from_cache(d, "heti adat változatlan, cache")
+                    continue
+                screenings[d] = click_day_and_scrape(page, d, name)
+                stats["scraped"] += 1
+                cached[d.isoformat()] = {
+                    "week_fp": fingerprint,
+                    "screenings": [{k: s[k] for k in ("film", "time", "url")} for s in screenings[d]],
+                }
+
+    except Exception as e:
+        print(f"  [{name}] HIBA: {e}")
+        for week, dates in todo:
+            for d in dates:
+                if d not in screenings:
+                    from_cache(d, "hiba miatt a korábbi adat")
+
+    return [s for d in days for s in screenings.get(d, [])]
+
+
 def scrape_genres(page, film_urls: dict[str, str]) -> dict[str, list[str]]:
     """
     Bejárja a film-oldalakat és kinyeri a műfajokat.
@@ -164,7 +326,7 @@ def scrape_genres(page, film_urls: dict[str, str]) -> dict[str, list[str]]:
 
         full_url = rel_url if rel_url.startswith("http") else f"https://artmozi.hu{rel_url}"
         try:
-            page.goto(full_url, wait_until="networkidle", timeout=30000)
+            goto(page, full_url, wait_until="networkidle", timeout=30000)
             page.wait_for_timeout(1000)
 
             # Műfaj linkek: <a href="/mufaj/filmdrama">filmdráma</a>
@@ -186,52 +348,27 @@ def scrape_genres(page, film_urls: dict[str, str]) -> dict[str, list[str]]:
     return genres
 
 
-def scrape_all() -> tuple[list[dict], dict[str, list[str]], date, date]:
-    monday, sunday = get_target_week()
-    week1, week2 = get_week_numbers_for_target(monday)
-    print(f"Célhét: {monday} (hétfő) – {sunday} (vasárnap)")
-    print(f"Mozis hetek: {week1:02d} (H-Sze) és {week2:02d} (Cs-V)")
+def scrape_all(weeks: int = DEFAULT_WEEKS) -> tuple[list[dict], dict[str, list[str]], list[tuple[date, date]]]:
+    target_weeks = get_target_weeks(weeks)
+    days = [monday + timedelta(days=i) for monday, _ in target_weeks for i in range(7)]
+    today = budapest_now().date()
+    print(f"Célhét: {days[0]} (hétfő) – {days[-1]} (vasárnap), {weeks} hét")
+    print(f"Mozis hetek: {', '.join(f'{w:02d}' for w, _ in days_by_cinema_week(days))}")
 
+    cache = load_cache()
+    stats = {"reused": 0, "scraped": 0}
     all_screenings = []
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
-            viewport={"width": 1920, "height": 1080},
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        )
-        page = context.new_page()
+    # A négy mozi ugyanazt az artmozi frontendet használja: közös profil és asset cache
+    with browser_session(profile="artmozi") as page:
         page.set_default_timeout(60000)
+        responses = record_json_responses(page)
 
-        # 1) Vetítések scrape-elése mozi oldalanként
+        # 1) Vetítések scrape-elése mozi oldalanként (a cache-ben lévő napok kihagyásával)
         for cinema in CINEMAS:
-            name = cinema["name"]
-            url = cinema["url"]
             print(f"\n{'='*40}")
-            print(f"[{name}] {url}")
-            try:
-                page.goto(url, wait_until="networkidle", timeout=90000)
-                page.wait_for_timeout(5000)
-                try:
-                    page.evaluate("document.querySelector('#block-artmozi-homepage-react-block')?.scrollIntoView()")
-                    page.wait_for_timeout(2000)
-                except Exception:
-                    pass
-
-                print(f"  Mozis hét {week1:02d} (H–Sze)")
-                click_week(page, week1)
-                for d in range(3):
-                    target = monday + timedelta(days=d)
-                    all_screenings.extend(click_day_and_scrape(page, target, name))
-
-                print(f"  Mozis hét {week2:02d} (Cs–V)")
-                click_week(page, week2)
-                for d in range(3, 7):
-                    target = monday + timedelta(days=d)
-                    all_screenings.extend(click_day_and_scrape(page, target, name))
-
-            except Exception as e:
-                print(f"  [{name}] HIBA: {e}")
+            print(f"[{cinema['name']}] {cinema['url']}")
+            all_screenings.extend(scrape_cinema(page, cinema, days, cache, today, responses, stats))
 
         # 2) Egyedi film URL-ek összegyűjtése műfaj scrape-hez
         film_urls = {}
@@ -239,37 +376,77 @@ def scrape_all() -> tuple[list[dict], dict[str, list[str]], date, date]:
             if s["film"] not in film_urls and s.get("url"):
                 film_urls[s["film"]] = s["url"]
 
-        # 3) Műfajok lekérése
-        genres = scrape_genres(page, film_urls)
-
-        browser.close()
-
-    print(f"\nÖsszesen {len(all_screenings)} vetítés, {len(film_urls)} film")
-    return all_screenings, genres, monday, sunday
+        # 3) Műfajok lekérése (csak a cache-ben még nem szereplő filmekhez)
+        known = cache["genres"]
+        missing = {film: url for film, url in film_urls.items() if url not in known}
+        fetched = scrape_genres(page, missing) if missing else {}
+        for film, genre_list in fetched.items():
+            if genre_list:
+                known[missing[film]] = genre_list
+        genres = {film: known.get(url, fetched.get(film, [])) for film, url in film_urls.items()}
+
+    save_cache(cache, keep_from=min(days[0], today))
+    print(f"\nÖsszesen {len(all_screenings)} vetítés, {len(film_urls)} film "
+          f"(cache: {stats['reused']} nap újrahasznosítva, {stats['scraped']} nap lekérve)")
+    return all_screenings, genres, target_weeks
+
+
+def screenings_hash(all_screenings: list, genres: dict, weeks: list[tuple[date, date]]) -> str:
+    """A normalizált vetítési adatok hash-e (a vetítések sorrendjétől független)."""
+    normalized = {
+        "weeks": [monday.isoformat() for monday, _ in weeks],
+        "screenings": sorted(
+            [s["date"], s["cinema"], s["film"], s["time"], s.get("url", "")] for s in all_screenings
+        ),
+        "genres": {film: sorted(g) for film, g in genres.items()},
+    }
+    canonical = json.dumps(normalized, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def published_hash(path: str = HTML_PATH) -> str | None:
+    """A már kirakott oldal content-hash meta tagje (None, ha nincs)."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        m = re.search(r'<meta name="content-hash" content="([0-9a-f]+)">', f.read(4096))
+    return m.group(1) if m else None
 
 
-def generate_html(all_screenings: list, genres: dict, monday: date, sunday: date) -> str:
-    mon_str = monday.strftime('%Y.%m.%d.')
-    sun_str = sunday.strftime('%Y.%m.%d.')
+def generate_html(all_screenings: list, genres: dict, weeks: list[tuple[date, date]],
+                  content_hash: str = "") -> str:
+    mon_str = weeks[0][0].strftime('%Y.%m.%d.')
+    sun_str = weeks[-1][1].strftime('%Y.%m.%d.')
+    subtitle = f"{mon_str} (hétfő) – {sun_str} (vasárnap)"
+    if len(weeks) > 1:
+        subtitle += f" · {len(weeks)} hét"
 
     screenings_json = json.dumps(all_screenings, ensure_ascii=False)
     genres_json = json.dumps(genres, ensure_ascii=False)
 
-    days = []
-    for i in range(7):
-        d = monday + timedelta(days=i)
-        days.append({
-            "date": d.isoformat(),
-            "short": HU_DAYS_SHORT[d.weekday()],
-            "label": f"{HU_DAYS_SHORT[d.weekday()]} {HU_MONTHS[d.month]}.{d.day}."
+    week_list = []
+    for monday, sunday in weeks:
+        days = []
+        for i in range(7):
+            d = monday + timedelta(days=i)
+            days.append({
+                "date": d.isoformat(),
+                "short": HU_DAYS_SHORT[d.weekday()],
+                "label": f"{HU_DAYS_SHORT[d.weekday()]} {HU_MONTHS[d.month]}.{d.day}."
+            })
+        week_list.append({
+            "monday": monday.isoformat(),
+            "label": f"{HU_MONTHS[monday.month]}.{monday.day}. – {HU_MONTHS[sunday.month]}.{sunday.day}.",
+            "days": days,
         })
-    days_json = json.dumps(days, ensure_ascii=False)
+    weeks_json = json.dumps(week_list, ensure_ascii=False)
 
     html = f"""<!DOCTYPE html>
 <html lang="hu">
 <head>
 <meta charset="UTF-8">
 <meta name="viewport" content="width=device-width, initial-scale=1.0">
+<meta name="content-hash" content="{content_hash}">
 <title>Mozihét {mon_str} – {sun_str}</title>
 <link rel="preconnect" href="https://fonts.googleapis.com">
 <link href="https://fonts.googleapis.com/css2?family=Space+Mono:wght@400;700&family=DM+Sans:wght@400;500;600;700&display=swap" rel="stylesheet">
@@ -458,10 +635,14 @@ body {{
 
 <div class="header">
   <h1>🎬 Mozihét</h1>
-  <div class="subtitle">{mon_str} (hétfő) – {sun_str} (vasárnap)</div>
+  <div class="subtitle">{subtitle}</div>
 </div>
 
 <div class="filters">
+  <div class="filter-section" id="week-section">
+    <div class="filter-label">Hét</div>
+    <div class="filter-row" id="week-filters"></div>
+  </div>
   <div class="filter-section">
     <div class="filter-label">Mozi</div>
     <div class="filter-row" id="cinema-filters">
@@ -474,9 +655,7 @@ body {{
   </div>
   <div class="filter-section">
     <div class="filter-label">Nap</div>
-    <div class="filter-row" id="day-filters">
-      <button class="filter-btn day-btn active" data-day="all">Mind</button>
-    </div>
+    <div class="filter-row" id="day-filters"></div>
   </div>
 </div>
 
@@ -486,20 +665,14 @@ body {{
 <script>
 const screenings = {screenings_json};
 const genres = {genres_json};
-const days = {days_json};
+const weeks = {weeks_json};
 
 let activeCinema = 'all';
+let activeWeek = weeks[0].monday;
 let activeDay = 'all';
 
-// Nap gombok
-const dayFilters = document.getElementById('day-filters');
-days.forEach(d => {{
-  const btn = document.createElement('button');
-  btn.className = 'filter-btn day-btn';
-  btn.dataset.day = d.date;
-  btn.textContent = d.label;
-  dayFilters.appendChild(btn);
-}});
+const weekOfDate = {{}};
+weeks.forEach(w => w.days.forEach(d => {{ weekOfDate[d.date] = w.monday; }}));
 
 // Filter kattintások
 function setupFilters(selector, varSetter) {{
@@ -512,11 +685,43 @@ function setupFilters(selector, varSetter) {{
     }});
   }});
 }}
+
+// Nap gombok: hétváltáskor újraépülnek, a szűrés "Mind"-re áll vissza
+function renderDayButtons() {{
+  const dayFilters = document.getElementById('day-filters');
+  dayFilters.innerHTML = '<button class="filter-btn day-btn active" data-day="all">Mind</button>';
+  weeks.find(w => w.monday === activeWeek).days.forEach(d => {{
+    const btn = document.createElement('button');
+    btn.className = 'filter-btn day-btn';
+    btn.dataset.day = d.date;
+    btn.textContent = d.label;
+    dayFilters.appendChild(btn);
+  }});
+  activeDay = 'all';
+  setupFilters('.day-btn', btn => activeDay = btn.dataset.day);
+}}
+
+// Hét gombok (csak több hétnél)
+if (weeks.length > 1) {{
+  const weekFilters = document.getElementById('week-filters');
+  weeks.forEach((w, i) => {{
+    const btn = document.createElement('button');
+    btn.className = 'filter-btn week-btn' + (i === 0 ? ' active' : '');
+    btn.dataset.week = w.monday;
+    btn.textContent = w.label;
+    weekFilters.appendChild(btn);
+  }});
+}} else {{
+  document.getElementById('week-section').style.display = 'none';
+}}
+
 setupFilters('.cinema-btn', btn => activeCinema = btn.dataset.cinema);
-setupFilters('.day-btn', btn => activeDay = btn.dataset.day);
+setupFilters('.week-btn', btn => {{ activeWeek = btn.dataset.week; renderDayButtons(); }});
+renderDayButtons();
 
 function render() {{
   const filtered = screenings.filter(s => {{
+    if (weekOfDate[s.date] !== activeWeek) return false;
     if (activeCinema !== 'all' && s.cinema !== activeCinema) return false;
     if (activeDay !== 'all' && s.date !== activeDay) return false;
     return true;
@@ -595,53 +800,51 @@ render();
 
 
 def send_email(monday: date, sunday: date, page_url: str):
-    smtp_user = os.environ.get("SMTP_USER")
-    smtp_pass = os.environ.get("SMTP_PASS")
-    to_emails_raw = os.environ.get("TO_EMAILS")
-
     mon_str = f"{HU_MONTHS[monday.month]}. {monday.day}."
     sun_str = f"{HU_MONTHS[sunday.month]}. {sunday.day}."
     subject = f"🎬 Mozihét: {mon_str} – {sun_str}"
     body = f"Mozihét: {monday.strftime('%Y.%m.%d.')} (hétfő) – {sunday.strftime('%Y.%m.%d.')} (vasárnap)\n\n{page_url}"
+    outbox.enqueue(subject, body)
 
-    if not smtp_user or not smtp_pass or not to_emails_raw:
-        print(f"\n[EMAIL] Nincs SMTP, tartalom:")
-        print(f"  Tárgy: {subject}")
-        print(f"  {body}")
-        return
-
-    to_emails = [e.strip() for e in re.split(r"[;,]", to_emails_raw) if e.strip()]
-
-    msg = EmailMessage()
-    msg["Subject"] = subject
-    msg["From"] = smtp_user
-    msg["To"] = ", ".join(to_emails)
-    msg.set_content(body)
 
-    ctx = ssl.create_default_context()
-    with smtplib.SMTP_SSL("smtp.gmail.com", 465, context=ctx) as server:
-        server.login(smtp_user, smtp_pass)
-        server.send_message(msg)
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Heti mozi összefoglaló.")
+    parser.add_argument("--force", action="store_true",
+                        help="akkor is írja ki az oldalt és küldjön emailt, ha a műsor nem változott")
+    parser.add_argument("--weeks", type=int, default=DEFAULT_WEEKS,
+                        help=f"ennyi hetet fed le a következő hétfőtől (1–{MAX_WEEKS}, alapértelmezés: {DEFAULT_WEEKS})")
+    args = parser.parse_args(argv)
+    if not 1 <= args.weeks <= MAX_WEEKS:
+        parser.error(f"--weeks értéke 1 és {MAX_WEEKS} között lehet")
+    return args
 
-    print(f"\n[EMAIL] Elküldve: {subject}")
 
-
-def main():
+def main(argv=None):
+    args = parse_args(argv)
     now = budapest_now()
     print(f"{'#'*60}")
     print(f"  HETI MOZI ÖSSZEFOGLALÓ – {now.strftime('%Y.%m.%d. %H:%M')}")
     print(f"{'#'*60}")
 
-    all_screenings, genres, monday, sunday = scrape_all()
-
-    html = generate_html(all_screenings, genres, monday, sunday)
-    html_path = "docs/moziheti.html"
-    os.makedirs("docs", exist_ok=True)
-    with open(html_path, "w", encoding="utf-8") as f:
-        f.write(html)
-    print(f"\nHTML mentve: {html_path}")
-
-    send_email(monday, sunday, GITHUB_PAGES_URL)
+    outbox.start()
+
+    with profiling.profile("cinema"):
+        all_screenings, genres, weeks = scrape_all(args.weeks)
+        content_hash = screenings_hash(all_screenings, genres, weeks)
+        unchanged = content_hash == published_hash()
+        if not unchanged or args.force:
+            html = generate_html(all_screenings, genres, weeks, content_hash)
+
+    if unchanged and not args.force:
+        print(f"\nA műsor nem változott (hash {content_hash}), nincs írás és email (--force felülbírálja)")
+    else:
+        os.makedirs(os.path.dirname(HTML_PATH), exist_ok=True)
+        with open(HTML_PATH, "w", encoding="utf-8") as f:
+            f.write(html)
+        print(f"\nHTML mentve: {HTML_PATH} (hash {content_hash})")
+        send_email(weeks[0][0], weeks[-1][1], GITHUB_PAGES_URL)
+
+    outbox.drain()
 
 
 if __name__ == "__main__":
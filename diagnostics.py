@@ -0,0 +1,147 @@
+"""
+Hibadiagnosztika: a legutóbbi oldalállapotok gyűrűpuffere, amit csak
+sikertelen futás esetén írunk lemezre.
+
+Minden scraper a navigációs pontokon record()-ot hív az URL-lel és azzal a
+tartalommal (HTML vagy body szöveg), ami nála amúgy is a kezében van – így a
+sikeres futás nem fizet külön rögzítésért (nincs screenshot, nincs PNG
+kódolás, nincs extra page.content()).
+
+A finish() a futás végén dönt: ha a státusz "error" vagy "decreased", vagy
+nem jött ki egyetlen előadás sem, a puffer tartalma a munkakönyvtárba kerül:
+  debug_<név>_diag.json     – időbélyeg, címke, URL a puffer minden elemére
+  debug_<név>_<i>.html/.txt – a rögzített DOM / szöveg pillanatképek
+  debug_<név>_trace_<i>.zip – Playwright trace chunkok (csak trace módban)
+
+SZINHAZ_DIAGNOSTICS=trace bekapcsolja a Playwright tracinget is (DOM
+snapshotokkal, screenshot nélkül); minden record() lezár egy trace chunkot,
+és a gyűrűpuffer az utolsó RING_SIZE chunkot tartja meg.
+"""
+
+import os
+import json
+import shutil
+import tempfile
+from collections import deque
+from datetime import datetime
+
+
+RING_SIZE = 4
+FAILURE_STATUSES = ("error", "decreased")
+
+
+def tracing_enabled() -> bool:
+    return os.environ.get("SZINHAZ_DIAGNOSTICS", "").strip().lower() == "trace"
+
+
+class Diagnostics:
+    def __init__(self, name: str, size: int = RING_SIZE):
+        self.name = name
+        self.ring = deque(maxlen=size)
+        self.context = None
+        self.trace_dir = None
+        self.chunk_index = 0
+
+    def attach(self, context):
+        """A böngésző context csatolása; trace módban elindítja a tracinget."""
+        self.context = context
+        if tracing_enabled():
+            self.trace_dir = tempfile.mkdtemp(prefix=f"trace_{self.name}_")
+            context.tracing.start(snapshots=True, screenshots=False)
+            context.tracing.start_chunk()
+
+    def _stop_chunk(self) -> str | None:
+        if self.trace_dir is None or self.context is None:
+            return None
+        path = os.path.join(self.trace_dir, f"chunk_{self.chunk_index}.zip")
+        self.chunk_index += 1
+        try:
+            self.context.tracing.stop_chunk(path=path)
+        except Exception:
+            return None
+        return path
+
+    def record(self, page, label: str, html: str | None = None, text: str | None = None,
+               url: str | None = None):
+        """
+        Egy oldalállapot felvétele a pufferbe (URL + a már meglévő tartalom).
+        Böngésző nélküli (HTTP) letöltésnél page=None, és az URL-t kell megadni.
+        """
+        if url is None:
+            try:
+                url = page.url
+            except Exception:
+                url = "?"
+        trace = self._stop_chunk()
+        if trace is not None:
+            try:
+                self.context.tracing.start_chunk()
+            except Exception:
+                pass
+        if len(self.ring) == self.ring.maxlen:
+            evicted = self.ring[0].get("trace")
+            if evicted and os.path.exists(evicted):
+                os.remove(evicted)
+        self.ring.append({
+            "at": datetime.now().isoformat(timespec="seconds"),
+            "label": label,
+            "url": url,
+            "html": html,
+            "text": text,
+            "trace": trace,
+        })
+
+    def detach(self):
+        """A böngésző bezárása előtt: az utolsó trace chunk lezárása."""
+        if self.trace_dir is not None and self.context is not None:
+            path = self._stop_chunk()
+            if path is not None and self.ring:
+                self.ring[-1]["tail_trace"] = path
+            try:
+                self.context.tracing.stop()
+            except Exception:
+                pass
+        self.context = None
+
+    def should_dump(self, result: dict) -> bool:
+        return (result.get("status") in FAILURE_STATUSES
+                or (result.get("status") != "site_down" and not result.get("event_count")))
+
+    def finish(self, result: dict):
+        """Hiba esetén lemezre írja a puffert, egyébként csak eldobja."""
+        try:
+            if self.should_dump(result) and self.ring:
+                self._dump(result)
+        finally:
+            if self.trace_dir is not None:
+                shutil.rmtree(self.trace_dir, ignore_errors=True)
+                self.trace_dir = None
+            self.ring.clear()
+
+    def _dump(self, result: dict):
+        base = f"debug_{self.name}"
+        entries = []
+        for i, entry in enumerate(self.ring):
+            meta = {"at": entry["at"], "label": entry["label"], "url": entry["url"]}
+            if entry["html"] is not None:
+                meta["file"] = f"{base}_{i}.html"
+                with open(meta["file"], "w", encoding="utf-8") as f:
+                    f.write(entry["html"])
+            elif entry["text"] is not None:
+                meta["file"] = f"{base}_{i}.txt"
+                with open(meta["file"], "w", encoding="utf-8") as f:
+                    f.write(entry["text"])
+            for key in ("trace", "tail_trace"):
+                if entry.get(key) and os.path.exists(entry[key]):
+                    suffix = "" if key == "trace" else "_tail"
+                    meta[key] = f"{base}_trace_{i}{suffix}.zip"
+                    shutil.copyfile(entry[key], meta[key])
+            entries.append(meta)
+
+        with open(f"{base}_diag.json", "w", encoding="utf-8") as f:
+            json.dump({
+                "status": result.get("status"),
+                "detail": result.get("detail"),
+                "entries": entries,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"[DIAG] {self.name}: {len(entries)} oldalállapot mentve ({base}_*)")
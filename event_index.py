@@ -0,0 +1,213 @@
+"""
+Színházközi előadás-index: a színházak state fájljaiból egyetlen, dátum
+szerint rendezett táblát épít (dátum, színház, cím, normalizált cím), és
+az event_index.json fájlba menti.
+
+Frissítés inkrementális: színházanként eltároljuk a state fájl méretét /
+módosítási idejét és az előadáslista hash-ét, és csak annak a színháznak
+a sorait építjük újra, amelyiknél az előadások tényleg változtak. A fájl
+nincs commitolva; a GitHub Actions futások között a run-metadata cache-ben
+utazik, különben minden futás mindent újraindexelne.
+
+Használat:
+  python event_index.py date 2026-03-14 [--to 2026-03-20] [--only katona,vig]
+  python event_index.py search "pekingi"
+  python event_index.py next "Pekingi ősz" [--from 2026-03-01]
+  python event_index.py rebuild
+"""
+
+import os
+import re
+import sys
+import json
+import hashlib
+import argparse
+import unicodedata
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+from scraper_utils import load_state
+from theatres import THEATRES
+
+
+INDEX_FILE = "event_index.json"
+INDEX_VERSION = 1
+
+
+def normalize_title(title: str) -> str:
+    """Kisbetűs, ékezet és írásjel nélküli cím a kereséshez ("Pekingi ősz" → "pekingi osz")."""
+    decomposed = unicodedata.normalize("NFKD", title.casefold())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^\w]+", " ", stripped).split())
+
+
+def events_hash(events: list) -> str:
+    canonical = json.dumps(sorted(map(list, events)), ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def _signature(path: str) -> list | None:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _empty_index() -> dict:
+    return {"version": INDEX_VERSION, "sources": {}, "rows": []}
+
+
+def load_index(path: str = INDEX_FILE) -> dict:
+    if not os.path.exists(path):
+        return _empty_index()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return _empty_index()
+    if index.get("version") != INDEX_VERSION:
+        return _empty_index()
+    return index
+
+
+def save_index(index: dict, path: str = INDEX_FILE):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def update_index(path: str = INDEX_FILE, keys: list[str] | None = None,
+                 force: bool = False) -> tuple[dict, list[str]]:
+    """
+    Az index frissítése a state fájlokból. Visszaadja az indexet és azokat
+    a színházkulcsokat, amelyeknek a sorai újraépültek.
+    rows: [dátum_iso, színház_kulcs, cím, normalizált_cím], dátum szerint rendezve.
+    """
+    index = _empty_index() if force else load_index(path)
+    sources = index["sources"]
+    rows_by_key = {}
+    for row in index["rows"]:
+        rows_by_key.setdefault(row[1], []).append(row)
+
+    rebuilt = []
+    refreshed = False
+    for key in keys or list(THEATRES):
+        state_file = THEATRES[key]["state_file"]
+        signature = _signature(state_file)
+        source = sources.get(key)
+        if signature is None:
+            if source is not None:
+                sources.pop(key)
+                rows_by_key.pop(key, None)
+                rebuilt.append(key)
+            continue
+        if source is not None and source.get("signature") == signature:
+            continue
+
+        events = load_state(state_file).get("events", [])
+        digest = events_hash(events)
+        if source is not None and source.get("hash") == digest:
+            # Csak a fájl ideje változott: az új aláírást is mentjük, különben
+            # minden további futás újraolvasná
+            source["signature"] = signature
+            refreshed = True
+            continue
+
+        rows_by_key[key] = [[d, key, t, normalize_title(t)] for d, t in sorted(map(tuple, events))]
+        sources[key] = {"signature": signature, "hash": digest, "count": len(events)}
+        rebuilt.append(key)
+
+    index["rows"] = sorted(row for rows in rows_by_key.values() for row in rows)
+    if rebuilt or refreshed or not os.path.exists(path):
+        save_index(index, path)
+    return index, rebuilt
+
+
+def _dates(index: dict) -> list[str]:
+    return [row[0] for row in index["rows"]]
+
+
+def between(index: dict, start: date, end: date, keys: list[str] | None = None) -> list[list]:
+    """A [start, end] zárt intervallum előadásai (dátum, színház, cím sorrendben)."""
+    dates = _dates(index)
+    lo = bisect_left(dates, start.isoformat())
+    hi = bisect_right(dates, end.isoformat())
+    return [row for row in index["rows"][lo:hi] if keys is None or row[1] in keys]
+
+
+def search(index: dict, query: str, keys: list[str] | None = None) -> list[list]:
+    """Cím szerinti keresés (normalizált részsztring, minden szó egyezzen)."""
+    words = normalize_title(query).split()
+    return [row for row in index["rows"]
+            if all(w in row[3] for w in words) and (keys is None or row[1] in keys)]
+
+
+def next_performance(index: dict, query: str, after: date,
+                     keys: list[str] | None = None) -> list | None:
+    """A cím első előadása after napon vagy utána (None, ha nincs)."""
+    start = bisect_left(_dates(index), after.isoformat())
+    words = normalize_title(query).split()
+    for row in index["rows"][start:]:
+        if all(w in row[3] for w in words) and (keys is None or row[1] in keys):
+            return row
+    return None
+
+
+def format_rows(rows: list[list]) -> list[str]:
+    return [f"{d}  {THEATRES[k]['label']:<8} {t}" for d, k, t, _ in rows]
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Színházközi előadás-index lekérdezése.")
+    parser.add_argument("--only", help="vesszővel elválasztott színházkulcsok")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_date = sub.add_parser("date", help="egy nap vagy időszak előadásai")
+    p_date.add_argument("start", type=date.fromisoformat)
+    p_date.add_argument("--to", type=date.fromisoformat, help="utolsó nap (alapértelmezés: start)")
+
+    p_search = sub.add_parser("search", help="keresés cím szerint")
+    p_search.add_argument("query")
+
+    p_next = sub.add_parser("next", help="egy darab következő előadása")
+    p_next.add_argument("query")
+    p_next.add_argument("--from", dest="after", type=date.fromisoformat, default=date.today())
+
+    sub.add_parser("rebuild", help="az index teljes újraépítése")
+
+    args = parser.parse_args(argv)
+    args.keys = None
+    if args.only:
+        args.keys = [k.strip() for k in args.only.split(",") if k.strip()]
+        unknown = [k for k in args.keys if k not in THEATRES]
+        if unknown:
+            parser.error(f"ismeretlen színház: {', '.join(unknown)} (választható: {', '.join(THEATRES)})")
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    index, _ = update_index(force=args.command == "rebuild")
+
+    if args.command == "rebuild":
+        print(f"[INDEX] {len(index['rows'])} előadás, {len(index['sources'])} színház")
+        return 0
+    if args.command == "date":
+        rows = between(index, args.start, args.to or args.start, args.keys)
+    elif args.command == "search":
+        rows = search(index, args.query, args.keys)
+    else:
+        row = next_performance(index, args.query, args.after, args.keys)
+        rows = [row] if row else []
+
+    if not rows:
+        print("Nincs találat.")
+        return 1
+    print("\n".join(format_rows(rows)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
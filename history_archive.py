@@ -0,0 +1,356 @@
+"""
+Az előadás-snapshotok tömör, csak hozzáfűzhető archívuma
+(history_archive.bin), hogy visszakereshető legyen, mikor jelent meg vagy
+tűnt el egy előadás – git commitok visszajátszása nélkül.
+
+Formátum: fejléc (MAGIC), utána chunkok: [tag: 1 bájt][hossz: varint][payload]
+  "S" – új sztring a sztringtáblába (UTF-8). Az azonosító a megjelenés
+        sorrendje, színházkulcsok és címek közösen.
+  "R" – egy színház egy futása, az előző snapshotjához képesti deltaként:
+        varint színház_id, varint unix idő (s),
+        varint törölt_db, törölt elemek, varint új_db, új elemek.
+        Elem: (nap-ordinál delta az előző elemhez képest, cím_id), a
+        lista (ordinál, cím_id) szerint rendezve – a delta többnyire 0–3.
+Csak változás esetén kerül be "R" chunk, így a fájl (és a commit) csak
+akkor nő, ha az előadások tényleg változtak. A csonka utolsó chunkot
+(megszakadt írás) olvasáskor figyelmen kívül hagyjuk, hozzáfűzés előtt
+pedig levágjuk, különben az utána írt chunkok olvashatatlanok lennének.
+
+Használat:
+  python history_archive.py first-seen "Pekingi ősz"
+  python history_archive.py at 2026-03-01T12:00 [--only katona]
+  python history_archive.py export changes.csv
+  python history_archive.py backfill        # a state fájlok git történetéből
+"""
+
+import os
+import sys
+import csv
+import json
+import argparse
+import subprocess
+from datetime import date, datetime, timezone
+
+from event_index import normalize_title
+from scraper_utils import load_state
+from theatres import THEATRES
+
+
+ARCHIVE_FILE = "history_archive.bin"
+MAGIC = b"SZHA\x01"
+
+
+def encode_varint(value: int, out: bytearray):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varint(data: bytes, pos: int) -> tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _encode_items(items: list[tuple[int, int]], out: bytearray):
+    encode_varint(len(items), out)
+    prev = 0
+    for ordinal, title_id in sorted(items):
+        encode_varint(ordinal - prev, out)
+        encode_varint(title_id, out)
+        prev = ordinal
+
+
+def _decode_items(data: bytes, pos: int) -> tuple[list[tuple[int, int]], int]:
+    count, pos = decode_varint(data, pos)
+    items = []
+    prev = 0
+    for _ in range(count):
+        delta, pos = decode_varint(data, pos)
+        title_id, pos = decode_varint(data, pos)
+        prev += delta
+        items.append((prev, title_id))
+    return items, pos
+
+
+def _chunks(data: bytes):
+    """(tag, payload, chunk vége) a MAGIC után; a csonka utolsó chunknál megáll."""
+    pos = len(MAGIC)
+    while pos < len(data):
+        try:
+            tag = data[pos:pos + 1]
+            length, start = decode_varint(data, pos + 1)
+        except IndexError:
+            return
+        end = start + length
+        if end > len(data):
+            return
+        yield tag, data[start:end], end
+        pos = end
+
+
+def complete_length(data: bytes) -> int:
+    """Az utolsó teljes chunk végének pozíciója (0, ha a fejléc is csonka)."""
+    if not data.startswith(MAGIC):
+        return 0
+    end = len(MAGIC)
+    for _, _, end in _chunks(data):
+        pass
+    return end
+
+
+def repair_archive(path: str = ARCHIVE_FILE) -> int:
+    """A megszakadt írásból maradt csonka utolsó chunk levágása. Visszaadja a levágott bájtokat."""
+    if not os.path.exists(path):
+        return 0
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGIC) and not MAGIC.startswith(data):
+        raise ValueError(f"{path}: ismeretlen formátum")
+    keep = complete_length(data)
+    if keep < len(data):
+        with open(path, "r+b") as f:
+            f.truncate(keep)
+            f.flush()
+            os.fsync(f.fileno())
+        print(f"[ARCHÍVUM] Csonka utolsó chunk levágva ({len(data) - keep} bájt)")
+    return len(data) - keep
+
+
+def read_archive(path: str = ARCHIVE_FILE):
+    """
+    Az archívum chunkjai sorban: ("S", sztring) és
+    ("R", színház_id, unix_idő, törölt, új) tuple-ök.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        if MAGIC.startswith(data):
+            return
+        raise ValueError(f"{path}: ismeretlen formátum")
+    for tag, payload, _ in _chunks(data):
+        if tag == b"S":
+            yield ("S", payload.decode("utf-8"))
+        elif tag == b"R":
+            theatre_id, p = decode_varint(payload, 0)
+            at, p = decode_varint(payload, p)
+            removed, p = _decode_items(payload, p)
+            added, p = _decode_items(payload, p)
+            yield ("R", theatre_id, at, removed, added)
+
+
+def replay(path: str = ARCHIVE_FILE, until: float | None = None, on_run=None):
+    """
+    A futások visszajátszása (until: unix időig bezárólag).
+    on_run(key, at, removed, added, strings) minden futásnál meghívódik.
+    Visszaad: (sztringtábla, {színház: {(ordinál, cím_id)}}).
+    """
+    strings = []
+    snapshots = {}
+    for chunk in read_archive(path):
+        if chunk[0] == "S":
+            strings.append(chunk[1])
+            continue
+        _, theatre_id, at, removed, added = chunk
+        if until is not None and at > until:
+            break
+        key = strings[theatre_id]
+        current = snapshots.setdefault(key, set())
+        current.difference_update(removed)
+        current.update(added)
+        if on_run is not None:
+            on_run(key, at, removed, added, strings)
+    return strings, snapshots
+
+
+def append_snapshots(snapshots: dict, at: datetime, path: str = ARCHIVE_FILE) -> list[str]:
+    """
+    snapshots: {színház: [[dátum_iso, cím], ...]}. Színházanként csak akkor
+    ír, ha az előadások változtak az archívum utolsó állapotához képest.
+    Visszaadja a ténylegesen archivált színházakat.
+    """
+    repair_archive(path)
+    strings, archived = replay(path)
+    ids = {s: i for i, s in enumerate(strings)}
+    out = bytearray() if os.path.exists(path) and os.path.getsize(path) else bytearray(MAGIC)
+
+    def intern(text: str) -> int:
+        if text not in ids:
+            payload = text.encode("utf-8")
+            out.extend(b"S")
+            encode_varint(len(payload), out)
+            out.extend(payload)
+            ids[text] = len(ids)
+        return ids[text]
+
+    timestamp = int(at.timestamp())
+    written = []
+    for key, events in snapshots.items():
+        current = {(date.fromisoformat(d).toordinal(), intern(t)) for d, t in events}
+        previous = archived.get(key, set())
+        removed, added = previous - current, current - previous
+        if not removed and not added:
+            continue
+        payload = bytearray()
+        encode_varint(intern(key), payload)
+        encode_varint(timestamp, payload)
+        _encode_items(list(removed), payload)
+        _encode_items(list(added), payload)
+        out.extend(b"R")
+        encode_varint(len(payload), out)
+        out.extend(payload)
+        written.append(key)
+
+    if written:
+        with open(path, "ab") as f:
+            f.write(out)
+            f.flush()
+            os.fsync(f.fileno())
+    return written
+
+
+def archive_states(at: datetime, keys: list[str] | None = None, path: str = ARCHIVE_FILE) -> list[str]:
+    """A színházak aktuális state fájljainak archiválása."""
+    snapshots = {}
+    for key in keys or list(THEATRES):
+        state_file = THEATRES[key]["state_file"]
+        if os.path.exists(state_file):
+            snapshots[key] = load_state(state_file).get("events", [])
+    return append_snapshots(snapshots, at, path)
+
+
+def snapshot_at(at: datetime, path: str = ARCHIVE_FILE) -> dict:
+    """{színház: [[dátum_iso, cím], ...]} az adott időpontban."""
+    strings, snapshots = replay(path, until=at.timestamp())
+    return {
+        key: sorted([date.fromordinal(o).isoformat(), strings[t]] for o, t in items)
+        for key, items in snapshots.items()
+    }
+
+
+def first_seen(query: str, path: str = ARCHIVE_FILE) -> list[dict]:
+    """
+    A címre illeszkedő darabok első megjelenése színházanként: mikor került
+    be először az archívumba, és arra milyen dátumra.
+    """
+    words = normalize_title(query).split()
+    matches = {}
+
+    def on_run(key, at, removed, added, strings):
+        for ordinal, title_id in added:
+            title = strings[title_id]
+            if (key, title) in matches or not all(w in normalize_title(title) for w in words):
+                continue
+            matches[(key, title)] = {"theatre": key, "title": title, "first_seen": at,
+                                     "date": date.fromordinal(ordinal).isoformat()}
+
+    replay(path, on_run=on_run)
+    return sorted(matches.values(), key=lambda m: m["first_seen"])
+
+
+def export_changes(out, path: str = ARCHIVE_FILE) -> int:
+    """Minden változás CSV-be: run_at, theatre, change (+/-), date, title."""
+    writer = csv.writer(out)
+    writer.writerow(["run_at", "theatre", "change", "date", "title"])
+    rows = 0
+
+    def on_run(key, at, removed, added, strings):
+        nonlocal rows
+        run_at = datetime.fromtimestamp(at, tz=timezone.utc).isoformat()
+        for sign, items in (("-", removed), ("+", added)):
+            for ordinal, title_id in sorted(items):
+                writer.writerow([run_at, key, sign, date.fromordinal(ordinal).isoformat(), strings[title_id]])
+                rows += 1
+
+    replay(path, on_run=on_run)
+    return rows
+
+
+def _git(*args: str) -> str:
+    return subprocess.run(["git", *args], check=True, capture_output=True, text=True).stdout
+
+
+def backfill_from_git(path: str = ARCHIVE_FILE) -> int:
+    """A state fájlok git történetének visszajátszása egy üres archívumba."""
+    if os.path.exists(path):
+        raise SystemExit(f"{path} már létezik, a backfill csak üres archívummal fut")
+    files = {THEATRES[k]["state_file"]: k for k in THEATRES}
+    log = _git("log", "--reverse", "--format=%H %cI", "--", *files)
+    runs = 0
+    for line in log.splitlines():
+        commit, committed_at = line.split(" ", 1)
+        snapshots = {}
+        for state_file, key in files.items():
+            try:
+                snapshots[key] = json.loads(_git("show", f"{commit}:{state_file}")).get("events", [])
+            except (subprocess.CalledProcessError, json.JSONDecodeError):
+                continue
+        runs += len(append_snapshots(snapshots, datetime.fromisoformat(committed_at), path))
+    return runs
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Előadás-történet archívum.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_first = sub.add_parser("first-seen", help="mikor jelent meg először egy darab")
+    p_first.add_argument("query")
+
+    p_at = sub.add_parser("at", help="az archivált állapot egy időpontban")
+    p_at.add_argument("when", type=datetime.fromisoformat)
+    p_at.add_argument("--only", help="vesszővel elválasztott színházkulcsok")
+
+    p_export = sub.add_parser("export", help="minden változás CSV-be")
+    p_export.add_argument("output", nargs="?", default="-")
+
+    sub.add_parser("backfill", help="archívum építése a state fájlok git történetéből")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    if args.command == "first-seen":
+        matches = first_seen(args.query)
+        if not matches:
+            print("Nincs találat.")
+            return 1
+        for m in matches:
+            seen = datetime.fromtimestamp(m["first_seen"]).strftime("%Y-%m-%d %H:%M")
+            print(f"{seen}  {THEATRES.get(m['theatre'], {}).get('label', m['theatre']):<8} "
+                  f"{m['title']} (első dátum: {m['date']})")
+
+    elif args.command == "at":
+        when = args.when if args.when.tzinfo else args.when.astimezone()
+        keys = args.only.split(",") if args.only else None
+        for key, events in snapshot_at(when).items():
+            if keys and key not in keys:
+                continue
+            for d, title in events:
+                print(f"{d}  {THEATRES.get(key, {}).get('label', key):<8} {title}")
+
+    elif args.command == "export":
+        if args.output == "-":
+            rows = export_changes(sys.stdout)
+        else:
+            with open(args.output, "w", encoding="utf-8", newline="") as f:
+                rows = export_changes(f)
+        print(f"[ARCHÍVUM] {rows} sor exportálva", file=sys.stderr)
+
+    else:
+        runs = backfill_from_git()
+        print(f"[ARCHÍVUM] {runs} futás archiválva a git történetből")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
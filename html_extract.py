@@ -0,0 +1,65 @@
+"""
+Linkek kinyerése a műsor-HTML-ből BeautifulSoup-pal és előre lefordított
+CSS szelektorokkal (soupsieve), a teljes dokumentumon futó regexek mellé.
+
+A dokumentumot egyszer, csak az <a href> tagekre szűrve (SoupStrainer)
+parse-oljuk; az attribútumok sorrendje, idézőjele (' vagy "), az
+entitások, a köztük lévő szóközök és a link szövegét körülvevő
+beágyazott tagek (<span>, <strong>) nem számítanak. Parser: lxml, ha
+telepítve van, egyébként a beépített html.parser.
+
+Backend (SZINHAZ_HTML_BACKEND):
+  auto  – alapértelmezés: regex, és ha az egy linket sem talál, soup
+  soup  – csak soup
+  regex – csak regex (bs4 nélkül is ez fut)
+A regex marad az elsődleges út: a bench_extract.py mérése szerint egy
+~560 KB-os oldalon ~2 ms, a soup ~230 ms (lxml) / ~290 ms (html.parser).
+A minták nem lépnek vissza katasztrofálisan (a [^>]* és [^"]* csoportokat
+a határoló karakter lezárja), így a soup a robusztusságot adja, nem a
+sebességet: akkor fut, amikor a markup úgy változott, hogy a regex elhasal.
+"""
+
+import os
+import importlib.util
+
+try:
+    import soupsieve
+    from bs4 import BeautifulSoup, NavigableString, SoupStrainer
+except ImportError:
+    BeautifulSoup = None
+
+
+PARSER = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+
+def available() -> bool:
+    return BeautifulSoup is not None
+
+
+def backend() -> str:
+    if not available():
+        return "regex"
+    choice = os.environ.get("SZINHAZ_HTML_BACKEND", "").strip().lower()
+    return choice if choice in ("soup", "regex") else "auto"
+
+
+def compile_selector(css: str):
+    """Modulszinten egyszer lefordított szelektor (None, ha nincs bs4)."""
+    return soupsieve.compile(css) if available() else None
+
+
+def link_text(tag) -> str | None:
+    """
+    A link szövege a beágyazott tagekkel együtt, összevont szóközökkel.
+    None, ha szöveg nincs, csak tag (pl. képes link) – ezeket a regex sem veszi fel.
+    """
+    text = " ".join(tag.get_text(" ").split())
+    if not text and any(not isinstance(c, NavigableString) for c in tag.contents):
+        return None
+    return text
+
+
+def select_links(html: str, selector) -> list[tuple[str, str | None]]:
+    """(href, szöveg) párok a szelektorra illeszkedő linkekre, dokumentum-sorrendben."""
+    soup = BeautifulSoup(html, PARSER, parse_only=SoupStrainer("a", href=True))
+    return [(a["href"], link_text(a)) for a in selector.select(soup)]
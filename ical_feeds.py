@@ -0,0 +1,183 @@
+"""
+iCalendar (.ics) feedek a színházi előadásokból a GitHub Pages-re (docs/ical/):
+színházanként egy (<kulcs>.ics) és egy összesített (all.ics).
+
+Minden előadás egész napos VEVENT, a UID a színházból, a dátumból és a
+címből képzett hash, így futásról futásra ugyanaz. Az előadások
+állapotát (első megjelenés, SEQUENCE, LAST-MODIFIED, STATUS) a
+docs/ical/feeds.json tartja:
+- új előadás: SEQUENCE 0, CONFIRMED;
+- a műsorból eltűnt jövőbeli előadás: CANCELLED, SEQUENCE + 1 (ebből
+  tudja a naptár kliens, hogy törölje); ha visszakerül, újra CONFIRMED;
+- elmúlt előadás változatlanul marad PAST_KEEP_DAYS napig, a lemondott
+  CANCELLED_KEEP_DAYS napig, utána kikerül a feedből.
+A DTSTAMP a LAST-MODIFIED, nem a futás ideje, így változatlan színház
+feedje bájtra azonos, és csak azok a fájlok íródnak újra, amelyeknek az
+előadásai változtak.
+
+Használat: python ical_feeds.py   (a main.py újraindexelés után meghívja)
+"""
+
+import os
+import json
+import hashlib
+from datetime import date, datetime, timedelta, timezone
+
+import event_index
+from scraper_utils import write_if_changed
+from theatres import THEATRES
+
+
+OUTPUT_DIR = "docs/ical"
+STATE_FILE = "feeds.json"
+COMBINED_FEED = "all"
+UID_DOMAIN = "szinhaz-ical"
+PAST_KEEP_DAYS = 60
+CANCELLED_KEEP_DAYS = 14
+PUBLISHED_TTL = "PT3H"
+
+
+def event_uid(key: str, iso: str, title: str) -> str:
+    digest = hashlib.sha1(f"{key}|{iso}|{title}".encode("utf-8")).hexdigest()[:20]
+    return f"{digest}@{UID_DOMAIN}"
+
+
+def _utc_stamp(when: datetime) -> str:
+    return when.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def escape_text(text: str) -> str:
+    return (text.replace("\\", "\\\\").replace(";", "\\;")
+            .replace(",", "\\,").replace("\n", "\\n"))
+
+
+def fold_line(line: str) -> str:
+    """RFC 5545 sortördelés: legfeljebb 75 bájtos sorok, UTF-8 karakter közepén nem vág."""
+    out = []
+    current, size = "", 0
+    for char in line:
+        width = len(char.encode("utf-8"))
+        if size + width > 75:
+            out.append(current)
+            current, size = " ", 1
+        current += char
+        size += width
+    out.append(current)
+    return "\r\n".join(out)
+
+
+def update_entries(entries: dict, rows: list[list], keys: list[str], now: datetime) -> set[str]:
+    """
+    A feeds.json bejegyzéseinek frissítése az index soraiból, a megadott
+    színházakra. Visszaadja azokat a színházkulcsokat, amelyeknek a feedje változott.
+    entries: {uid: {"key", "date", "title", "status", "seq", "created", "modified"}}
+    """
+    stamp = _utc_stamp(now)
+    today = now.date()
+    current = {}
+    for iso, key, title, _ in rows:
+        if key in keys:
+            current[event_uid(key, iso, title)] = (key, iso, title)
+
+    changed = set()
+    for uid, (key, iso, title) in current.items():
+        entry = entries.get(uid)
+        if entry is None:
+            entries[uid] = {"key": key, "date": iso, "title": title, "status": "CONFIRMED",
+                            "seq": 0, "created": stamp, "modified": stamp}
+            changed.add(key)
+        elif entry["status"] == "CANCELLED":
+            entry.update(status="CONFIRMED", seq=entry["seq"] + 1, modified=stamp)
+            changed.add(key)
+
+    for uid, entry in list(entries.items()):
+        if entry["key"] not in keys or uid in current:
+            continue
+        day = date.fromisoformat(entry["date"])
+        if entry["status"] == "CONFIRMED" and day > today:
+            entry.update(status="CANCELLED", seq=entry["seq"] + 1, modified=stamp)
+            changed.add(entry["key"])
+        elif day < today - timedelta(days=PAST_KEEP_DAYS if entry["status"] == "CONFIRMED"
+                                     else CANCELLED_KEEP_DAYS):
+            entries.pop(uid)
+            changed.add(entry["key"])
+    return changed
+
+
+def render_feed(name: str, entries: list[tuple[str, dict]]) -> bytes:
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//szinhaz//ical_feeds//HU",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{escape_text(name)}",
+        "X-WR-TIMEZONE:Europe/Budapest",
+        f"X-PUBLISHED-TTL:{PUBLISHED_TTL}",
+    ]
+    for uid, e in sorted(entries, key=lambda item: (item[1]["date"], item[1]["key"], item[1]["title"])):
+        theatre = THEATRES.get(e["key"], {})
+        start = date.fromisoformat(e["date"])
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:{uid}",
+            f"DTSTAMP:{e['modified']}",
+            f"CREATED:{e['created']}",
+            f"LAST-MODIFIED:{e['modified']}",
+            f"SEQUENCE:{e['seq']}",
+            f"DTSTART;VALUE=DATE:{start.strftime('%Y%m%d')}",
+            f"DTEND;VALUE=DATE:{(start + timedelta(days=1)).strftime('%Y%m%d')}",
+            f"SUMMARY:{escape_text(e['title'])} ({escape_text(theatre.get('label', e['key']))})",
+            f"LOCATION:{escape_text(theatre.get('name', e['key']))}",
+        ]
+        if theatre.get("url"):
+            lines.append(f"URL:{theatre['url']}")
+        lines += [f"STATUS:{e['status']}", "TRANSP:TRANSPARENT", "END:VEVENT"]
+    lines.append("END:VCALENDAR")
+    return ("\r\n".join(fold_line(line) for line in lines) + "\r\n").encode("utf-8")
+
+
+def load_entries(output_dir: str = OUTPUT_DIR) -> dict:
+    try:
+        with open(os.path.join(output_dir, STATE_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def generate(index: dict | None = None, output_dir: str = OUTPUT_DIR,
+             now: datetime | None = None) -> list[str]:
+    """A feedek frissítése. Visszaadja az újraírt fájlok listáját."""
+    if index is None:
+        index, _ = event_index.update_index()
+    now = now or datetime.now(tz=timezone.utc)
+    os.makedirs(output_dir, exist_ok=True)
+
+    entries = load_entries(output_dir)
+    # Csak azokat a színházakat vetjük össze, amelyekről van adat az indexben,
+    # különben egy hiányzó state fájl minden előadást lemondottnak jelölne
+    keys = [key for key in THEATRES if key in index["sources"]]
+    changed = update_entries(entries, index["rows"], keys, now)
+    missing = [key for key in THEATRES if not os.path.exists(os.path.join(output_dir, f"{key}.ics"))]
+    combined_path = os.path.join(output_dir, f"{COMBINED_FEED}.ics")
+
+    written = []
+    for key in sorted(changed | set(missing)):
+        theatre_entries = [(uid, e) for uid, e in entries.items() if e["key"] == key]
+        feed = render_feed(f"{THEATRES[key]['label']} – előadások", theatre_entries)
+        if write_if_changed(os.path.join(output_dir, f"{key}.ics"), feed):
+            written.append(f"{key}.ics")
+
+    if changed or not os.path.exists(combined_path):
+        if write_if_changed(combined_path, render_feed("Színházi előadások", list(entries.items()))):
+            written.append(f"{COMBINED_FEED}.ics")
+
+    if changed:
+        state_text = json.dumps(entries, ensure_ascii=False, sort_keys=True, indent=0)
+        write_if_changed(os.path.join(output_dir, STATE_FILE), state_text)
+    return written
+
+
+if __name__ == "__main__":
+    changed = generate()
+    print(f"[ICAL] {len(changed)} feed frissítve" + (f": {', '.join(changed)}" if changed else ""))
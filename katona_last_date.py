@@ -5,14 +5,18 @@ A katona.jegymester.hu oldalról bináris kereséssel megkeresi
 az utolsó oldalt ahol van esemény, majd kinyeri a dátumot és az előadás nevét.
 """
 
-import os
 import re
-import json
 from datetime import datetime, date
 from zoneinfo import ZoneInfo
 
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
-from scraper_utils import compare_events
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from diagnostics import Diagnostics
+from navigation import goto, SiteDownError
+from scraper_utils import (
+    Event, compare_events, browser_session, load_state, save_state,
+    events_from_json, events_to_json, latest_date,
+    fingerprint, probe_allowed, probe_changed_keys, probe_unchanged_result,
+)
 
 
 BASE_URL = "https://katona.jegymester.hu/main"
@@ -33,12 +37,14 @@ def build_url(active_page: int) -> str:
     return f"{BASE_URL}?activePage={active_page}&osl=events&ot=tickets&searchPhrase="
 
 
-def page_is_empty(page) -> bool:
+def page_is_empty(page, diag=None, label: str = "") -> bool:
     try:
         body_text = page.inner_text("body")
-        return NO_EVENTS_TEXT in body_text
     except Exception:
         return True
+    if diag is not None:
+        diag.record(page, label, text=body_text)
+    return NO_EVENTS_TEXT in body_text
 
 
 def extract_dates_from_text(text: str) -> list[date]:
@@ -79,7 +85,7 @@ def extract_dates_from_text(text: str) -> list[date]:
     return sorted(set(dates))
 
 
-def extract_events_from_page(page) -> list[tuple[date, str]]:
+def extract_events_from_page(page) -> list[Event]:
     """
     Megpróbálja a jegymester oldalról az egyes eseményeket kinyerni
     (dátum + előadásnév). Több szelektor-stratégiát is kipróbál.
@@ -124,7 +130,7 @@ def extract_events_from_page(page) -> list[tuple[date, str]]:
                                 break
 
                     for d in dates:
-                        events.append((d, title))
+                        events.append(Event(d, title))
                     found_any = True
                 except Exception:
                     continue
@@ -149,37 +155,46 @@ def extract_events_from_page(page) -> list[tuple[date, str]]:
                         title = prev_line
                         break
                 for d in dates:
-                    events.append((d, title))
+                    events.append(Event(d, title))
 
     # Stratégia 3: Végső fallback – csak dátumok
     if not events:
         text = page.inner_text("body")
         for d in extract_dates_from_text(text):
-            events.append((d, "?"))
+            events.append(Event(d, "?"))
 
     return events
 
 
-def find_last_nonempty_page(page, max_pages=60) -> int:
+def load_page(page, diag, page_num: int, memo: dict, label: str,
+              settle_ms: int = 1500) -> list[Event] | None:
+    """
+    Egy találati oldal betöltése és kinyerése; None, ha az oldal üres.
+    Az eredmény a futáson belüli memo-ba kerül (oldalszám → események vagy
+    None), így a bináris keresés, a próba és a scrape fázis ugyanazt az
+    oldalt nem tölti be kétszer.
+    """
+    if page_num in memo:
+        return memo[page_num]
+    goto(page, build_url(page_num), wait_until="networkidle", timeout=60000)
+    page.wait_for_timeout(settle_ms)
+    if page_is_empty(page, diag, label):
+        memo[page_num] = None
+    else:
+        memo[page_num] = extract_events_from_page(page)
+    return memo[page_num]
+
+
+def find_last_nonempty_page(page, diag, memo: dict, max_pages=60) -> int:
     print("[KATONA] Ellenőrzöm az 1. oldalt...")
-    page.goto(build_url(1), wait_until="networkidle", timeout=60000)
-    page.wait_for_timeout(2000)
-
-    try:
-        page.screenshot(path="debug_page1.png")
-    except Exception:
-        pass
-
-    if page_is_empty(page):
+    if load_page(page, diag, 1, memo, "oldal 1", settle_ms=2000) is None:
         print("[KATONA] Az 1. oldal üres!")
         return 0
 
     lo, hi = 1, max_pages
     while lo < hi:
         mid = (lo + hi + 1) // 2
-        page.goto(build_url(mid), wait_until="networkidle", timeout=60000)
-        page.wait_for_timeout(1500)
-        if page_is_empty(page):
+        if load_page(page, diag, mid, memo, f"keresés: oldal {mid}") is None:
             hi = mid - 1
         else:
             lo = mid
@@ -188,86 +203,129 @@ def find_last_nonempty_page(page, max_pages=60) -> int:
     return lo
 
 
-def scrape_all_events(page, last_page: int) -> list[tuple[date, str]]:
+def scrape_all_events(page, diag, last_page: int, memo: dict) -> list[Event]:
+    """Az 1..last_page oldalak eseményei; a keresés során már betöltött oldalak a memo-ból jönnek."""
     all_events = []
+    reused = 0
     for p in range(1, last_page + 1):
-        print(f"[KATONA] Scraping oldal {p}/{last_page}...")
-        page.goto(build_url(p), wait_until="networkidle", timeout=60000)
-        page.wait_for_timeout(1500)
-        if page_is_empty(page):
-            continue
-        page_events = extract_events_from_page(page)
-        all_events.extend(page_events)
+        if p in memo:
+            reused += 1
+        else:
+            print(f"[KATONA] Scraping oldal {p}/{last_page}...")
+        page_events = load_page(page, diag, p, memo, f"oldal {p}")
+        if page_events:
+            all_events.extend(page_events)
 
+    print(f"[KATONA] {reused} oldal a keresési fázisból újrahasznosítva")
     return all_events
 
 
-def check() -> dict:
+def full_scrape_fingerprints(memo: dict, last_page: int) -> dict:
+    """Az 1. oldal, az utolsó nem üres oldal és az utána következő (üres) oldal."""
+    return {
+        "1": fingerprint(memo.get(1) or []),
+        str(last_page): fingerprint(memo.get(last_page) or []),
+        str(last_page + 1): fingerprint([]),
+    }
+
+
+def probe_pages(page, diag, stored: dict, memo: dict) -> dict:
+    """A tárolt ujjlenyomatokhoz tartozó oldalak újratöltése (a memo-ba is)."""
+    probed = {}
+    for key in stored:
+        print(f"[KATONA] Próba: oldal {key}")
+        try:
+            page_events = load_page(page, diag, int(key), memo, f"próba: oldal {key}")
+        except PlaywrightTimeoutError:
+            probed[key] = "timeout"
+            continue
+        probed[key] = fingerprint(page_events or [])
+    return probed
+
+
+def check(mode: str = "auto") -> dict:
+    """mode: "auto" – próba, ha lehet, és csak változásnál teljes scrape; "full" – mindig teljes."""
     name = "Katona József Színház"
     print(f"\n{'='*50}")
     print(f"[KATONA] Scraper indítása: {budapest_now()}")
 
-    result = {"name": name, "latest": None, "prev": None, "status": "error", "detail": ""}
+    result = {"name": name, "latest": None, "prev": None, "status": "error", "detail": "",
+              "stats": {"pages": 0, "requests": 0}}
+
+    diag = Diagnostics("katona")
+    state = load_state(STATE_FILE)
+    probe_note = None
 
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context(
-                viewport={"width": 1920, "height": 1080},
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            )
-            page = context.new_page()
-
-            last_page = find_last_nonempty_page(page, max_pages=60)
+        with browser_session(result["stats"], diag, profile="katona") as page:
+            memo = {}
+            if probe_allowed(state, mode):
+                probed = probe_pages(page, diag, state["fingerprints"], memo)
+                changed = probe_changed_keys(state["fingerprints"], probed)
+                if not changed:
+                    probe_unchanged_result(result, state, probed)
+                    print(f"[KATONA] {result['detail']}")
+                    return result
+                probe_note = f"Próba: változás ({', '.join(changed)}. oldal) → teljes scrape"
+                result["probe"] = {"pages": sorted(probed), "changed": changed}
+                print(f"[KATONA] {probe_note}")
+
+            last_page = find_last_nonempty_page(page, diag, memo, max_pages=60)
             if last_page == 0:
                 result["detail"] = "Az 1. oldal is üres (hálózati hiba / oldalváltozás / blokkolás)."
-                browser.close()
                 return result
 
-            all_events = scrape_all_events(page, last_page)
-            browser.close()
+            all_events = scrape_all_events(page, diag, last_page, memo)
 
         if not all_events:
             result["detail"] = f"Nem találtam előadást. Utolsó nem üres oldal: {last_page}"
             return result
 
-        unique_events = sorted(set((d.isoformat(), t) for d, t in all_events))
-        latest = max(d for d, _ in all_events)
+        unique_events = sorted(set(all_events))
+        latest = latest_date(unique_events)
         event_count = len(unique_events)
-
-        state = {}
-        if os.path.exists(STATE_FILE):
-            with open(STATE_FILE, "r", encoding="utf-8") as f:
-                state = json.load(f)
+        result["event_count"] = event_count
 
         prev_str = state.get("latest_date")
         prev = datetime.strptime(prev_str, "%Y-%m-%d").date() if prev_str else None
         prev_count = state.get("event_count")
-        prev_events = state.get("events", [])
+        prev_events = events_from_json(state.get("events", []))
 
         state["latest_date"] = latest.isoformat()
         state["event_count"] = event_count
-        state["events"] = [list(e) for e in unique_events]
+        state["events"] = events_to_json(unique_events)
         state["last_page"] = last_page
+        state["fingerprints"] = full_scrape_fingerprints(memo, last_page)
+        state["last_full_scrape"] = budapest_now().isoformat()
         state["checked_at_budapest"] = budapest_now().isoformat()
-        with open(STATE_FILE, "w", encoding="utf-8") as f:
-            json.dump(state, f, ensure_ascii=False, indent=2)
+        save_state(STATE_FILE, state)
 
         result["latest"] = latest
         result["prev"] = prev
         result["status"], result["detail"] = compare_events(
             latest, event_count, prev, prev_count,
-            [list(e) for e in unique_events], prev_events
+            unique_events, prev_events
         )
+        if probe_note:
+            result["detail"] = f"{probe_note}\n{result['detail']}"
 
         print(f"[KATONA] {result['detail']}")
         return result
 
+    except SiteDownError as e:
+        result["status"] = "site_down"
+        result["detail"] = f"Az oldal nem elérhető, kihagyva: {e}"
+        print(f"[KATONA] {result['detail']}")
+        return result
+
     except Exception as e:
         result["detail"] = f"Hiba: {e}"
         print(f"[KATONA] {result['detail']}")
         return result
 
+    finally:
+        diag.finish(result)
+
 
 if __name__ == "__main__":
     r = check()
@@ -2,30 +2,36 @@
 Színház scraper – fő vezérlő.
 
 Futtatja az összes scrapelést, majd egyetlen összesítő emailt küld.
+
+Használat:
+  python main.py                          # minden színház, email, state mentés
+  python main.py --only katona,vig        # csak a megadott scraperek
+  python main.py --no-email --no-state-write --json   # helyi debug
+  python main.py --nav-queue              # böngészős oldalak közös, hostonként korlátozott sorban
+  python main.py --serve --adaptive       # daemon: meleg böngésző, belső ütemezés (ld. serve.py)
 """
 
 import os
-import re
-import ssl
-import smtplib
-from email.message import EmailMessage
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
-import katona_last_date
-import orkeny_last_date
-import radnoti_last_date
-import pbest_last_date
-import vig_last_date
-
-
-SCRAPERS = [
-    katona_last_date,
-    orkeny_last_date,
-    radnoti_last_date,
-    pbest_last_date,
-    vig_last_date,
-]
+import event_index
+import history_archive
+import ical_feeds
+import outbox
+import profiling
+import run_history
+import scheduler
+import scraper_pool
+import serve
+import theatre_calendar
+from theatres import THEATRES, load_scraper
 
 STATUS_ICONS = {
     "new_date":      "🟢",
@@ -34,6 +40,8 @@ STATUS_ICONS = {
     "decreased":     "🔴",
     "no_change":     "⚪",
     "error":         "❌",
+    "site_down":     "⛔",
+    "skipped":       "⏭",
 }
 
 
@@ -41,59 +49,246 @@ def budapest_now():
     return datetime.now(tz=ZoneInfo("Europe/Budapest"))
 
 
-def send_email(subject: str, body: str):
-    smtp_user = os.environ.get("SMTP_USER")
-    smtp_pass = os.environ.get("SMTP_PASS")
-    to_emails_raw = os.environ.get("TO_EMAILS")
+def run_scraper(key: str, mode: str = "auto") -> dict:
+    """
+    Egy scraper futtatása időméréssel; a kivételt error státuszra fordítja.
+    A modul importja is itt történik, így csak a kiválasztott scraperek töltődnek be.
+    mode: "auto" (próba, ha a scraper tud) vagy "full" (mindig teljes scrape).
+    """
+    started = time.monotonic()
+    try:
+        scraper = load_scraper(key)
+        with profiling.profile(key):
+            result = scraper.check(mode)
+    except Exception as e:
+        result = {
+            "name": THEATRES[key]["name"],
+            "status": "error",
+            "detail": f"Váratlan hiba: {e}",
+            "latest": None,
+            "prev": None,
+        }
+    result["key"] = key
+    result["duration"] = time.monotonic() - started
+    return result
+
+
+def skipped_result(key: str, reason: str) -> dict:
+    return {
+        "name": THEATRES[key]["name"],
+        "key": key,
+        "status": "skipped",
+        "detail": f"Kihagyva (adaptív ütemezés): {reason}",
+        "latest": None,
+        "prev": None,
+        "duration": 0.0,
+    }
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Színház scraper – napi ellenőrzés")
+    parser.add_argument("--only", metavar="KULCSOK",
+                        help=f"csak ezek a scraperek, vesszővel elválasztva ({','.join(THEATRES)})")
+    parser.add_argument("--no-email", action="store_true", help="ne küldjön emailt")
+    parser.add_argument("--no-state-write", action="store_true",
+                        help="ne írja felül a state fájlokat és a futási történetet")
+    parser.add_argument("--json", action="store_true",
+                        help="eredmények JSON-ként a stdout-ra (a napló a stderr-re megy)")
+    parser.add_argument("--profile", choices=["cprofile", "sample"],
+                        help="profilozás (ld. profiling.py)")
+    parser.add_argument("--profile-only", metavar="KULCSOK",
+                        help="csak ezeket a scrapereket profilozza")
+    parser.add_argument("--isolated", action="store_true",
+                        help="minden scraper külön worker processzben, deadline-nal")
+    parser.add_argument("--workers", type=int, help="worker processzek száma (--isolated)")
+    parser.add_argument("--nav-queue", action="store_true",
+                        help="közös, hostonként korlátozott navigációs sor (ld. nav_queue.py)")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="adaptív ütemezés: a változási előzmények alapján kihagyja a színházakat")
+    parser.add_argument("--max-staleness", type=float, metavar="NAP",
+                        default=scheduler.MAX_STALENESS_DAYS,
+                        help="ennyi napnál tovább egy színház sem maradhat ki (--adaptive)")
+    parser.add_argument("--email-on-change", action="store_true",
+                        help="csak változás, hiba vagy leállás esetén küldjön emailt")
+    parser.add_argument("--serve", action="store_true",
+                        help="daemon mód: meleg böngésző, belső ütemezés, állapot végpont")
+    parser.add_argument("--theatre-cron", default=serve.DEFAULT_THEATRE_CRON, metavar="CRON",
+                        help=f"színházi ellenőrzés ütemezése (--serve, alapértelmezés: '{serve.DEFAULT_THEATRE_CRON}')")
+    parser.add_argument("--cinema-cron", default=serve.DEFAULT_CINEMA_CRON, metavar="CRON",
+                        help=f"heti mozi ütemezése, üres: kikapcsolva (--serve, alapértelmezés: '{serve.DEFAULT_CINEMA_CRON}')")
+    parser.add_argument("--status-port", type=int, default=serve.DEFAULT_STATUS_PORT,
+                        help="állapot végpont portja (--serve)")
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        if args.json or args.isolated:
+            parser.error("--serve nem használható a --json / --isolated kapcsolókkal")
+        for expr in filter(None, (args.theatre_cron, args.cinema_cron)):
+            try:
+                serve.parse_cron(expr)
+            except ValueError as e:
+                parser.error(str(e))
+        # Sűrű ellenőrzésnél a "nincs változás" email csak zaj lenne
+        args.email_on_change = True
+
+    if args.only:
+        keys = [k.strip().lower() for k in args.only.split(",") if k.strip()]
+        unknown = [k for k in keys if k not in THEATRES]
+        if unknown:
+            parser.error(f"ismeretlen scraper: {', '.join(unknown)} (lehetséges: {', '.join(THEATRES)})")
+        args.keys = keys
+    else:
+        args.keys = list(THEATRES)
+    return args
+
+
+def apply_env_switches(args: argparse.Namespace):
+    """
+    A CLI kapcsolók környezeti változóként is beállítódnak, hogy az
+    izolált worker processzek is megkapják őket.
+    """
+    if args.no_state_write:
+        os.environ["SZINHAZ_NO_STATE_WRITE"] = "1"
+    if args.profile:
+        os.environ["SZINHAZ_PROFILE"] = args.profile
+    if args.profile_only:
+        os.environ["SZINHAZ_PROFILE_ONLY"] = args.profile_only
+    if args.isolated:
+        os.environ["SZINHAZ_ISOLATED"] = "1"
+    if args.workers:
+        os.environ["SZINHAZ_WORKERS"] = str(args.workers)
+    if args.nav_queue:
+        os.environ["SZINHAZ_NAV_QUEUE"] = "1"
+    profiling.configure(os.environ.get("SZINHAZ_PROFILE"), os.environ.get("SZINHAZ_PROFILE_ONLY"))
 
-    if not smtp_user or not smtp_pass or not to_emails_raw:
-        print("\n[EMAIL] Nincs SMTP beállítva, email tartalom:")
-        print(f"  Tárgy: {subject}")
-        print(f"  Szöveg:\n{body}")
-        return
 
-    to_emails = [e.strip() for e in re.split(r"[;,]", to_emails_raw) if e.strip()]
+def result_to_json(r: dict) -> dict:
+    return {k: (v.isoformat() if hasattr(v, "isoformat") else v) for k, v in r.items()}
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    apply_env_switches(args)
+
+    if args.serve:
+        serve_forever(args)
+    elif args.json:
+        # A scraperek naplója ne keveredjen a JSON kimenettel
+        with redirect_stdout(sys.stderr):
+            results = run(args)
+        print(json.dumps([result_to_json(r) for r in results], ensure_ascii=False, indent=2))
+    else:
+        run(args)
 
-    msg = EmailMessage()
-    msg["Subject"] = subject
-    msg["From"] = smtp_user
-    msg["To"] = ", ".join(to_emails)
-    msg.set_content(body)
 
-    context = ssl.create_default_context()
-    with smtplib.SMTP_SSL("smtp.gmail.com", 465, context=context) as server:
-        server.login(smtp_user, smtp_pass)
-        server.send_message(msg)
+def serve_forever(args: argparse.Namespace):
+    """A színházi ellenőrzés (és a heti mozi) futtatása a serve.Daemon ütemezésével."""
+    # A worker processzek nem érnék el a meleg böngészőt
+    os.environ.pop("SZINHAZ_ISOLATED", None)
 
-    print(f"\n[EMAIL] Elküldve: {subject}")
+    def theatre_job() -> str:
+        results = run(args)
+        changed = [r["name"] for r in results if r["status"] in ("new_date", "count_changed", "decreased")]
+        return f"{len(results)} színház, változás: {', '.join(changed) or 'nincs'}"
 
+    def cinema_job() -> str:
+        import cinema_weekly
+        cinema_weekly.main([])
+        return "ok"
 
-def main():
+    jobs = [serve.Job("szinhaz", args.theatre_cron, theatre_job)]
+    if args.cinema_cron:
+        jobs.append(serve.Job("mozi", args.cinema_cron, cinema_job))
+    serve.Daemon(jobs, args.status_port).loop()
+
+
+def run_in_process(keys: list[str], modes: dict) -> list[dict]:
+    """
+    A scraperek futtatása ebben a processzben. Navigációs sorral
+    (SZINHAZ_NAV_QUEUE) a sort használó scraperek szálakon, egymással és a
+    többi (sorosan futó) scraperrel párhuzamosan futnak; a hostonkénti
+    terhelést a sor korlátozza. Profilozáskor minden sorosan fut.
+    """
+    queued = [k for k in keys if THEATRES[k].get("queue")]
+    if not queued or any(profiling.is_enabled(k) for k in keys):
+        return [run_scraper(key, modes.get(key, "auto")) for key in keys]
+
+    # A kapcsolót import előtt nézzük: nav_queue → navigation → Playwright,
+    # sor nélkül ne töltődjön be (és ne buktassa el a futást, ha hiányzik)
+    if os.environ.get("SZINHAZ_NAV_QUEUE", "").strip().lower() not in ("1", "true", "yes"):
+        return [run_scraper(key, modes.get(key, "auto")) for key in keys]
+    try:
+        import nav_queue
+    except ImportError as e:
+        print(f"[NAVSOR] Nem elérhető, soros futás: {e}")
+        return [run_scraper(key, modes.get(key, "auto")) for key in keys]
+
+    with nav_queue.running() as queue:
+        if queue is None:
+            return [run_scraper(key, modes.get(key, "auto")) for key in keys]
+        with ThreadPoolExecutor(max_workers=len(queued), thread_name_prefix="scraper") as pool:
+            futures = {key: pool.submit(run_scraper, key, modes.get(key, "auto")) for key in queued}
+            ran = {key: run_scraper(key, modes.get(key, "auto")) for key in keys if key not in futures}
+            ran.update((key, future.result()) for key, future in futures.items())
+    return [ran[key] for key in keys]
+
+
+def run(args: argparse.Namespace) -> list[dict]:
     now = budapest_now()
     print(f"{'#'*60}")
     print(f"  SZÍNHÁZ SCRAPER – {now.strftime('%Y.%m.%d. %H:%M')}")
     print(f"{'#'*60}")
 
-    # Összes scraper futtatása
-    results = []
-    for scraper in SCRAPERS:
-        try:
-            result = scraper.check()
-        except Exception as e:
-            result = {
-                "name": getattr(scraper, "__name__", "Ismeretlen"),
-                "status": "error",
-                "detail": f"Váratlan hiba: {e}",
-                "latest": None,
-                "prev": None,
-            }
-        results.append(result)
+    # Az előző futásokból maradt értesítések a scrape alatt mennek ki
+    if not args.no_email:
+        outbox.start()
+
+    history = run_history.load_history()
+
+    # Adaptív ütemezés: mely színházakat kell ma teljesen scrape-elni
+    keys = args.keys
+    modes = {}
+    skipped = {}
+    if args.adaptive:
+        decisions = scheduler.plan(args.keys, history, now, args.max_staleness)
+        for key, decision in decisions.items():
+            print(f"[ÜTEMEZŐ] {key}: {decision['action']} – {decision['reason']}")
+        modes = {k: "full" if d["action"] == "full" else "auto" for k, d in decisions.items()}
+        keys = [k for k in args.keys if decisions[k]["action"] != "skip"]
+        skipped = {
+            k: skipped_result(k, decisions[k]["reason"])
+            for k in args.keys if decisions[k]["action"] == "skip"
+        }
+
+    # A kiválasztott scraperek futtatása
+    if scraper_pool.isolation_enabled():
+        ran = scraper_pool.run_isolated(keys, run_scraper, modes) if keys else []
+    else:
+        ran = run_in_process(keys, modes)
+    ran = dict(zip(keys, ran))
+    results = [ran[k] if k in ran else skipped[k] for k in args.keys]
+
+    # Futási idők: összevetés a korábbi futásokkal, majd mentés
+    slowdowns = run_history.detect_slowdowns(history, results)
+    if not args.no_state_write:
+        run_history.append_runs(results, now.isoformat())
+        archived = history_archive.archive_states(now, args.keys)
+        if archived:
+            print(f"[ARCHÍVUM] Változás archiválva: {', '.join(archived)}")
+        index, reindexed = event_index.update_index()
+        if reindexed:
+            print(f"[INDEX] Újraindexelve: {', '.join(reindexed)}")
+            changed = theatre_calendar.generate(index)
+            print(f"[NAPTÁR] {len(changed)} fájl frissítve" + (f": {', '.join(changed)}" if changed else ""))
+            feeds = ical_feeds.generate(index)
+            print(f"[ICAL] {len(feeds)} feed frissítve" + (f": {', '.join(feeds)}" if feeds else ""))
 
     # Van-e bármilyen változás?
     has_new = any(r["status"] == "new_date" for r in results)
     has_count = any(r["status"] == "count_changed" for r in results)
     has_error = any(r["status"] == "error" for r in results)
     has_decreased = any(r["status"] == "decreased" for r in results)
+    has_site_down = any(r["status"] == "site_down" for r in results)
 
     # Email tárgy
     if has_new:
@@ -104,6 +299,8 @@ def main():
         subject = "🎭 Színház – hiba történt"
     elif has_decreased:
         subject = "🎭 Színház – figyelem, dátum csökkent"
+    elif has_site_down:
+        subject = "🎭 Színház – oldal nem elérhető"
     else:
         subject = "🎭 Színház – nincs változás"
 
@@ -121,16 +318,21 @@ def main():
             lines.append(f"   {detail_line}")
         lines.append("")
 
+    lines.extend(run_history.format_slowdowns(slowdowns))
+
     lines.append("-" * 45)
-    lines.append("Katona:  https://katona.jegymester.hu/main")
-    lines.append("Örkény:  https://orkenyszinhaz.hu/jegyvasarlas/kereses/eloadas")
-    lines.append("Radnóti: https://radnotiszinhaz.hu/musor/")
-    lines.append("PBEST:   https://pbest.hu/musor")
-    lines.append("Víg:     https://vigszinhaz.hu/hu/musor")
+    for key in args.keys:
+        theatre = THEATRES[key]
+        lines.append(f"{theatre['label'] + ':':<9}{theatre['url']}")
 
     body = "\n".join(lines)
 
-    send_email(subject, body)
+    if args.no_email:
+        print(f"\n[EMAIL] Kihagyva (--no-email): {subject}")
+    elif args.email_on_change and not (has_new or has_count or has_error or has_decreased or has_site_down):
+        print(f"\n[EMAIL] Kihagyva (nincs változás, --email-on-change): {subject}")
+    else:
+        outbox.enqueue(subject, body)
 
     # Összefoglaló a konzolra
     print(f"\n{'#'*60}")
@@ -139,7 +341,14 @@ def main():
     for r in results:
         icon = STATUS_ICONS.get(r["status"], "❓")
         detail_first_line = r['detail'].split('\n')[0]
-        print(f"  {icon} {r['name']}: {detail_first_line}")
+        stats = r.get("stats") or {}
+        cache_note = f", cache {stats['cached']}/{stats['requests']} kérés" if "cached" in stats else ""
+        print(f"  {icon} {r['name']}: {detail_first_line} ({r['duration']:.0f} s{cache_note})")
+
+    if not args.no_email:
+        outbox.drain()
+
+    return results
 
 
 if __name__ == "__main__":
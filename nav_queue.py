@@ -0,0 +1,253 @@
+"""
+Közös navigációs sor: a scraperek navigációs feladatokat adnak le, egy
+háttérszálban futó (async Playwright) böngésző fülkészlete dolgozza fel
+őket. Így pl. a Katona oldalai és a Radnóti hónapjai egyszerre töltődhetnek,
+miközben egy színház oldalát sem terheljük jobban:
+
+- legfeljebb TABS navigáció fut egyszerre (ennyi fül van a készletben);
+- egy hostra egyszerre legfeljebb PER_HOST kérés megy;
+- egy host két kérésének indulása között legalább MIN_INTERVAL_S telik el.
+Egy feladat előbb a host-slotot, csak utána fület kap, így a más hostra
+váró feladatok nem foglalnak fület; az időközt a fül megszerzése után,
+közvetlenül az indulás előtt tartjuk.
+
+submit(url) böngészős betöltés, fetch(url) sima HTTP GET
+(navigation.fetch_html) ugyanazokkal a hostonkénti korlátokkal. Mindkettő
+concurrent.futures.Future-t ad; a submit eredménye egy pillanatkép:
+  {"url", "final_url", "status", "html" vagy "text", "requests"}
+A breaker/preflight (navigation) a leadáskor fut, a SiteDownError tehát a
+hívónál keletkezik, ahogy a goto()-nál; az újrapróbálkozás és a backoff a
+goto()-éval azonos.
+
+Bekapcsolás: SZINHAZ_NAV_QUEUE=1 (main.py --nav-queue)
+  SZINHAZ_NAV_TABS=4              – fülek száma
+  SZINHAZ_NAV_PER_HOST=2          – egyidejű kérések hostonként
+  SZINHAZ_NAV_MIN_INTERVAL_S=1.0  – két kérés indulása között, hostonként
+A theatres.py "queue": True bejegyzése jelöli a sort használó scrapereket;
+a main.py ezeket szálakon, a többivel párhuzamosan futtatja. Izolált
+módban nincs sor. A sor contextjében nincs tartós profil és asset cache
+(az AssetCache route handlere a sync API-hoz készült).
+"""
+
+import os
+import time
+import asyncio
+import threading
+from contextlib import asynccontextmanager, contextmanager
+
+import navigation
+from scraper_utils import USER_AGENT, VIEWPORT
+
+
+DEFAULT_TABS = 4
+DEFAULT_PER_HOST = 2
+DEFAULT_MIN_INTERVAL_S = 1.0
+CLOSE_TIMEOUT_SECONDS = 30
+
+_current = None
+
+
+def enabled() -> bool:
+    return os.environ.get("SZINHAZ_NAV_QUEUE", "").strip().lower() in ("1", "true", "yes")
+
+
+def current():
+    """A futó sor (NavQueue), vagy None – ilyenkor a scraper a saját böngészőjét használja."""
+    return _current
+
+
+def _env_number(name: str, default, cast):
+    try:
+        return max(cast(os.environ.get(name, default)), cast(0))
+    except ValueError:
+        return default
+
+
+def add_stats(stats: dict, snapshot: dict):
+    """Egy betöltött pillanatkép a scraper stats-ába (ld. track_page_stats)."""
+    stats["pages"] = stats.get("pages", 0) + 1
+    stats["requests"] = stats.get("requests", 0) + snapshot.get("requests", 1)
+
+
+class NavQueue:
+    def __init__(self, tabs: int = DEFAULT_TABS, per_host: int = DEFAULT_PER_HOST,
+                 min_interval: float = DEFAULT_MIN_INTERVAL_S):
+        self.tabs = max(1, tabs)
+        self.per_host = max(1, per_host)
+        self.min_interval = min_interval
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name="nav-queue", daemon=True)
+        self.ready = threading.Event()
+        self.error = None
+        self.hosts = {}     # host -> [Semaphore, Lock, következő indulás (monotonic)]
+        self.stats = {"tasks": 0, "fetches": 0, "throttled_s": 0.0}
+
+    def start(self):
+        self.thread.start()
+        self.ready.wait()
+        if self.error is not None:
+            raise self.error
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._open())
+        except Exception as e:
+            self.error = e
+            self.ready.set()
+            return
+        self.ready.set()
+        self.loop.run_forever()
+        self.loop.run_until_complete(self._close())
+        self.loop.close()
+
+    async def _open(self):
+        from playwright.async_api import async_playwright
+        self.playwright = await async_playwright().start()
+        self.browser = await self.playwright.chromium.launch(headless=True)
+        self.context = await self.browser.new_context(viewport=VIEWPORT, user_agent=USER_AGENT)
+        self.idle_tabs = asyncio.Queue()
+        for _ in range(self.tabs):
+            self.idle_tabs.put_nowait(await self.context.new_page())
+
+    async def _close(self):
+        for closer in (self.context.close, self.browser.close, self.playwright.stop):
+            try:
+                await closer()
+            except Exception:
+                pass
+
+    def close(self):
+        if self.thread.is_alive():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(CLOSE_TIMEOUT_SECONDS)
+
+    @asynccontextmanager
+    async def _host_slot(self, host: str):
+        """Hostonkénti párhuzamossági korlát."""
+        if host not in self.hosts:
+            self.hosts[host] = [asyncio.Semaphore(self.per_host), asyncio.Lock(), 0.0]
+        async with self.hosts[host][0]:
+            yield
+
+    async def _pace(self, host: str):
+        """Várakozás, amíg a host előző kérésének indulása óta eltelik a minimális időköz."""
+        _, lock, _ = slot = self.hosts[host]
+        async with lock:
+            wait = slot[2] - time.monotonic()
+            if wait > 0:
+                self.stats["throttled_s"] += wait
+                await asyncio.sleep(wait)
+            slot[2] = time.monotonic() + self.min_interval
+
+    async def _navigate(self, url: str, content: str, wait_until: str, wait_ms: int,
+                        timeout: int, retries: int) -> dict:
+        host = navigation.host_of(url)
+        async with self._host_slot(host):
+            tab = await self.idle_tabs.get()
+            try:
+                await self._pace(host)
+                return await self._load(tab, url, content, wait_until, wait_ms, timeout, retries)
+            finally:
+                self.idle_tabs.put_nowait(tab)
+
+    async def _load(self, tab, url: str, content: str, wait_until: str, wait_ms: int,
+                    timeout: int, retries: int) -> dict:
+        from playwright.async_api import Error as PlaywrightError
+
+        host = navigation.host_of(url)
+        requests = 0
+
+        def on_request(_request):
+            nonlocal requests
+            requests += 1
+
+        tab.on("request", on_request)
+        try:
+            last_error = None
+            for attempt in range(retries + 1):
+                try:
+                    response = await tab.goto(url, wait_until=wait_until, timeout=timeout)
+                    if attempt:
+                        print(f"[NAV] {host}: sikeres {attempt + 1}. próbálkozásra")
+                    break
+                except PlaywrightError as e:
+                    last_error = e
+                    if attempt < retries:
+                        delay = navigation.backoff_delay(attempt)
+                        print(f"[NAV] {url}: {type(e).__name__}, újra {delay:.1f} s múlva")
+                        await asyncio.sleep(delay)
+            else:
+                if host not in navigation._healthy:
+                    navigation.record_failure(
+                        host, f"{type(last_error).__name__}: {str(last_error).splitlines()[0]}")
+                raise last_error
+            navigation.record_success(host)
+            if wait_ms:
+                await tab.wait_for_timeout(wait_ms)
+            body = await tab.content() if content == "html" else await tab.inner_text("body")
+            self.stats["tasks"] += 1
+            return {
+                "url": url,
+                "final_url": tab.url,
+                "status": response.status if response else None,
+                content: body,
+                "requests": requests,
+            }
+        finally:
+            tab.remove_listener("request", on_request)
+
+    async def _fetch(self, url: str, timeout: float) -> str:
+        host = navigation.host_of(url)
+        async with self._host_slot(host):
+            await self._pace(host)
+            html = await asyncio.to_thread(navigation.fetch_html, url, timeout)
+        self.stats["fetches"] += 1
+        return html
+
+    def submit(self, url: str, content: str = "html", wait_until: str = "networkidle",
+               wait_ms: int = 0, timeout: int = 60000, retries: int = navigation.RETRIES):
+        """
+        Böngészős betöltés a sorban. content: "html" (page.content()) vagy
+        "text" (a body szövege). Nyitott breakernél / sikertelen preflightnál
+        azonnal SiteDownError.
+        """
+        navigation.check_circuit(navigation.host_of(url))
+        navigation.preflight(url)
+        return asyncio.run_coroutine_threadsafe(
+            self._navigate(url, content, wait_until, wait_ms, timeout, retries), self.loop)
+
+    def fetch(self, url: str, timeout: float = 30):
+        """HTTP GET (navigation.fetch_html) a hostonkénti korlátokkal; a Future a HTML-t adja."""
+        return asyncio.run_coroutine_threadsafe(self._fetch(url, timeout), self.loop)
+
+
+@contextmanager
+def running():
+    """
+    A sor indítása a blokk idejére (current() ezt adja vissza). Ha a
+    böngésző nem indul, None-t ad, és a scraperek a saját útjukon futnak.
+    """
+    global _current
+    queue = NavQueue(
+        tabs=_env_number("SZINHAZ_NAV_TABS", DEFAULT_TABS, int),
+        per_host=_env_number("SZINHAZ_NAV_PER_HOST", DEFAULT_PER_HOST, int),
+        min_interval=_env_number("SZINHAZ_NAV_MIN_INTERVAL_S", DEFAULT_MIN_INTERVAL_S, float),
+    )
+    try:
+        queue.start()
+    except Exception as e:
+        print(f"[NAVSOR] Nem indult el ({e}), a scraperek saját böngészővel futnak")
+        yield None
+        return
+    print(f"[NAVSOR] {queue.tabs} fül, hostonként {queue.per_host} kérés, "
+          f"{queue.min_interval:.1f} s időköz")
+    _current = queue
+    try:
+        yield queue
+    finally:
+        _current = None
+        queue.close()
+        s = queue.stats
+        print(f"[NAVSOR] {s['tasks']} betöltés, {s['fetches']} HTTP letöltés, "
+              f"{s['throttled_s']:.1f} s hostonkénti várakozás")
@@ -0,0 +1,264 @@
+"""
+Közös navigációs wrapper: újrapróbálkozás, backoff és hostonkénti
+circuit breaker.
+
+- goto(): a page.goto() helyett; korlátos számú újrapróbálkozás
+  jitteres exponenciális backoff-fal.
+- Host-onként egyszer (processzenként) egy olcsó HEAD preflight kérés
+  megy ki a böngészős navigáció előtt, ugyanazzal a backoff-fal; ha az
+  oldal egyszer sem válaszol, nem várjuk ki a 60 s-os Playwright
+  timeoutot. Egy 5xx a HEAD-re nem leállás: arról a goto() dönt.
+- fetch_html(): ugyanez böngésző nélkül, sima HTTP GET-tel azokhoz az
+  oldalakhoz, amelyek szerver-renderelt HTML-t adnak (pl. Víg hónapok).
+- A sikertelen hostok állapota a circuit_state.json fájlba kerül, így
+  a nyitott breaker a következő futásokra is érvényes: a már legalább
+  két egymást követő futásban leállt oldalt ezredmásodpercek alatt
+  kihagyjuk (SiteDownError), a scraper pedig "site_down" státuszt jelent.
+  A nyitva tartás a futások ütemezésén alapul (SZINHAZ_RUN_INTERVAL_HOURS,
+  alapból 24), ld. _cooldown(). Az olvasás-módosítás-írás fájlzár
+  (circuit_state.json.lock) alatt megy, mert izolált módban a scraperek
+  külön processzekben frissítik.
+"""
+
+import os
+import json
+import time
+import random
+import threading
+import urllib.request
+import urllib.error
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+try:
+    import fcntl
+except ImportError:     # Windows: csak a processzen belüli zár marad
+    fcntl = None
+
+from playwright.sync_api import Error as PlaywrightError
+
+
+CIRCUIT_FILE = "circuit_state.json"
+
+RETRIES = 2                     # az első próbálkozáson felül
+BACKOFF_BASE_SECONDS = 2.0
+BACKOFF_MAX_SECONDS = 20.0
+PREFLIGHT_TIMEOUT_SECONDS = 8
+# A breaker a futások ütemezéséhez igazodik (napi workflow: 24 óra).
+# Első hibánál csak a futás hátralévő részére nyílik: egy rövid kiesés
+# miatt nem maradhat ki a következő napi ellenőrzés. Egymást követő
+# sikertelen futások után a következő 1, 2, majd legfeljebb 4 futást
+# hagyjuk ki; a fél ütemezési intervallumnyi ráhagyás a cron késését fedi.
+RUN_INTERVAL_SECONDS = float(os.environ.get("SZINHAZ_RUN_INTERVAL_HOURS", "24")) * 60 * 60
+COOLDOWN_BASE_SECONDS = 30 * 60
+COOLDOWN_MAX_SKIPPED_RUNS = 4
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+_lock = threading.Lock()
+_preflight_ok: set[str] = set()
+_healthy: set[str] = set()      # ebben a processzben már sikeresen betöltött hostok
+
+
+class SiteDownError(Exception):
+    """Az oldal nem elérhető (nyitott circuit breaker vagy sikertelen preflight)."""
+
+    def __init__(self, host: str, reason: str):
+        super().__init__(f"{host}: {reason}")
+        self.host = host
+        self.reason = reason
+
+
+def _load_circuits() -> dict:
+    if not os.path.exists(CIRCUIT_FILE):
+        return {}
+    try:
+        with open(CIRCUIT_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+@contextmanager
+def _circuit_lock():
+    """Szálak és processzek (SZINHAZ_ISOLATED workerek) közötti kizárás a state fájlra."""
+    with _lock:
+        if fcntl is None:
+            yield
+            return
+        with open(f"{CIRCUIT_FILE}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _update_circuit(host: str, update) -> dict | None:
+    """
+    Egy host bejegyzésének frissítése a zár alatt újraolvasott állapotból:
+    update(régi bejegyzés | None) → új bejegyzés, vagy None (törlés).
+    """
+    with _circuit_lock():
+        circuits = _load_circuits()
+        entry = update(circuits.get(host))
+        if entry is None:
+            if host not in circuits:
+                return None
+            circuits.pop(host)
+        else:
+            circuits[host] = entry
+        tmp_path = f"{CIRCUIT_FILE}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(circuits, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, CIRCUIT_FILE)
+        return entry
+
+
+def host_of(url: str) -> str:
+    return urlparse(url).hostname or url
+
+
+def check_circuit(host: str):
+    """SiteDownError-t dob, ha a host breakere nyitva van."""
+    entry = _load_circuits().get(host)
+    if entry and entry.get("open_until", 0) > time.time():
+        until = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["open_until"]))
+        raise SiteDownError(host, f"circuit breaker nyitva {until}-ig ({entry.get('last_error', '')})")
+
+
+def _cooldown(failures: int) -> float:
+    """A breaker nyitva tartása másodpercben a host egymást követő hibáinak száma szerint."""
+    if failures < 2:
+        return COOLDOWN_BASE_SECONDS
+    skipped_runs = min(2 ** (failures - 2), COOLDOWN_MAX_SKIPPED_RUNS)
+    return (skipped_runs + 0.5) * RUN_INTERVAL_SECONDS
+
+
+def record_failure(host: str, error: str):
+    def update(entry: dict | None) -> dict:
+        failures = (entry or {}).get("failures", 0) + 1
+        return {
+            "failures": failures,
+            "open_until": time.time() + _cooldown(failures),
+            "last_error": error[:200],
+        }
+
+    failures = _update_circuit(host, update)["failures"]
+    _preflight_ok.discard(host)
+    print(f"[NAV] {host}: hiba #{failures}, breaker nyitva {_cooldown(failures) / 3600:.1f} órára")
+
+
+def record_success(host: str):
+    if host in _healthy:
+        return
+    _healthy.add(host)
+    _update_circuit(host, lambda entry: None)
+
+
+def preflight(url: str, retries: int = RETRIES):
+    """
+    Olcsó HEAD kérés a hostra, a goto() backoff-jával újrapróbálva.
+    Ha egyszer sem válaszol, SiteDownError (és ekkor nyílik a breaker);
+    5xx-re nem döntünk (botszűrő is adhatja), a goto() próbálkozik.
+    """
+    host = host_of(url)
+    if host in _preflight_ok:
+        return
+    parsed = urlparse(url)
+    probe_url = f"{parsed.scheme}://{parsed.netloc}/"
+    request = urllib.request.Request(probe_url, method="HEAD", headers={"User-Agent": USER_AGENT})
+    reason = None
+    for attempt in range(retries + 1):
+        try:
+            with urllib.request.urlopen(request, timeout=PREFLIGHT_TIMEOUT_SECONDS):
+                pass
+        except urllib.error.HTTPError as e:
+            # 4xx (pl. 403/405 HEAD-re) azt jelenti, hogy a szerver válaszol
+            if e.code >= 500:
+                print(f"[NAV] {host}: preflight HTTP {e.code}, a betöltés dönt")
+                return
+        except (urllib.error.URLError, OSError) as e:
+            reason = getattr(e, "reason", e)
+            if attempt < retries:
+                delay = backoff_delay(attempt)
+                print(f"[NAV] {host}: preflight sikertelen ({reason}), újra {delay:.1f} s múlva")
+                time.sleep(delay)
+            continue
+        _preflight_ok.add(host)
+        return
+    record_failure(host, f"preflight: {reason}")
+    raise SiteDownError(host, f"preflight sikertelen: {reason}")
+
+
+def backoff_delay(attempt: int) -> float:
+    """Jitteres exponenciális várakozás (attempt: 0, 1, 2, ...)."""
+    delay = min(BACKOFF_BASE_SECONDS * 2 ** attempt, BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.5)
+
+
+def goto(page, url: str, wait_until: str = "networkidle", timeout: int = 60000,
+         retries: int = RETRIES):
+    """
+    page.goto() újrapróbálkozással. Nyitott breakernél / sikertelen preflightnál
+    SiteDownError-t dob; ha minden próbálkozás elbukik, az utolsó Playwright
+    kivételt dobja tovább. A breaker csak akkor nyílik, ha a host ebben a
+    futásban még egyszer sem töltött be – egyetlen rossz oldal miatt nem
+    zárjuk ki a már működő oldalt.
+    """
+    host = host_of(url)
+    check_circuit(host)
+    preflight(url, retries)
+
+    last_error = None
+    for attempt in range(retries + 1):
+        try:
+            response = page.goto(url, wait_until=wait_until, timeout=timeout)
+            if attempt:
+                print(f"[NAV] {host}: sikeres {attempt + 1}. próbálkozásra")
+            record_success(host)
+            return response
+        except PlaywrightError as e:
+            last_error = e
+            if attempt < retries:
+                delay = backoff_delay(attempt)
+                print(f"[NAV] {url}: {type(e).__name__}, újra {delay:.1f} s múlva")
+                time.sleep(delay)
+
+    if host not in _healthy:
+        record_failure(host, f"{type(last_error).__name__}: {str(last_error).splitlines()[0]}")
+    raise last_error
+
+
+def fetch_html(url: str, timeout: float = 30, retries: int = RETRIES) -> str:
+    """
+    HTTP GET a goto() backoff-jával; nyitott breakernél SiteDownError.
+    Szálbiztos, párhuzamosan is hívható. 4xx-re azonnal, egyébként a
+    próbálkozások elfogyása után az utolsó urllib kivételt dobja tovább.
+    A breakert nem nyitja: a hívó ilyenkor böngészőre vált, és a
+    leállásról a goto() preflightja dönt (egy botszűrő ne zárja ki az oldalt).
+    """
+    host = host_of(url)
+    check_circuit(host)
+
+    request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+    last_error = None
+    for attempt in range(retries + 1):
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                charset = response.headers.get_content_charset() or "utf-8"
+                html = response.read().decode(charset, errors="replace")
+            record_success(host)
+            return html
+        except urllib.error.HTTPError as e:
+            if e.code < 500:
+                raise
+            last_error = e
+        except (urllib.error.URLError, OSError) as e:
+            last_error = e
+        if attempt < retries:
+            delay = backoff_delay(attempt)
+            print(f"[NAV] {url}: {last_error}, újra {delay:.1f} s múlva")
+            time.sleep(delay)
+
+    raise last_error
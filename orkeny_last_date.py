@@ -6,14 +6,16 @@ a "Továbbiak betöltése" gombot kattintgatva betölti az összes
 előadást, majd kinyeri a dátumot és a címet.
 """
 
-import os
 import re
-import json
 from datetime import datetime, date
 from zoneinfo import ZoneInfo
 
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
-from scraper_utils import compare_events
+from diagnostics import Diagnostics
+from navigation import goto, SiteDownError
+from scraper_utils import (
+    Event, compare_events, browser_session, load_state, save_state,
+    events_from_json, events_to_json, latest_date,
+)
 
 
 URL = "https://orkenyszinhaz.hu/jegyvasarlas/kereses/eloadas"
@@ -41,7 +43,7 @@ def extract_dates_from_text(text: str) -> list[date]:
     return sorted(set(dates))
 
 
-def extract_events_from_page(page) -> list[tuple[date, str]]:
+def extract_events_from_page(page) -> list[Event]:
     """
     Megpróbálja az egyes előadás-bejegyzéseket külön-külön kinyerni,
     hogy a címet is megkapjuk a dátum mellett.
@@ -87,7 +89,7 @@ def extract_events_from_page(page) -> list[tuple[date, str]]:
                                 break
 
                     for d in dates:
-                        events.append((d, title))
+                        events.append(Event(d, title))
                     found_any = True
                 except Exception:
                     continue
@@ -101,20 +103,16 @@ def extract_events_from_page(page) -> list[tuple[date, str]]:
     if not events:
         text = page.inner_text("body")
         for d in extract_dates_from_text(text):
-            events.append((d, "?"))
+            events.append(Event(d, "?"))
 
     return events
 
 
-def load_all_events(page, max_clicks: int = 50) -> list[tuple[date, str]]:
+def load_all_events(page, diag, max_clicks: int = 50) -> list[Event]:
     print(f"[ÖRKÉNY] Oldal betöltése: {URL}")
-    page.goto(URL, wait_until="networkidle", timeout=60000)
+    goto(page, URL, wait_until="networkidle", timeout=60000)
     page.wait_for_timeout(3000)
-
-    try:
-        page.screenshot(path="debug_orkeny_page.png")
-    except Exception:
-        pass
+    diag.record(page, "kezdőoldal")
 
     # "Továbbiak betöltése" gomb kattintgatása
     click_count = 0
@@ -143,7 +141,9 @@ def load_all_events(page, max_clicks: int = 50) -> list[tuple[date, str]]:
             click_count += 1
             page.wait_for_timeout(2000)
             if click_count % 5 == 0:
-                current_dates = extract_dates_from_text(page.inner_text("body"))
+                body_text = page.inner_text("body")
+                diag.record(page, f"{click_count}. kattintás", text=body_text)
+                current_dates = extract_dates_from_text(body_text)
                 print(f"[ÖRKÉNY] {click_count}. kattintás, {len(current_dates)} dátum")
         except Exception:
             break
@@ -154,65 +154,68 @@ def load_all_events(page, max_clicks: int = 50) -> list[tuple[date, str]]:
     return extract_events_from_page(page)
 
 
-def check() -> dict:
+def check(mode: str = "auto") -> dict:
+    """Ennél a színháznál nincs próba, a mode-tól függetlenül teljes scrape fut."""
     name = "Örkény István Színház"
     print(f"\n{'='*50}")
     print(f"[ÖRKÉNY] Scraper indítása: {budapest_now()}")
 
-    result = {"name": name, "latest": None, "prev": None, "status": "error", "detail": ""}
+    result = {"name": name, "latest": None, "prev": None, "status": "error", "detail": "",
+              "stats": {"pages": 0, "requests": 0}}
+
+    diag = Diagnostics("orkeny")
 
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context(
-                viewport={"width": 1920, "height": 1080},
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            )
-            page = context.new_page()
-            all_events = load_all_events(page)
-            browser.close()
+        with browser_session(result["stats"], diag, profile="orkeny") as page:
+            all_events = load_all_events(page, diag)
 
         if not all_events:
             result["detail"] = "Nem találtam előadást az oldalon."
             return result
 
-        unique_events = sorted(set((d.isoformat(), t) for d, t in all_events))
-        latest = max(d for d, _ in all_events)
+        unique_events = sorted(set(all_events))
+        latest = latest_date(unique_events)
         event_count = len(unique_events)
+        result["event_count"] = event_count
         print(f"[ÖRKÉNY] {event_count} előadás, max: {latest}")
 
-        state = {}
-        if os.path.exists(STATE_FILE):
-            with open(STATE_FILE, "r", encoding="utf-8") as f:
-                state = json.load(f)
+        state = load_state(STATE_FILE)
 
         prev_str = state.get("latest_date")
         prev = datetime.strptime(prev_str, "%Y-%m-%d").date() if prev_str else None
         prev_count = state.get("event_count")
-        prev_events = state.get("events", [])
+        prev_events = events_from_json(state.get("events", []))
 
         state["latest_date"] = latest.isoformat()
         state["event_count"] = event_count
-        state["events"] = [list(e) for e in unique_events]
+        state["events"] = events_to_json(unique_events)
         state["checked_at_budapest"] = budapest_now().isoformat()
-        with open(STATE_FILE, "w", encoding="utf-8") as f:
-            json.dump(state, f, ensure_ascii=False, indent=2)
+        save_state(STATE_FILE, state)
 
         result["latest"] = latest
         result["prev"] = prev
         result["status"], result["detail"] = compare_events(
             latest, event_count, prev, prev_count,
-            [list(e) for e in unique_events], prev_events
+            unique_events, prev_events
         )
 
         print(f"[ÖRKÉNY] {result['detail']}")
         return result
 
+    except SiteDownError as e:
+        result["status"] = "site_down"
+        result["detail"] = f"Az oldal nem elérhető, kihagyva: {e}"
+        print(f"[ÖRKÉNY] {result['detail']}")
+        return result
+
     except Exception as e:
         result["detail"] = f"Hiba: {e}"
         print(f"[ÖRKÉNY] {result['detail']}")
         return result
 
+    finally:
+        diag.finish(result)
+
 
 if __name__ == "__main__":
     r = check()
@@ -0,0 +1,231 @@
+"""
+Értesítési outbox: a kész emaileket nem a futás végén, helyben küldjük el,
+hanem előbb lemezre írjuk (outbox/ könyvtár, üzenetenként egy JSON fájl,
+atomikus írással), és egy háttérszál kézbesíti őket.
+
+- enqueue(): az üzenet a spoolba kerül, és a hívó azonnal továbbmegy.
+- start(): elindítja a küldő szálat a futás elején, így az előző
+  futásokból megmaradt üzenetek a scrape alatt mennek ki.
+- drain(): a futás végén legfeljebb DRAIN_TIMEOUT_SECONDS-ig vár a
+  kézbesítésre. Ami addig nem ment ki, az a spoolban marad, a workflow
+  commitolja, és a következő futás újra megpróbálja elküldeni.
+
+A küldő szál egyetlen SMTP kapcsolatot tart nyitva, és azt használja újra
+az üzenetekhez. Hiba esetén jitteres exponenciális backoff-fal próbálja
+újra. Címzett és feladó nem kerül a spoolba, azokat a küldéskor olvassuk
+a környezetből (SMTP_USER, SMTP_PASS, TO_EMAILS).
+"""
+
+import os
+import re
+import ssl
+import json
+import time
+import uuid
+import random
+import smtplib
+import threading
+from datetime import datetime
+from email.message import EmailMessage
+
+
+OUTBOX_DIR = "outbox"
+SMTP_HOST = "smtp.gmail.com"
+SMTP_PORT = 465
+SMTP_TIMEOUT_SECONDS = 30
+BACKOFF_BASE_SECONDS = 5.0
+BACKOFF_MAX_SECONDS = 300.0
+DRAIN_TIMEOUT_SECONDS = float(os.environ.get("SZINHAZ_OUTBOX_DRAIN_S", "90"))
+DRAIN_POLL_SECONDS = 1.0
+
+_wake = threading.Event()
+_stop = threading.Event()
+_idle = threading.Event()
+_thread: threading.Thread | None = None
+_smtp: smtplib.SMTP_SSL | None = None
+
+
+def smtp_config() -> tuple[str, str, list[str]] | None:
+    smtp_user = os.environ.get("SMTP_USER")
+    smtp_pass = os.environ.get("SMTP_PASS")
+    to_emails_raw = os.environ.get("TO_EMAILS")
+    if not smtp_user or not smtp_pass or not to_emails_raw:
+        return None
+    to_emails = [e.strip() for e in re.split(r"[;,]", to_emails_raw) if e.strip()]
+    return smtp_user, smtp_pass, to_emails
+
+
+def _write(path: str, message: dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(message, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def pending() -> list[str]:
+    """A spoolban lévő üzenetfájlok, létrehozási sorrendben."""
+    if not os.path.isdir(OUTBOX_DIR):
+        return []
+    return sorted(os.path.join(OUTBOX_DIR, name)
+                  for name in os.listdir(OUTBOX_DIR) if name.endswith(".json"))
+
+
+def enqueue(subject: str, body: str) -> str | None:
+    """
+    Üzenet a spoolba. SMTP beállítás nélkül (helyi futás) csak kiírja a
+    tartalmat, ahogy eddig. Visszaadja a spoolfájl útvonalát.
+    """
+    if smtp_config() is None:
+        print("\n[EMAIL] Nincs SMTP beállítva, email tartalom:")
+        print(f"  Tárgy: {subject}")
+        print(f"  Szöveg:\n{body}")
+        return None
+
+    os.makedirs(OUTBOX_DIR, exist_ok=True)
+    created = datetime.now().astimezone()
+    path = os.path.join(OUTBOX_DIR, f"{created.strftime('%Y%m%dT%H%M%S%f')}_{uuid.uuid4().hex[:8]}.json")
+    _write(path, {
+        "subject": subject,
+        "body": body,
+        "created": created.isoformat(timespec="seconds"),
+        "attempts": 0,
+        "next_attempt": 0,
+        "last_error": None,
+    })
+    print(f"\n[EMAIL] Outboxba téve: {subject}")
+    _idle.clear()
+    _wake.set()
+    return path
+
+
+def _connection(smtp_user: str, smtp_pass: str) -> smtplib.SMTP_SSL:
+    """A nyitott SMTP kapcsolat újrahasználása; ha megszakadt, újat nyit."""
+    global _smtp
+    if _smtp is not None:
+        try:
+            if _smtp.noop()[0] == 250:
+                return _smtp
+        except smtplib.SMTPException:
+            pass
+        _close()
+    context = ssl.create_default_context()
+    _smtp = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, context=context, timeout=SMTP_TIMEOUT_SECONDS)
+    _smtp.login(smtp_user, smtp_pass)
+    return _smtp
+
+
+def _close():
+    global _smtp
+    if _smtp is None:
+        return
+    try:
+        _smtp.quit()
+    except (smtplib.SMTPException, OSError):
+        pass
+    _smtp = None
+
+
+def _deliver(path: str) -> bool:
+    """Egy üzenet kézbesítése. True, ha elment (és a fájl törölve)."""
+    config = smtp_config()
+    if config is None:
+        return False
+    smtp_user, smtp_pass, to_emails = config
+
+    with open(path, "r", encoding="utf-8") as f:
+        message = json.load(f)
+
+    msg = EmailMessage()
+    msg["Subject"] = message["subject"]
+    msg["From"] = smtp_user
+    msg["To"] = ", ".join(to_emails)
+    msg.set_content(message["body"])
+
+    try:
+        _connection(smtp_user, smtp_pass).send_message(msg)
+    except (smtplib.SMTPException, OSError) as e:
+        _close()
+        message["attempts"] += 1
+        delay = min(BACKOFF_BASE_SECONDS * 2 ** (message["attempts"] - 1), BACKOFF_MAX_SECONDS)
+        delay *= random.uniform(0.5, 1.5)
+        message["next_attempt"] = time.time() + delay
+        message["last_error"] = f"{type(e).__name__}: {e}"[:200]
+        _write(path, message)
+        print(f"[EMAIL] Küldés sikertelen ({message['last_error']}), "
+              f"újra {delay:.0f} s múlva: {message['subject']}")
+        return False
+
+    os.remove(path)
+    print(f"[EMAIL] Elküldve: {message['subject']}")
+    return True
+
+
+def _due(path: str) -> float:
+    """Hány másodperc múlva esedékes az üzenet (0, ha most)."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return max(0.0, json.load(f).get("next_attempt", 0) - time.time())
+    except (OSError, json.JSONDecodeError):
+        return BACKOFF_MAX_SECONDS
+
+
+def _run():
+    while not _stop.is_set():
+        waits = []
+        for path in pending():
+            if _stop.is_set():
+                break
+            wait = _due(path)
+            if wait > 0:
+                waits.append(wait)
+            elif not _deliver(path):
+                waits.append(_due(path))
+
+        if not pending():
+            _idle.set()
+            _close()
+        _wake.wait(timeout=min(waits) if waits else None)
+        _wake.clear()
+    _close()
+
+
+def start():
+    """A küldő szál indítása (többszöri hívás nem indít újat)."""
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return
+    if smtp_config() is None:
+        return
+    if pending():
+        print(f"[EMAIL] {len(pending())} korábbi, el nem küldött üzenet az outboxban")
+    _stop.clear()
+    _idle.clear()
+    _thread = threading.Thread(target=_run, name="outbox-sender", daemon=True)
+    _thread.start()
+
+
+def drain(timeout: float = DRAIN_TIMEOUT_SECONDS) -> int:
+    """
+    Vár, amíg az outbox kiürül (legfeljebb timeout másodpercig), majd
+    leállítja a szálat. Visszaadja a spoolban maradt üzenetek számát.
+    """
+    if pending():
+        start()
+    if _thread is not None:
+        # A spoolt nézzük, nem csak az _idle-t: a szál egy épp most
+        # enqueue-olt üzenet előtt is jelezhette, hogy kiürült
+        deadline = time.monotonic() + timeout
+        while pending() and _thread.is_alive():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            _idle.clear()
+            _wake.set()
+            _idle.wait(timeout=min(remaining, DRAIN_POLL_SECONDS))
+        _stop.set()
+        _wake.set()
+        _thread.join(timeout=SMTP_TIMEOUT_SECONDS)
+    left = len(pending())
+    if left:
+        print(f"[EMAIL] {left} üzenet az outboxban maradt, a következő futás küldi el")
+    return left
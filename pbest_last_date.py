@@ -4,16 +4,21 @@ Pintér Béla és Társulata – scraper modul.
 A https://pbest.hu/musor oldalról scrape-eli az összes előadás dátumát és nevét.
 Az oldal szerver-renderelt, minden előadás egy oldalon van.
 A dátumok az event_rdate URL paraméterből, a címek a linkek szövegéből nyerhetők ki.
+Navigációs sorral (nav_queue.py) az oldal a közös fülkészletből töltődik.
 """
 
-import os
 import re
-import json
 from datetime import datetime, date
 from zoneinfo import ZoneInfo
 
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
-from scraper_utils import compare_events
+import html_extract
+import nav_queue
+from diagnostics import Diagnostics
+from navigation import goto, SiteDownError
+from scraper_utils import (
+    Event, compare_events, browser_session, load_state, save_state,
+    events_from_json, events_to_json, latest_date,
+)
 
 
 URL = "https://pbest.hu/musor"
@@ -25,70 +30,102 @@ HU_SHORT_MONTHS = {
 }
 
 
+EVENT_LINK = html_extract.compile_selector('a[href*="/musor/" i][href*="event_rdate=" i]')
+EVENT_LINK_RE = re.compile(
+    r'<a[^>]*href="[^"]*?/musor/([^"?]+)\?[^"]*event_rdate=(20\d{2})(\d{2})(\d{2})\d{6}[^"]*"[^>]*>([^<]+)</a>',
+    re.IGNORECASE
+)
+EVENT_HREF = re.compile(r"/musor/([^?#]+)\?.*?event_rdate=(20\d{2})(\d{2})(\d{2})\d{6}", re.IGNORECASE)
+EVENT_DATE_RE = re.compile(r"event_rdate=(20\d{2})(\d{2})(\d{2})\d{6}")
+
+
 def budapest_now():
     return datetime.now(tz=ZoneInfo("Europe/Budapest"))
 
 
-def extract_events_from_html(html: str) -> list[tuple[date, str]]:
+def extract_events_from_html(html: str) -> list[Event]:
     """
     (dátum, előadásnév) párok kinyerése a HTML-ből.
     PBEST link formátum: <a href="/musor/SHOW-NAME?event_rdate=YYYYMMDDHHMMSS">Title</a>
     """
+    backend = html_extract.backend()
+    events = extract_events_soup(html) if backend == "soup" else extract_events_regex(html)
+    if not events and backend == "auto":
+        # A markup változott (idézőjel, entitás, beágyazott tag): egy parse-olt próba
+        events = extract_events_soup(html)
+    return events or extract_dates_only(html)
+
+
+def _event(y: str, mo: str, d: str, title: str) -> Event | None:
+    try:
+        return Event(date(int(y), int(mo), int(d)), title)
+    except ValueError:
+        return None
+
+
+def extract_events_soup(html: str) -> list[Event]:
+    """Egy parse, a linkek a lefordított EVENT_LINK szelektorral."""
     events = []
+    for href, text in html_extract.select_links(html, EVENT_LINK):
+        m = EVENT_HREF.search(href)
+        if m is None or text is None:
+            continue
+        title = text.strip() or m.group(1).replace("-", " ").title()
+        event = _event(m.group(2), m.group(3), m.group(4), title)
+        if event is not None:
+            events.append(event)
+    return events
 
-    # Keresünk linkeket event_rdate paraméterrel és a link szövegével
-    for m in re.finditer(
-        r'<a[^>]*href="[^"]*?/musor/([^"?]+)\?[^"]*event_rdate=(20\d{2})(\d{2})(\d{2})\d{6}[^"]*"[^>]*>([^<]+)</a>',
-        html, re.IGNORECASE
-    ):
-        slug = m.group(1)
-        y, mo, d = int(m.group(2)), int(m.group(3)), int(m.group(4))
-        link_text = m.group(5).strip()
-        title = link_text if link_text else slug.replace("-", " ").title()
-        try:
-            events.append((date(y, mo, d), title))
-        except ValueError:
-            pass
-
-    # Fallback: event_rdate nélkül is keresünk
-    if not events:
-        for m in re.finditer(r"event_rdate=(20\d{2})(\d{2})(\d{2})\d{6}", html):
-            y, mo, d = int(m.group(1)), int(m.group(2)), int(m.group(3))
-            try:
-                events.append((date(y, mo, d), "?"))
-            except ValueError:
-                pass
 
+def extract_events_regex(html: str) -> list[Event]:
+    """Elsődleges út: egyetlen lefordított regex a teljes dokumentumon (bs4 nélkül is fut)."""
+    events = []
+    for m in EVENT_LINK_RE.finditer(html):
+        title = m.group(5).strip() or m.group(1).replace("-", " ").title()
+        event = _event(m.group(2), m.group(3), m.group(4), title)
+        if event is not None:
+            events.append(event)
     return events
 
 
-def check() -> dict:
+def extract_dates_only(html: str) -> list[Event]:
+    """Fallback: ha egy link sem illeszkedett, csak az event_rdate dátumok, cím nélkül."""
+    events = []
+    for m in EVENT_DATE_RE.finditer(html):
+        event = _event(m.group(1), m.group(2), m.group(3), "?")
+        if event is not None:
+            events.append(event)
+    return events
+
+
+def check(mode: str = "auto") -> dict:
+    """Ennél a színháznál nincs próba, a mode-tól függetlenül teljes scrape fut."""
     name = "Pintér Béla és Társulata"
     print(f"\n{'='*50}")
     print(f"[PBEST] Scraper indítása: {budapest_now()}")
 
-    result = {"name": name, "latest": None, "prev": None, "status": "error", "detail": ""}
+    result = {"name": name, "latest": None, "prev": None, "status": "error", "detail": "",
+              "stats": {"pages": 0, "requests": 0}}
+
+    diag = Diagnostics("pbest")
+
+    queue = nav_queue.current()
 
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context(
-                viewport={"width": 1920, "height": 1080},
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            )
-            page = context.new_page()
-
-            print(f"[PBEST] Oldal betöltése: {URL}")
-            page.goto(URL, wait_until="networkidle", timeout=60000)
-            page.wait_for_timeout(3000)
-
-            try:
-                page.screenshot(path="debug_pbest_page.png")
-            except Exception:
-                pass
-
-            html_content = page.content()
-            browser.close()
+        if queue:
+            print(f"[PBEST] Oldal betöltése: {URL} (sor)")
+            snapshot = queue.submit(URL, wait_ms=3000, timeout=60000).result()
+            nav_queue.add_stats(result["stats"], snapshot)
+            html_content = snapshot["html"]
+            diag.record(None, "műsor", html=html_content, url=snapshot["final_url"])
+        else:
+            with browser_session(result["stats"], diag, profile="pbest") as page:
+                print(f"[PBEST] Oldal betöltése: {URL}")
+                goto(page, URL, wait_until="networkidle", timeout=60000)
+                page.wait_for_timeout(3000)
+
+                html_content = page.content()
+                diag.record(page, "műsor", html=html_content)
 
         all_events = extract_events_from_html(html_content)
 
@@ -96,44 +133,50 @@ def check() -> dict:
             result["detail"] = "Nem találtam előadást az oldalon."
             return result
 
-        unique_events = sorted(set((d.isoformat(), t) for d, t in all_events))
-        latest = max(d for d, _ in all_events)
+        unique_events = sorted(set(all_events))
+        latest = latest_date(unique_events)
         event_count = len(unique_events)
+        result["event_count"] = event_count
         print(f"[PBEST] {event_count} előadás, max: {latest}")
 
         # State
-        state = {}
-        if os.path.exists(STATE_FILE):
-            with open(STATE_FILE, "r", encoding="utf-8") as f:
-                state = json.load(f)
+        state = load_state(STATE_FILE)
 
         prev_str = state.get("latest_date")
         prev = datetime.strptime(prev_str, "%Y-%m-%d").date() if prev_str else None
         prev_count = state.get("event_count")
-        prev_events = state.get("events", [])
+        prev_events = events_from_json(state.get("events", []))
 
         state["latest_date"] = latest.isoformat()
         state["event_count"] = event_count
-        state["events"] = [list(e) for e in unique_events]
+        state["events"] = events_to_json(unique_events)
         state["checked_at_budapest"] = budapest_now().isoformat()
-        with open(STATE_FILE, "w", encoding="utf-8") as f:
-            json.dump(state, f, ensure_ascii=False, indent=2)
+        save_state(STATE_FILE, state)
 
         result["latest"] = latest
         result["prev"] = prev
         result["status"], result["detail"] = compare_events(
             latest, event_count, prev, prev_count,
-            [list(e) for e in unique_events], prev_events
+            unique_events, prev_events
         )
 
         print(f"[PBEST] {result['detail']}")
         return result
 
+    except SiteDownError as e:
+        result["status"] = "site_down"
+        result["detail"] = f"Az oldal nem elérhető, kihagyva: {e}"
+        print(f"[PBEST] {result['detail']}")
+        return result
+
     except Exception as e:
         result["detail"] = f"Hiba: {e}"
         print(f"[PBEST] {result['detail']}")
         return result
 
+    finally:
+        diag.finish(result)
+
 
 if __name__ == "__main__":
     r = check()
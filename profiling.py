@@ -0,0 +1,175 @@
+"""
+Opcionális profilozás a scraper futásokhoz.
+
+Környezeti változókkal kapcsolható be (alapértelmezetten ki van kapcsolva,
+ilyenkor a profile() egy üres context manager, nincs többletköltség):
+
+  SZINHAZ_PROFILE=cprofile   – determinisztikus profiler (cProfile)
+  SZINHAZ_PROFILE=sample     – mintavételező profiler (sys._current_frames)
+  SZINHAZ_PROFILE_ONLY=katona – csak a megadott scraper(ek)et profilozza
+                                (vesszővel elválasztva, pl. "katona,vig")
+  SZINHAZ_PROFILE_INTERVAL_MS=5 – mintavételi időköz (sample módban)
+
+A kimenet a debug screenshotok mellé kerül (munkakönyvtár):
+  debug_profile_<név>.prof       – pstats formátum (cprofile mód)
+  debug_profile_<név>.txt        – legdrágább függvények listája
+  debug_profile_<név>.collapsed  – flamegraph.pl / speedscope bemenet
+"""
+
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+
+PROFILE_MODE = os.environ.get("SZINHAZ_PROFILE", "").strip().lower()
+PROFILE_ONLY = {
+    s.strip().lower()
+    for s in os.environ.get("SZINHAZ_PROFILE_ONLY", "").split(",")
+    if s.strip()
+}
+SAMPLE_INTERVAL_MS = float(os.environ.get("SZINHAZ_PROFILE_INTERVAL_MS", "5"))
+
+OUTPUT_PREFIX = "debug_profile_"
+
+
+def configure(mode: str | None, only: str | None = None):
+    """A környezeti változók felülírása (pl. CLI kapcsolóból)."""
+    global PROFILE_MODE, PROFILE_ONLY
+    if mode is not None:
+        PROFILE_MODE = mode.strip().lower()
+    if only is not None:
+        PROFILE_ONLY = {s.strip().lower() for s in only.split(",") if s.strip()}
+
+
+def is_enabled(name: str) -> bool:
+    if PROFILE_MODE not in ("cprofile", "sample"):
+        return False
+    return not PROFILE_ONLY or name.lower() in PROFILE_ONLY
+
+
+def profile(name: str):
+    """
+    Context manager a név szerinti futás profilozásához.
+    Ha a profilozás nincs bekapcsolva erre a névre, nullcontext-et ad vissza.
+    """
+    if not is_enabled(name):
+        return nullcontext()
+    if PROFILE_MODE == "cprofile":
+        return _cprofile(name)
+    return _sample(name)
+
+
+def _frame_label(code) -> str:
+    filename = os.path.basename(code.co_filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def _pstats_label(func: tuple) -> str:
+    filename, lineno, funcname = func
+    if filename == "~":
+        return funcname
+    return f"{funcname} ({os.path.basename(filename)}:{lineno})"
+
+
+def _write_collapsed(path: str, stacks: Counter):
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, weight in sorted(stacks.items()):
+            if weight > 0:
+                f.write(f"{stack} {weight}\n")
+
+
+def pstats_to_collapsed(stats, max_depth: int = 40) -> Counter:
+    """
+    pstats hívási gráfból közelítő collapsed-stack kimenet.
+    Minden függvény saját idejét (tottime, µs) a hívói között osztja szét
+    a hívónkénti kumulált idő arányában, a gyökerekig visszafelé haladva.
+    """
+    raw = stats.stats  # {func: (cc, nc, tt, ct, callers)}
+    stacks = Counter()
+
+    def walk(func, weight: float, suffix: list, seen: frozenset):
+        callers = raw.get(func, (0, 0, 0, 0, {}))[4]
+        callers = {c: v for c, v in callers.items() if c not in seen}
+        if not callers or len(suffix) >= max_depth:
+            stacks[";".join(reversed(suffix))] += int(weight)
+            return
+        total = sum(v[3] for v in callers.values()) or float(len(callers))
+        for caller, v in callers.items():
+            share = (v[3] / total) if total else 1.0 / len(callers)
+            part = weight * share
+            if part < 1:
+                continue
+            walk(caller, part, suffix + [_pstats_label(caller)], seen | {caller})
+
+    for func, (_cc, _nc, tt, _ct, _callers) in raw.items():
+        micros = tt * 1_000_000
+        if micros >= 1:
+            walk(func, micros, [_pstats_label(func)], frozenset({func}))
+
+    return stacks
+
+
+@contextmanager
+def _cprofile(name: str):
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    print(f"[PROFIL] cProfile indítása: {name}")
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        base = f"{OUTPUT_PREFIX}{name}"
+        profiler.dump_stats(f"{base}.prof")
+        with open(f"{base}.txt", "w", encoding="utf-8") as f:
+            stats = pstats.Stats(profiler, stream=f)
+            stats.sort_stats("cumulative").print_stats(40)
+        _write_collapsed(f"{base}.collapsed", pstats_to_collapsed(stats))
+        print(f"[PROFIL] Mentve: {base}.prof, {base}.collapsed")
+
+
+@contextmanager
+def _sample(name: str):
+    target_id = threading.get_ident()
+    stacks = Counter()
+    stop = threading.Event()
+    interval = max(SAMPLE_INTERVAL_MS, 0.5) / 1000.0
+
+    def sampler():
+        while not stop.wait(interval):
+            frame = sys._current_frames().get(target_id)
+            parts = []
+            while frame is not None:
+                parts.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if parts:
+                stacks[";".join(reversed(parts))] += 1
+
+    thread = threading.Thread(target=sampler, name=f"profiler-{name}", daemon=True)
+    print(f"[PROFIL] Mintavételezés indítása: {name} ({interval * 1000:.1f} ms)")
+    started = time.perf_counter()
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+        elapsed = time.perf_counter() - started
+        base = f"{OUTPUT_PREFIX}{name}"
+        _write_collapsed(f"{base}.collapsed", stacks)
+
+        # Saját idő (leaf) szerinti toplista
+        leaves = Counter()
+        for stack, count in stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(stacks.values()) or 1
+        with open(f"{base}.txt", "w", encoding="utf-8") as f:
+            f.write(f"{name}: {elapsed:.2f} s, {total} minta\n\n")
+            for label, count in leaves.most_common(40):
+                f.write(f"{count * 100 / total:6.2f}%  {count:6d}  {label}\n")
+        print(f"[PROFIL] Mentve: {base}.collapsed ({total} minta)")
@@ -3,21 +3,35 @@ Radnóti Színház – scraper modul.
 
 A radnotiszinhaz.hu/musor/ oldalról havi bontásban (?offset=0,1,2,...)
 scrape-eli a dátumokat és az előadásneveket.
+
+Navigációs sorral (nav_queue.py) saját böngésző nélkül fut, és
+QUEUE_WINDOW hónapot előre betölt; a hónapok feldolgozása és a két üres
+hónapnál megálló logika ugyanaz.
 """
 
-import os
 import re
-import json
+from collections import deque
+from contextlib import closing, nullcontext
 from datetime import datetime, date
 from zoneinfo import ZoneInfo
 
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
-from scraper_utils import compare_events
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+import nav_queue
+from diagnostics import Diagnostics
+from navigation import goto, SiteDownError
+from scraper_utils import (
+    Event, compare_events, browser_session, load_state, save_state,
+    events_from_json, events_to_json, latest_date,
+    fingerprint, probe_allowed, probe_changed_keys, probe_unchanged_result,
+)
 
 
 BASE_URL = "https://radnotiszinhaz.hu/musor/"
 STATE_FILE = "radnoti_state.json"
 
+# Navigációs sorral ennyi hónap töltődik egyszerre (a hostonkénti korlátot a sor tartja)
+QUEUE_WINDOW = 3
+
 WEEKDAYS = r"(?:hétfő|kedd|szerda|csütörtök|péntek|szombat|vasárnap)"
 
 
@@ -32,7 +46,7 @@ def extract_month_info(text: str) -> tuple[int, int] | None:
     return None
 
 
-def extract_events_for_month(text: str, year: int, month: int) -> list[tuple[date, str]]:
+def extract_events_for_month(text: str, year: int, month: int) -> list[Event]:
     """
     A Radnóti havi nézetéből kinyeri a (dátum, előadásnév) párokat.
     Szöveg mintája:
@@ -76,14 +90,14 @@ def extract_events_for_month(text: str, year: int, month: int) -> list[tuple[dat
                 title = tm.group(2).strip()
                 # Szűrjük ki a nem-cím sorokat (pl. "Jegy", "Információ", stb.)
                 if title and len(title) > 2 and not re.match(r'^[\d.:]+$', title):
-                    events.append((event_date, title))
+                    events.append(Event(event_date, title))
         else:
             # Ha nincs idő minta, próbáljuk az első nem-üres sort a napnév után
             lines = block.split("\n")
             for line in lines[2:]:  # átugorjuk a napszám + napnév sort
                 line = line.strip()
                 if line and len(line) > 2 and not re.match(r'^[\d.:]+$', line) and not re.match(WEEKDAYS, line, re.IGNORECASE):
-                    events.append((event_date, line))
+                    events.append(Event(event_date, line))
                     break
 
     return events
@@ -101,62 +115,112 @@ def extract_dates_from_range(text: str) -> list[date]:
     return sorted(set(dates))
 
 
-def scrape_all_months(page, max_months_ahead: int = 12) -> list[tuple[date, str]]:
-    all_events = []
-    empty_streak = 0
+def extract_offset_events(text: str) -> list[Event]:
+    """Egy havi nézet (offset) eseményei; ha a havi minta nem illeszkedik, csak dátumok."""
+    month_info = extract_month_info(text)
+    if month_info:
+        year, month = month_info
+        print(f"[RADNÓTI] Hónap: {year}.{month:02d}")
 
-    for offset in range(max_months_ahead):
-        url = f"{BASE_URL}?offset={offset}"
-        print(f"[RADNÓTI] Betöltés: offset={offset}")
+        month_events = extract_events_for_month(text, year, month)
+        if month_events:
+            month_dates = [e.date for e in month_events]
+            print(f"[RADNÓTI] {len(month_events)} előadás, {min(month_dates)} - {max(month_dates)}")
+            return month_events
+
+    # Fallback: csak dátumok
+    fallback_dates = extract_dates_from_range(text)
+    if not fallback_dates and month_info:
+        print(f"[RADNÓTI] Nincs esemény")
+    return [Event(d, "?") for d in fallback_dates]
+
+
+def offset_url(offset: int) -> str:
+    return f"{BASE_URL}?offset={offset}"
+
+
+def load_offset(page, diag, offset: int) -> str:
+    print(f"[RADNÓTI] Betöltés: offset={offset}")
+    goto(page, offset_url(offset), wait_until="networkidle", timeout=30000)
+    page.wait_for_timeout(2000)
+    text = page.inner_text("body")
+    diag.record(page, f"offset={offset}", text=text)
+    return text
+
+
+def submit_offset(queue, offset: int):
+    return queue.submit(offset_url(offset), content="text", wait_ms=2000, timeout=30000)
+
+
+def offset_result(future, diag, stats: dict, offset: int) -> str:
+    """Egy navigációs sorba adott betöltés szövege (timeoutnál PlaywrightTimeoutError)."""
+    print(f"[RADNÓTI] Betöltés: offset={offset} (sor)")
+    snapshot = future.result()
+    nav_queue.add_stats(stats, snapshot)
+    diag.record(None, f"offset={offset}", text=snapshot["text"], url=snapshot["final_url"])
+    return snapshot["text"]
 
+
+def iter_offsets(page, diag, max_months_ahead: int = 12):
+    """(offset, szöveg) párok sorban a böngészőből; timeoutnál a szöveg None."""
+    for offset in range(max_months_ahead):
         try:
-            page.goto(url, wait_until="networkidle", timeout=30000)
-            page.wait_for_timeout(2000)
+            yield offset, load_offset(page, diag, offset)
         except PlaywrightTimeoutError:
+            yield offset, None
+
+
+def iter_offsets_queued(queue, diag, stats: dict, max_months_ahead: int = 12,
+                        window: int = QUEUE_WINDOW):
+    """
+    Mint az iter_offsets, de a navigációs sorból, window hónappal előre.
+    Ha a fogyasztó megáll (két üres hónap), a még függő betöltések lemondódnak.
+    """
+    pending = deque()
+    next_offset = 0
+    try:
+        while True:
+            while next_offset < max_months_ahead and len(pending) < window:
+                pending.append((next_offset, submit_offset(queue, next_offset)))
+                next_offset += 1
+            if not pending:
+                return
+            offset, future = pending.popleft()
+            try:
+                yield offset, offset_result(future, diag, stats, offset)
+            except PlaywrightTimeoutError:
+                yield offset, None
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+
+def scrape_all_months(pages, per_offset: dict | None = None) -> list[Event]:
+    """
+    Havonta (offset=0, 1, ...) végigmegy a műsoron, amíg két üres hónap nem jön.
+    pages: (offset, szöveg | None) párok (iter_offsets / iter_offsets_queued).
+    per_offset: ha meg van adva, offsetenként ide is bekerülnek az események
+    (a próba ujjlenyomataihoz).
+    """
+    all_events = []
+    empty_streak = 0
+
+    for offset, text in pages:
+        if text is None:
             print(f"[RADNÓTI] Timeout offset={offset}")
             empty_streak += 1
             if empty_streak >= 2:
                 break
             continue
 
-        text = page.inner_text("body")
-
-        if offset == 0:
-            try:
-                page.screenshot(path="debug_radnoti_page.png")
-            except Exception:
-                pass
-
-        month_info = extract_month_info(text)
-        if month_info:
-            year, month = month_info
-            print(f"[RADNÓTI] Hónap: {year}.{month:02d}")
-
-            month_events = extract_events_for_month(text, year, month)
-
-            if month_events:
-                month_dates = [d for d, _ in month_events]
-                print(f"[RADNÓTI] {len(month_events)} előadás, {min(month_dates)} - {max(month_dates)}")
-                all_events.extend(month_events)
-                empty_streak = 0
-            else:
-                # Fallback: csak dátumok
-                fallback_dates = extract_dates_from_range(text)
-                if fallback_dates:
-                    for d in fallback_dates:
-                        all_events.append((d, "?"))
-                    empty_streak = 0
-                else:
-                    print(f"[RADNÓTI] Nincs esemény")
-                    empty_streak += 1
+        offset_events = extract_offset_events(text)
+        if per_offset is not None:
+            per_offset[offset] = offset_events
+        if offset_events:
+            all_events.extend(offset_events)
+            empty_streak = 0
         else:
-            fallback_dates = extract_dates_from_range(text)
-            if fallback_dates:
-                for d in fallback_dates:
-                    all_events.append((d, "?"))
-                empty_streak = 0
-            else:
-                empty_streak += 1
+            empty_streak += 1
 
         if empty_streak >= 2:
             print(f"[RADNÓTI] 2 üres hónap egymás után, befejezem")
@@ -165,65 +229,134 @@ def scrape_all_months(page, max_months_ahead: int = 12) -> list[tuple[date, str]
     return all_events
 
 
-def check() -> dict:
+def full_scrape_fingerprints(per_offset: dict) -> dict:
+    """Az utolsó nem üres offset és az utána következő ujjlenyomata."""
+    populated = [o for o, events in per_offset.items() if events]
+    if not populated:
+        return {}
+    last = max(populated)
+    return {
+        str(last): fingerprint(per_offset[last]),
+        str(last + 1): fingerprint(per_offset.get(last + 1, [])),
+    }
+
+
+def probe_offsets(page, diag, stored: dict) -> dict:
+    """A tárolt ujjlenyomatokhoz tartozó offsetek újratöltése."""
+    probed = {}
+    for key in stored:
+        try:
+            text = load_offset(page, diag, int(key))
+        except PlaywrightTimeoutError:
+            probed[key] = "timeout"
+            continue
+        probed[key] = fingerprint(extract_offset_events(text))
+    return probed
+
+
+def probe_offsets_queued(queue, diag, stats: dict, stored: dict) -> dict:
+    """A probe_offsets a navigációs sorral: az offsetek egyszerre kerülnek a sorba."""
+    futures = {key: submit_offset(queue, int(key)) for key in stored}
+    probed = {}
+    for key, future in futures.items():
+        try:
+            text = offset_result(future, diag, stats, int(key))
+        except PlaywrightTimeoutError:
+            probed[key] = "timeout"
+            continue
+        probed[key] = fingerprint(extract_offset_events(text))
+    return probed
+
+
+def check(mode: str = "auto") -> dict:
+    """mode: "auto" – próba, ha lehet, és csak változásnál teljes scrape; "full" – mindig teljes."""
     name = "Radnóti Színház"
     print(f"\n{'='*50}")
     print(f"[RADNÓTI] Scraper indítása: {budapest_now()}")
 
-    result = {"name": name, "latest": None, "prev": None, "status": "error", "detail": ""}
+    result = {"name": name, "latest": None, "prev": None, "status": "error", "detail": "",
+              "stats": {"pages": 0, "requests": 0}}
+
+    diag = Diagnostics("radnoti")
+    state = load_state(STATE_FILE)
+    probe_note = None
+
+    queue = nav_queue.current()
+    session = nullcontext() if queue else browser_session(result["stats"], diag, profile="radnoti")
 
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context(
-                viewport={"width": 1920, "height": 1080},
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            )
-            page = context.new_page()
-            all_events = scrape_all_months(page)
-            browser.close()
+        with session as page:
+            if probe_allowed(state, mode):
+                if queue:
+                    probed = probe_offsets_queued(queue, diag, result["stats"], state["fingerprints"])
+                else:
+                    probed = probe_offsets(page, diag, state["fingerprints"])
+                changed = probe_changed_keys(state["fingerprints"], probed)
+                if not changed:
+                    probe_unchanged_result(result, state, probed)
+                    print(f"[RADNÓTI] {result['detail']}")
+                    return result
+                probe_note = f"Próba: változás (offset {', '.join(changed)}) → teljes scrape"
+                result["probe"] = {"pages": sorted(probed), "changed": changed}
+                print(f"[RADNÓTI] {probe_note}")
+
+            per_offset = {}
+            if queue:
+                pages = iter_offsets_queued(queue, diag, result["stats"])
+            else:
+                pages = iter_offsets(page, diag)
+            with closing(pages):
+                all_events = scrape_all_months(pages, per_offset)
 
         if not all_events:
             result["detail"] = "Nem találtam előadást az oldalon."
             return result
 
-        unique_events = sorted(set((d.isoformat(), t) for d, t in all_events))
-        latest = max(d for d, _ in all_events)
+        unique_events = sorted(set(all_events))
+        latest = latest_date(unique_events)
         event_count = len(unique_events)
+        result["event_count"] = event_count
         print(f"[RADNÓTI] {event_count} előadás, max: {latest}")
 
-        state = {}
-        if os.path.exists(STATE_FILE):
-            with open(STATE_FILE, "r", encoding="utf-8") as f:
-                state = json.load(f)
-
         prev_str = state.get("latest_date")
         prev = datetime.strptime(prev_str, "%Y-%m-%d").date() if prev_str else None
         prev_count = state.get("event_count")
-        prev_events = state.get("events", [])
+        prev_events = events_from_json(state.get("events", []))
 
         state["latest_date"] = latest.isoformat()
         state["event_count"] = event_count
-        state["events"] = [list(e) for e in unique_events]
+        state["events"] = events_to_json(unique_events)
+        state["fingerprints"] = full_scrape_fingerprints(per_offset)
+        state["last_full_scrape"] = budapest_now().isoformat()
         state["checked_at_budapest"] = budapest_now().isoformat()
-        with open(STATE_FILE, "w", encoding="utf-8") as f:
-            json.dump(state, f, ensure_ascii=False, indent=2)
+        save_state(STATE_FILE, state)
 
         result["latest"] = latest
         result["prev"] = prev
         result["status"], result["detail"] = compare_events(
             latest, event_count, prev, prev_count,
-            [list(e) for e in unique_events], prev_events
+            unique_events, prev_events
         )
+        if probe_note:
+            result["detail"] = f"{probe_note}\n{result['detail']}"
 
         print(f"[RADNÓTI] {result['detail']}")
         return result
 
+    except SiteDownError as e:
+        result["status"] = "site_down"
+        result["detail"] = f"Az oldal nem elérhető, kihagyva: {e}"
+        print(f"[RADNÓTI] {result['detail']}")
+        return result
+
     except Exception as e:
         result["detail"] = f"Hiba: {e}"
         print(f"[RADNÓTI] {result['detail']}")
         return result
 
+    finally:
+        diag.finish(result)
+
 
 if __name__ == "__main__":
     r = check()
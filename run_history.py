@@ -0,0 +1,156 @@
+"""
+Futási idő történet és lassulás-figyelés.
+
+Minden futás után scraperenként egy tömör JSON sort fűz a
+run_history.jsonl fájlhoz (időtartam, oldalszám, kérésszám, előadásszám),
+és az előző futásokból számolt medián / p95 alapvonalhoz hasonlítja
+az aktuális futást.
+
+Rekord formátum (rövid kulcsok, egy sor = egy scraper egy futása):
+  {"t": "2026-03-01T02:01:00+01:00", "k": "katona", "s": "no_change",
+   "d": 182.4, "p": 14, "r": 912, "e": 138}
+Tartós böngészőprofillal a cache-ből kiszolgált kérések száma "c"-ként
+kerül be. Ha a futás csak próbából állt (a teljes scrape kimaradt), "m": "probe" is
+szerepel; ezek nem számítanak bele az alapvonalba.
+"""
+
+import os
+import json
+from statistics import median
+
+
+HISTORY_FILE = "run_history.jsonl"
+MAX_RECORDS = 3000            # kb. másfél év öt színházzal
+BASELINE_RUNS = 20            # ennyi korábbi sikeres futásból számol alapvonalat
+MIN_BASELINE_RUNS = 5         # ennél kevesebb adatnál nem riaszt
+SLOWDOWN_FACTOR = 1.5         # a mediánhoz képest ennyiszer lassabb...
+MIN_SLOWDOWN_SECONDS = 15.0   # ...és legalább ennyivel lassabb
+
+NOT_MEASURED_STATUSES = {"error", "site_down", "skipped"}
+
+
+def load_history(path: str = HISTORY_FILE) -> list[dict]:
+    if not os.path.exists(path):
+        return []
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+def is_probe_only(result: dict) -> bool:
+    probe = result.get("probe")
+    return bool(probe) and not probe.get("changed")
+
+
+def make_record(result: dict, checked_at: str) -> dict:
+    stats = result.get("stats") or {}
+    record = {
+        "t": checked_at,
+        "k": result.get("key", "?"),
+        "s": result.get("status", "error"),
+        "d": round(result.get("duration", 0.0), 1),
+        "p": stats.get("pages", 0),
+        "r": stats.get("requests", 0),
+        "e": result.get("event_count", 0),
+    }
+    if "cached" in stats:
+        record["c"] = stats["cached"]
+    if is_probe_only(result):
+        record["m"] = "probe"
+    return record
+
+
+def append_runs(results: list[dict], checked_at: str, path: str = HISTORY_FILE):
+    """Hozzáfűzi a futás rekordjait, és MAX_RECORDS sorra vágja a fájlt."""
+    new_lines = [
+        json.dumps(make_record(r, checked_at), ensure_ascii=False, separators=(",", ":"))
+        for r in results
+    ]
+
+    lines = []
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            lines = [l.rstrip("\n") for l in f if l.strip()]
+    lines.extend(new_lines)
+    lines = lines[-MAX_RECORDS:]
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentilis (pct: 0–100)."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def baseline(history: list[dict], key: str, runs: int = BASELINE_RUNS) -> dict | None:
+    """Az utolsó `runs` lefutott (nem hibás, nem kihagyott) futás mediánja és p95-je."""
+    records = [r for r in history
+               if r.get("k") == key and r.get("s") not in NOT_MEASURED_STATUSES
+               and r.get("m") != "probe"][-runs:]
+    if len(records) < MIN_BASELINE_RUNS:
+        return None
+    durations = [r.get("d", 0.0) for r in records]
+    return {
+        "runs": len(records),
+        "median": median(durations),
+        "p95": percentile(durations, 95),
+        "pages": median(r.get("p", 0) for r in records),
+        "requests": median(r.get("r", 0) for r in records),
+    }
+
+
+def detect_slowdowns(history: list[dict], results: list[dict]) -> list[dict]:
+    """
+    Az aktuális futásokat a korábbi történethez hasonlítja.
+    Lassulás: az időtartam a p95 fölött van, és a mediánnál legalább
+    SLOWDOWN_FACTOR-szor és MIN_SLOWDOWN_SECONDS-szal nagyobb.
+    """
+    slowdowns = []
+    for r in results:
+        if (r.get("status") in NOT_MEASURED_STATUSES or "duration" not in r
+                or is_probe_only(r)):
+            continue
+        base = baseline(history, r.get("key", "?"))
+        if base is None:
+            continue
+        duration = r["duration"]
+        if (duration > base["p95"]
+                and duration >= base["median"] * SLOWDOWN_FACTOR
+                and duration - base["median"] >= MIN_SLOWDOWN_SECONDS):
+            slowdowns.append({"result": r, "baseline": base})
+    return slowdowns
+
+
+def format_slowdowns(slowdowns: list[dict]) -> list[str]:
+    """Email szakasz sorai (üres lista, ha nincs lassulás)."""
+    if not slowdowns:
+        return []
+    lines = ["🐢 lassulás", ""]
+    for s in slowdowns:
+        r, base = s["result"], s["baseline"]
+        stats = r.get("stats") or {}
+        lines.append(
+            f"   {r['name']}: {r['duration']:.0f} s "
+            f"(medián {base['median']:.0f} s, p95 {base['p95']:.0f} s, {base['runs']} futás)"
+        )
+        lines.append(
+            f"      oldalak: {stats.get('pages', 0)} (medián {base['pages']:.0f}), "
+            f"kérések: {stats.get('requests', 0)} (medián {base['requests']:.0f})"
+        )
+    lines.append("")
+    return lines
@@ -0,0 +1,120 @@
+"""
+Adaptív ütemező: a run_history.jsonl alapján színházanként megtanulja,
+mikor szoktak változni a műsorok (hét napja, hónap napja ± ablak), és
+minden futáskor eldönti, melyik színházat kell teljesen scrape-elni
+("full"), melyiknél elég az olcsó ujjlenyomat-próba ("probe", ha a
+scraper tud ilyet), és melyik hagyható ki ("skip").
+
+Egy színház sosem maradhat MAX_STALENESS_DAYS napnál tovább teljes
+scrape nélkül (a csak próbából álló futás ebbe nem számít bele), és amíg
+nincs elég előzmény, vagy az előző futás hibás volt, mindig fut.
+
+Használat: python main.py --adaptive [--max-staleness NAP]
+"""
+
+import os
+from collections import Counter
+from datetime import datetime
+
+from theatres import THEATRES
+
+
+MAX_STALENESS_DAYS = float(os.environ.get("SZINHAZ_MAX_STALENESS_DAYS", "3"))
+MIN_OBSERVED_DAYS = 21        # ennyi scrape-elt nap alatt nincs tanulás, mindig fut
+CHANGE_THRESHOLD = 0.25       # e fölötti becsült változási esélynél fut
+DAY_OF_MONTH_WINDOW = 1       # hónap napja ± ennyi nap (pl. hónap eleji jegyárusítás)
+SMOOTHING = 2.0               # Laplace-simítás az átlagos változási arány felé
+
+CHANGE_STATUSES = {"new_date", "count_changed", "decreased"}
+NOT_SCRAPED_STATUSES = {"skipped", "error", "site_down"}
+
+
+def _day(record: dict):
+    try:
+        return datetime.fromisoformat(record["t"]).date()
+    except (KeyError, ValueError):
+        return None
+
+
+def observed_days(history: list[dict], key: str) -> dict:
+    """{nap: volt-e változás} a ténylegesen lefutott scrape-ekből."""
+    days = {}
+    for r in history:
+        if r.get("k") != key or r.get("s") in NOT_SCRAPED_STATUSES:
+            continue
+        d = _day(r)
+        if d is not None:
+            days[d] = days.get(d, False) or r.get("s") in CHANGE_STATUSES
+    return days
+
+
+def last_full_scrape(history: list[dict], key: str):
+    """Az utolsó teljes scrape napja; a csak próbából álló futás ("m": "probe") nem számít."""
+    days = [_day(r) for r in history
+            if r.get("k") == key and r.get("s") not in NOT_SCRAPED_STATUSES
+            and r.get("m") != "probe"]
+    return max((d for d in days if d is not None), default=None)
+
+
+def _smoothed(changes: int, observations: int, base_rate: float) -> float:
+    return (changes + SMOOTHING * base_rate) / (observations + SMOOTHING)
+
+
+def change_likelihood(days: dict, today) -> tuple[float, str]:
+    """
+    A mai nap becsült változási esélye: a hét napja és a hónap napja
+    (± ablak) szerinti simított arányok közül a nagyobb.
+    """
+    base_rate = sum(days.values()) / len(days)
+
+    wd_obs = Counter(d.weekday() for d in days)
+    wd_chg = Counter(d.weekday() for d, changed in days.items() if changed)
+    wd_rate = _smoothed(wd_chg[today.weekday()], wd_obs[today.weekday()], base_rate)
+
+    def near(d):
+        return abs(d.day - today.day) <= DAY_OF_MONTH_WINDOW
+
+    dom_obs = sum(1 for d in days if near(d))
+    dom_chg = sum(1 for d, changed in days.items() if changed and near(d))
+    dom_rate = _smoothed(dom_chg, dom_obs, base_rate)
+
+    if wd_rate >= dom_rate:
+        return wd_rate, f"hét napja alapján {wd_rate:.0%}"
+    return dom_rate, f"hónap napja alapján {dom_rate:.0%}"
+
+
+def decide(history: list[dict], key: str, now: datetime,
+           max_staleness_days: float = MAX_STALENESS_DAYS) -> dict:
+    """Egy színház döntése: {"action": "full" | "probe" | "skip", "reason": str}."""
+    today = now.date()
+    own = [r for r in history if r.get("k") == key]
+    if own and own[-1].get("s") in ("error", "site_down"):
+        return {"action": "full", "reason": "az előző futás sikertelen volt"}
+
+    days = observed_days(history, key)
+    if not days:
+        return {"action": "full", "reason": "nincs előzmény"}
+
+    last_full = last_full_scrape(history, key)
+    if last_full is None:
+        return {"action": "full", "reason": "még nem volt teljes scrape"}
+    staleness = (today - last_full).days
+    if staleness >= max_staleness_days:
+        return {"action": "full", "reason": f"{staleness} napja nem volt teljes scrape"}
+
+    if len(days) < MIN_OBSERVED_DAYS:
+        return {"action": "full", "reason": f"kevés előzmény ({len(days)} nap)"}
+
+    likelihood, basis = change_likelihood(days, today)
+    if likelihood >= CHANGE_THRESHOLD:
+        return {"action": "full", "reason": f"valószínű változás ({basis})"}
+
+    return {
+        "action": "probe" if THEATRES.get(key, {}).get("probe") else "skip",
+        "reason": f"változás esélye alacsony ({basis}), utolsó teljes scrape {staleness} napja",
+    }
+
+
+def plan(keys: list[str], history: list[dict], now: datetime,
+         max_staleness_days: float = MAX_STALENESS_DAYS) -> dict:
+    return {key: decide(history, key, now, max_staleness_days) for key in keys}
@@ -0,0 +1,168 @@
+"""
+Izolált scraper futtatás: minden scraper külön worker processzben fut,
+saját falióra-kerettel (deadline).
+
+Ha egy scraper túllépi a keretét (pl. beragadt Chromium vagy egy
+egymásba ágyazott 60–90 s-os Playwright timeout), a worker processzt a
+teljes process groupjával együtt leállítjuk – így az általa indított
+Playwright driver és Chromium is megszűnik –, és "error" státuszú
+eredményt adunk vissza a részleges futási idővel. A többi színház
+ettől függetlenül lefut, és az összesítő email időben kimegy.
+
+Bekapcsolás: SZINHAZ_ISOLATED=1
+  SZINHAZ_WORKERS=2        – egyszerre futó worker processzek száma
+  SZINHAZ_DEADLINE_S=600   – minden scraperre egységes keret (másodperc)
+"""
+
+import os
+import time
+import signal
+import multiprocessing
+from multiprocessing.connection import wait
+
+from theatres import THEATRES
+
+
+DEFAULT_WORKERS = 2
+
+# Scraperenkénti falióra-keret (másodperc). A Katona bináris keresés +
+# oldalankénti scrape a leglassabb, a PBEST egyetlen oldal.
+DEADLINES = {
+    "katona": 900,
+    "orkeny": 600,
+    "radnoti": 420,
+    "pbest": 180,
+    "vig": 420,
+}
+DEFAULT_DEADLINE = 600
+
+KILL_GRACE_SECONDS = 5
+
+
+def isolation_enabled() -> bool:
+    return os.environ.get("SZINHAZ_ISOLATED", "").strip().lower() in ("1", "true", "yes")
+
+
+def worker_count() -> int:
+    try:
+        return max(1, int(os.environ.get("SZINHAZ_WORKERS", DEFAULT_WORKERS)))
+    except ValueError:
+        return DEFAULT_WORKERS
+
+
+def deadline_for(key: str) -> float:
+    override = os.environ.get("SZINHAZ_DEADLINE_S")
+    if override:
+        try:
+            return float(override)
+        except ValueError:
+            pass
+    return float(DEADLINES.get(key, DEFAULT_DEADLINE))
+
+
+def _worker(key: str, mode: str, runner, conn):
+    # Saját process group, hogy timeout esetén a Chromium is vele együtt álljon le
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()
+    try:
+        result = runner(key, mode)
+    except BaseException as e:
+        result = {
+            "name": THEATRES[key]["name"],
+            "status": "error",
+            "detail": f"Worker hiba: {e}",
+            "latest": None,
+            "prev": None,
+        }
+    result.setdefault("key", key)
+    result.setdefault("duration", 0.0)
+    conn.send(result)
+    conn.close()
+
+
+def _kill(proc):
+    """A worker és a teljes process groupja (Playwright driver, Chromium) leállítása."""
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+    if proc.is_alive():
+        proc.kill()
+    proc.join(KILL_GRACE_SECONDS)
+
+
+def _error_result(key: str, detail: str, duration: float) -> dict:
+    return {
+        "name": THEATRES[key]["name"],
+        "key": key,
+        "status": "error",
+        "detail": detail,
+        "latest": None,
+        "prev": None,
+        "duration": duration,
+    }
+
+
+def run_isolated(keys: list[str], runner, modes: dict | None = None,
+                 workers: int | None = None) -> list[dict]:
+    """
+    keys: scraper kulcsok (ld. theatres.THEATRES)
+    runner: top-level függvény, ami a kulcs és a mode alapján lefuttatja a
+            scrapert és result dict-et ad (a workerben hívódik, ezért
+            picklelhetőnek kell lennie).
+    modes: kulcsonkénti futási mód ("auto" / "full"), alapértelmezés "auto".
+    Az eredményeket a bemenet sorrendjében adja vissza.
+    """
+    workers = workers or worker_count()
+    ctx = multiprocessing.get_context("spawn")
+
+    pending = list(keys)
+    running = {}   # conn -> (key, proc, started, deadline)
+    results = {}
+
+    while pending or running:
+        while pending and len(running) < workers:
+            key = pending.pop(0)
+            recv_conn, send_conn = ctx.Pipe(duplex=False)
+            proc = ctx.Process(target=_worker, args=(key, (modes or {}).get(key, "auto"), runner, send_conn),
+                               name=f"scraper-{key}", daemon=True)
+            proc.start()
+            send_conn.close()
+            deadline = deadline_for(key)
+            print(f"[POOL] {key} indítva (pid {proc.pid}, keret {deadline:.0f} s)")
+            running[recv_conn] = (key, proc, time.monotonic(), deadline)
+
+        now = time.monotonic()
+        timeout = min(started + deadline - now for _, _, started, deadline in running.values())
+        ready = wait(list(running), timeout=max(0.0, timeout))
+
+        for conn in ready:
+            key, proc, started, _deadline = running.pop(conn)
+            try:
+                results[key] = conn.recv()
+            except EOFError:
+                proc.join(KILL_GRACE_SECONDS)
+                results[key] = _error_result(
+                    key,
+                    f"A worker váratlanul kilépett (exit code: {proc.exitcode}).",
+                    time.monotonic() - started,
+                )
+            conn.close()
+            proc.join(KILL_GRACE_SECONDS)
+            if proc.is_alive():
+                _kill(proc)
+
+        now = time.monotonic()
+        for conn in [c for c, v in running.items() if now - v[2] >= v[3]]:
+            key, proc, started, deadline = running.pop(conn)
+            print(f"[POOL] {key} túllépte a {deadline:.0f} s keretet, leállítom")
+            _kill(proc)
+            conn.close()
+            results[key] = _error_result(
+                key,
+                f"Időtúllépés: {deadline:.0f} s után leállítva (böngésző bezárva).",
+                time.monotonic() - started,
+            )
+
+    return [results[key] for key in keys]
@@ -2,7 +2,354 @@
 Közös segédfüggvények a scraperekhez.
 """
 
-from datetime import date
+import os
+import json
+import shutil
+import hashlib
+import threading
+from bisect import bisect_right
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+VIEWPORT = {"width": 1920, "height": 1080}
+
+# Tartós böngészőprofil (HTTP cache, service worker, consent sütik) oldalanként:
+# SZINHAZ_BROWSER_PROFILES=<könyvtár> kapcsolja be, a méretkorlát MB-ban
+PROFILE_MAX_MB = float(os.environ.get("SZINHAZ_BROWSER_PROFILE_MAX_MB", "150"))
+# Méretkorlát túllépésekor először ezek törlődnek (a sütik megmaradnak)
+PROFILE_CACHE_DIRS = ("Cache", "Code Cache", "GPUCache", "Service Worker/CacheStorage")
+# A HTTP disk cache: asset cache mellett (routing) a Chromium nem használja
+PROFILE_HTTP_CACHE_DIR = "Cache"
+
+# Ennél régebbi teljes scrape után a próba nem hagyhatja ki a teljes futást
+PROBE_MAX_AGE_DAYS = 3
+
+# Ugyanannak a címnek ennyi napon belüli eltűnése + megjelenése áthelyezés
+MOVE_WINDOW_DAYS = 7
+
+
+_titles: list[str] = []
+_title_ids: dict[str, int] = {}
+_titles_lock = threading.Lock()     # a navigációs sorral a scraperek szálakon futnak
+
+
+def intern_title(title: str) -> int:
+    """Processzenként egyszer tárolt cím → kis egész azonosító."""
+    title_id = _title_ids.get(title)
+    if title_id is None:
+        with _titles_lock:
+            title_id = _title_ids.get(title)
+            if title_id is None:
+                title_id = _title_ids[title] = len(_titles)
+                _titles.append(title)
+    return title_id
+
+
+class Event:
+    """
+    Egy előadás: nap-ordinál + internált cím-azonosító. Kinyeréstől a
+    diffelésen át a JSON-ig ez az egyetlen reprezentáció; a hash és az
+    egyenlőség két int-en megy, dátum- és sztringobjektum csak kiíráskor
+    készül. Rendezés: dátum, majd cím szerint (mint a state fájlban).
+    """
+    __slots__ = ("ordinal", "title_id")
+
+    def __init__(self, day: date, title: str):
+        self.ordinal = day.toordinal()
+        self.title_id = intern_title(title)
+
+    @classmethod
+    def from_json(cls, pair) -> "Event":
+        """[dátum_iso, cím] (a state fájl formátuma) → Event"""
+        event = cls.__new__(cls)
+        event.ordinal = date.fromisoformat(pair[0]).toordinal()
+        event.title_id = intern_title(pair[1])
+        return event
+
+    @property
+    def date(self) -> date:
+        return date.fromordinal(self.ordinal)
+
+    @property
+    def title(self) -> str:
+        return _titles[self.title_id]
+
+    @property
+    def iso(self) -> str:
+        return date.fromordinal(self.ordinal).isoformat()
+
+    def to_json(self) -> list[str]:
+        return [self.iso, self.title]
+
+    def __eq__(self, other):
+        return (isinstance(other, Event)
+                and self.ordinal == other.ordinal and self.title_id == other.title_id)
+
+    def __hash__(self):
+        return hash((self.ordinal, self.title_id))
+
+    def __lt__(self, other):
+        if self.ordinal != other.ordinal:
+            return self.ordinal < other.ordinal
+        return _titles[self.title_id] < _titles[other.title_id]
+
+    def __repr__(self):
+        return f"Event({self.iso!r}, {self.title!r})"
+
+
+def events_from_json(pairs) -> list[Event]:
+    return [Event.from_json(p) for p in pairs]
+
+
+def events_to_json(events) -> list[list[str]]:
+    return [e.to_json() for e in events]
+
+
+def latest_date(events) -> date:
+    return date.fromordinal(max(e.ordinal for e in events))
+
+
+def state_write_enabled() -> bool:
+    """A main.py --no-state-write kapcsolója (környezeti változóként öröklődik)."""
+    return os.environ.get("SZINHAZ_NO_STATE_WRITE", "").strip().lower() not in ("1", "true", "yes")
+
+
+# Minden futáskor változó mezők: nem a commitolt snapshotba, hanem a
+# mellette lévő <név>.meta.json fájlba kerülnek (ld. save_state)
+META_KEYS = ("checked_at_budapest", "last_page", "fingerprints", "last_full_scrape", "month_template")
+
+
+def meta_path(path: str) -> str:
+    """state.json → state.meta.json"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.meta{ext}"
+
+
+def _read_json(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_state(path: str) -> dict:
+    """Az előadás-snapshot és a futási metaadatok együtt, egyetlen dict-ként."""
+    state = _read_json(path)
+    state.update(_read_json(meta_path(path)))
+    return state
+
+
+def canonical_snapshot(snapshot: dict) -> str:
+    """
+    Determinisztikus JSON: rendezett kulcsok, rendezett előadáslista,
+    előadásonként egy sor – így a git diff pontosan a változott előadásokat mutatja.
+    """
+    lines = []
+    for key, value in sorted(snapshot.items()):
+        if key == "events":
+            events = [json.dumps(list(e), ensure_ascii=False) for e in sorted(map(tuple, value))]
+            body = ",\n".join(f"    {e}" for e in events)
+            lines.append(f'  "events": [\n{body}\n  ]' if events else '  "events": []')
+        else:
+            lines.append(f"  {json.dumps(key)}: {json.dumps(value, ensure_ascii=False, sort_keys=True)}")
+    return "{\n" + ",\n".join(lines) + "\n}\n"
+
+
+def write_if_changed(path: str, data: str | bytes) -> bool:
+    """
+    Csak akkor ír (atomikusan), ha a fájl tartalma eltér. True, ha írt.
+    A str UTF-8-ként íródik; az összevetés bájtonként megy, így a CRLF
+    sorvégek (iCalendar) sem vesznek el.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+def save_state(path: str, state: dict):
+    """
+    State mentése atomikusan (tmp fájl + rename), hacsak nincs letiltva.
+    A snapshot (path) csak akkor íródik újra, ha a tartalma tényleg
+    változott; a META_KEYS mezők a meta_path(path) fájlba kerülnek.
+    """
+    if not state_write_enabled():
+        print(f"[STATE] Írás kihagyva (--no-state-write): {path}")
+        return
+    snapshot = {k: v for k, v in state.items() if k not in META_KEYS}
+    meta = {k: state[k] for k in META_KEYS if k in state}
+    if write_if_changed(path, canonical_snapshot(snapshot)):
+        print(f"[STATE] Snapshot frissítve: {path}")
+    write_if_changed(meta_path(path), json.dumps(meta, ensure_ascii=False, indent=2, sort_keys=True) + "\n")
+
+
+def fingerprint(events) -> str:
+    """Sorrendfüggetlen ujjlenyomat Event-ekből; üres listára is stabil."""
+    h = hashlib.sha1()
+    for e in sorted(set(events)):
+        h.update(f"{e.iso}|{e.title}\n".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def probe_allowed(state: dict, mode: str) -> bool:
+    """
+    Futhat-e próba a teljes scrape előtt: van tárolt ujjlenyomat, nem kértek
+    kifejezetten teljes futást, és az utolsó teljes scrape elég friss.
+    """
+    if mode == "full" or not state.get("fingerprints") or not state.get("last_full_scrape"):
+        return False
+    try:
+        last_full = datetime.fromisoformat(state["last_full_scrape"])
+    except ValueError:
+        return False
+    return datetime.now(tz=last_full.tzinfo) - last_full < timedelta(days=PROBE_MAX_AGE_DAYS)
+
+
+def probe_unchanged_result(result: dict, state: dict, probed: dict):
+    """A result kitöltése, ha a próba szerint semmi sem változott."""
+    latest = state.get("latest_date")
+    result["latest"] = date.fromisoformat(latest) if latest else None
+    result["prev"] = result["latest"]
+    result["event_count"] = state.get("event_count", 0)
+    result["status"] = "no_change"
+    result["probe"] = {"pages": sorted(probed), "changed": []}
+    result["detail"] = (
+        f"Nincs változás (próba: {len(probed)} oldal ujjlenyomata egyezik, teljes scrape kihagyva). "
+        f"Max: {latest} ({result['event_count']} előadás)"
+    )
+
+
+def probe_changed_keys(stored: dict, probed: dict) -> list[str]:
+    return sorted(k for k in probed if stored.get(k) != probed[k])
+
+
+def diff_events(current, previous):
+    """
+    Két rendezett, ismétlődésmentes Event sorozat különbsége egyetlen
+    összefésülő menetben, konstans extra memóriával. Generátor:
+    ("added", e, None) és ("removed", e, None) rekordok dátum, cím sorrendben.
+    Rendezetlen bemenetnél ValueError.
+    """
+    cur, prev = iter(current), iter(previous)
+    a, b = next(cur, None), next(prev, None)
+    last_a = last_b = None
+    while a is not None or b is not None:
+        if a is not None and last_a is not None and a < last_a:
+            raise ValueError("diff_events: a current nincs rendezve")
+        if b is not None and last_b is not None and b < last_b:
+            raise ValueError("diff_events: a previous nincs rendezve")
+        if b is None or (a is not None and a < b):
+            yield ("added", a, None)
+            last_a, a = a, next(cur, None)
+        elif a is None or b < a:
+            yield ("removed", b, None)
+            last_b, b = b, next(prev, None)
+        else:
+            last_a, a = a, next(cur, None)
+            last_b, b = b, next(prev, None)
+
+
+def move_check(current: list[Event], previous: list[Event]):
+    """
+    A pair_moves feltétele a két rendezett listából: eltűnés + megjelenés
+    csak akkor áthelyezés, ha a cím előtte és utána ugyanannyiszor szerepel,
+    és a két dátum között nincs másik előadása. Így egy naponta játszott
+    darab továbbcsúszó ablaka (03-01..07 → 03-02..08) új és eltűnt előadás
+    marad, nem "03-01 → 03-08" áthelyezés.
+    """
+    cur_counts = Counter(e.title_id for e in current)
+    prev_counts = Counter(e.title_id for e in previous)
+
+    def movable(new: Event, old: Event) -> bool:
+        if cur_counts[new.title_id] != prev_counts[new.title_id]:
+            return False
+        lo, hi = sorted((old.ordinal, new.ordinal))
+        i = bisect_right(current, lo, key=lambda e: e.ordinal)
+        while i < len(current) and current[i].ordinal < hi:
+            if current[i].title_id == new.title_id:
+                return False
+            i += 1
+        return True
+
+    return movable
+
+
+def pair_moves(changes, window_days: int = MOVE_WINDOW_DAYS, movable=None):
+    """
+    A diff_events rekordjaiból ("moved", új, régi) rekordot képez, ha
+    ugyanaz a cím window_days napon belül eltűnt és megjelent, és a
+    movable(új, régi) feltétel (ld. move_check) engedi. Csak az ablakon
+    belüli, még párosítatlan rekordokat tartja memóriában.
+    """
+    pending = deque()   # [kind, event, párosítatlan-e] érkezési sorrendben
+    by_title = {}       # title_id -> a párosítatlan pending bejegyzések
+
+    def expire(before: float):
+        while pending and (not pending[0][2] or pending[0][1].ordinal < before):
+            entry = pending.popleft()
+            if entry[2]:
+                _drop_candidate(by_title, entry)
+                yield (entry[0], entry[1], None)
+
+    for kind, event, _ in changes:
+        yield from expire(event.ordinal - window_days)
+        candidates = by_title.get(event.title_id, [])
+        match = next((entry for entry in candidates if entry[0] != kind and (
+            movable is None
+            or (movable(event, entry[1]) if kind == "added" else movable(entry[1], event))
+        )), None)
+        if match is None:
+            entry = [kind, event, True]
+            by_title.setdefault(event.title_id, []).append(entry)
+            pending.append(entry)
+            continue
+        match[2] = False
+        _drop_candidate(by_title, match)
+        yield ("moved", event, match[1]) if kind == "added" else ("moved", match[1], event)
+    yield from expire(float("inf"))
+
+
+def _drop_candidate(by_title: dict, entry: list):
+    candidates = by_title[entry[1].title_id]
+    candidates.remove(next(c for c in candidates if c is entry))
+    if not candidates:
+        del by_title[entry[1].title_id]
+
+
+def format_diff(changes, max_added: int = 20, max_removed: int = 10, max_moved: int = 10) -> list[str]:
+    """A változás-rekordok szöveges összefoglalója (soronként), legfeljebb max_* példával."""
+    limits = {"added": max_added, "removed": max_removed, "moved": max_moved}
+    counts = {"added": 0, "removed": 0, "moved": 0}
+    samples = {"added": [], "removed": [], "moved": []}
+    for kind, event, old in changes:
+        counts[kind] += 1
+        if len(samples[kind]) < limits[kind]:
+            samples[kind].append((event, old))
+
+    lines = []
+    sections = (
+        ("added", "Új előadások", lambda e, old: f"  ✚ {e.iso} – {e.title}"),
+        ("removed", "Eltűnt előadások", lambda e, old: f"  ✖ {e.iso} – {e.title}"),
+        ("moved", "Áthelyezett előadások", lambda e, old: f"  ↪ {old.iso} → {e.iso} – {e.title}"),
+    )
+    for kind, heading, fmt in sections:
+        if not counts[kind]:
+            continue
+        lines.append(f"{heading} ({counts[kind]}):")
+        lines.extend(fmt(e, old) for e, old in samples[kind])
+        if counts[kind] > limits[kind]:
+            lines.append(f"  ... és még {counts[kind] - limits[kind]} további")
+    return lines
 
 
 def compare_events(
@@ -10,11 +357,12 @@ def compare_events(
     event_count: int,
     prev_latest: date | None,
     prev_count: int | None,
-    current_events: list[list[str]],   # [[date_iso, title], ...]
-    prev_events: list[list[str]],      # [[date_iso, title], ...]
+    current_events: list[Event],
+    prev_events: list[Event],
 ) -> tuple[str, str]:
     """
     Összehasonlítja az aktuális és korábbi eredményeket.
+    Az előadáslistáknak rendezettnek kell lenniük (unique_events, state fájl).
     Visszaad: (status, detail_szöveg)
     """
     if prev_latest is None:
@@ -39,31 +387,226 @@ def compare_events(
         if status == "no_change":
             status = "count_changed"
 
-    # Új előadások keresése
-    current_set = {(e[0], e[1]) for e in current_events}
-    prev_set = {(e[0], e[1]) for e in prev_events}
-    new_events = sorted(current_set - prev_set)
-    removed_events = sorted(prev_set - current_set)
-
-    if new_events:
-        if status == "no_change":
-            status = "count_changed"
-        parts.append(f"Új előadások ({len(new_events)}):")
-        for d, title in new_events[:20]:
-            parts.append(f"  ✚ {d} – {title}")
-        if len(new_events) > 20:
-            parts.append(f"  ... és még {len(new_events) - 20} további")
-
-    if removed_events:
+    # Új, eltűnt és áthelyezett előadások
+    try:
+        changes = diff_events(current_events, prev_events)
+        diff_lines = format_diff(pair_moves(changes, movable=move_check(current_events, prev_events)))
+    except ValueError:
+        # Régi, rendezetlen state fájl
+        current_events, prev_events = sorted(set(current_events)), sorted(set(prev_events))
+        changes = diff_events(current_events, prev_events)
+        diff_lines = format_diff(pair_moves(changes, movable=move_check(current_events, prev_events)))
+    if diff_lines:
         if status == "no_change":
             status = "count_changed"
-        parts.append(f"Eltűnt előadások ({len(removed_events)}):")
-        for d, title in removed_events[:10]:
-            parts.append(f"  ✖ {d} – {title}")
-        if len(removed_events) > 10:
-            parts.append(f"  ... és még {len(removed_events) - 10} további")
+        parts.extend(diff_lines)
 
     if not parts:
         return "no_change", f"Nincs változás. Max: {latest} ({event_count} előadás)"
 
     return status, "\n".join(parts)
+
+
+def track_page_stats(page, stats: dict):
+    """
+    Számolja a főkeret navigációit ("pages") és a hálózati kéréseket
+    ("requests") a megadott stats dict-be. A run history használja.
+    """
+    stats.setdefault("pages", 0)
+    stats.setdefault("requests", 0)
+
+    def on_request(_request):
+        stats["requests"] += 1
+
+    def on_navigated(frame):
+        if frame == page.main_frame:
+            stats["pages"] += 1
+
+    page.on("request", on_request)
+    page.on("framenavigated", on_navigated)
+
+
+def profiles_dir() -> str | None:
+    return os.environ.get("SZINHAZ_BROWSER_PROFILES", "").strip() or None
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def prune_profile(path: str, max_mb: float = PROFILE_MAX_MB):
+    """
+    Ha a profil nagyobb a korlátnál, előbb a cache könyvtárakat törli
+    (a sütik és a localStorage maradnak), és ha ez sem elég, az egészet.
+    """
+    max_bytes = max_mb * 1024 * 1024
+    size = _dir_size(path)
+    if size <= max_bytes:
+        return
+    for sub in PROFILE_CACHE_DIRS:
+        shutil.rmtree(os.path.join(path, "Default", sub), ignore_errors=True)
+    pruned = _dir_size(path)
+    if pruned > max_bytes:
+        shutil.rmtree(path, ignore_errors=True)
+        pruned = 0
+    print(f"[BÖNGÉSZŐ] Profil pruning: {path} {size / 2**20:.0f} MB → {pruned / 2**20:.0f} MB")
+
+
+def drop_profile_http_cache(path: str):
+    """A profil HTTP disk cache-ének törlése (asset cache mellett holt teher a profil cache-ben)."""
+    shutil.rmtree(os.path.join(path, "Default", PROFILE_HTTP_CACHE_DIR), ignore_errors=True)
+
+
+def track_cache_hits(context, page, stats: dict):
+    """
+    A cache-ből (disk cache, memory cache, service worker) kiszolgált
+    kérések száma a stats["cached"] mezőbe, a Chromium CDP eseményeiből.
+    """
+    stats.setdefault("cached", 0)
+    try:
+        cdp = context.new_cdp_session(page)
+        cdp.send("Network.enable")
+    except Exception:
+        return
+
+    def on_served_from_cache(_params):
+        stats["cached"] += 1
+
+    def on_response(params):
+        response = params.get("response", {})
+        if response.get("fromDiskCache") or response.get("fromServiceWorker"):
+            stats["cached"] += 1
+
+    cdp.on("Network.requestServedFromCache", on_served_from_cache)
+    cdp.on("Network.responseReceived", on_response)
+
+
+# Serve módban (main.py --serve) egyetlen meleg Chromium él a processzben;
+# amíg el van indítva, a browser_session ebből nyit friss contextet
+_shared = {"playwright": None, "browser": None, "sessions": 0}
+
+
+def start_shared_browser():
+    from playwright.sync_api import sync_playwright
+    if _shared["browser"] is not None:
+        return
+    _shared["playwright"] = sync_playwright().start()
+    _shared["browser"] = _shared["playwright"].chromium.launch(headless=True)
+    _shared["sessions"] = 0
+    print("[BÖNGÉSZŐ] Meleg Chromium elindítva")
+
+
+def stop_shared_browser():
+    browser, playwright = _shared["browser"], _shared["playwright"]
+    _shared.update(browser=None, playwright=None)
+    try:
+        if browser is not None:
+            browser.close()
+    finally:
+        if playwright is not None:
+            playwright.stop()
+
+
+def ensure_shared_browser(max_sessions: int | None = None) -> bool:
+    """
+    Újraindítja a meleg böngészőt, ha összeomlott, vagy ha már
+    max_sessions contextet kiszolgált (memóriaszivárgás ellen).
+    True, ha a böngésző fut.
+    """
+    browser = _shared["browser"]
+    stale = browser is not None and (
+        not browser.is_connected()
+        or (max_sessions is not None and _shared["sessions"] >= max_sessions)
+    )
+    if stale:
+        print("[BÖNGÉSZŐ] Meleg Chromium újraindítása")
+        try:
+            stop_shared_browser()
+        except Exception:
+            _shared.update(browser=None, playwright=None)
+    if _shared["browser"] is None:
+        start_shared_browser()
+    return _shared["browser"] is not None
+
+
+@contextmanager
+def _session_page(context, stats: dict | None, diag, count_cache_hits: bool):
+    """A context felszerelése (asset cache, diagnosztika, statisztika), majd bezárása."""
+    import asset_cache
+
+    assets = asset_cache.from_env()
+    try:
+        if assets is not None:
+            assets.attach(context, stats)
+        if diag is not None:
+            diag.attach(context)
+        page = context.pages[0] if context.pages else context.new_page()
+        if stats is not None:
+            track_page_stats(page, stats)
+            # Routing mellett a fromDiskCache nem jelent semmit: a találatokat az asset cache számolja
+            if count_cache_hits and assets is None:
+                track_cache_hits(context, page, stats)
+        yield page
+    finally:
+        if diag is not None:
+            diag.detach()
+        if assets is not None:
+            assets.save()
+        context.close()
+
+
+@contextmanager
+def browser_session(stats: dict | None = None, diag=None, profile: str | None = None):
+    """
+    Headless Chromium + context + egy oldal a scraperek közös beállításaival.
+    stats: ld. track_page_stats; diag: diagnostics.Diagnostics (opcionális).
+    profile: az oldal neve; ha a SZINHAZ_BROWSER_PROFILES be van állítva,
+    tartós profillal (launch_persistent_context) indul, és a stats-ba a
+    cache-ből kiszolgált kérések száma is bekerül.
+    SZINHAZ_ASSET_CACHE esetén a statikus assetek az asset_cache-en át jönnek;
+    a profilból ilyenkor csak a sütik és a tárolók maradnak, a (routing miatt
+    kikapcsolt) HTTP disk cache törlődik.
+    Ha fut meleg böngésző (start_shared_browser), abban nyit új contextet,
+    és csak azt zárja be; a tartós profil ilyenkor nem használható. A sync
+    Playwright objektumai a létrehozó szálhoz kötöttek, így más szálból
+    (navigációs sor mellett futó scraper) saját böngésző indul.
+    """
+    if _shared["browser"] is not None and threading.current_thread() is threading.main_thread():
+        _shared["sessions"] += 1
+        context = _shared["browser"].new_context(viewport=VIEWPORT, user_agent=USER_AGENT)
+        with _session_page(context, stats, diag, count_cache_hits=False) as page:
+            yield page
+        return
+
+    from playwright.sync_api import sync_playwright
+    import asset_cache
+
+    base_dir = profiles_dir()
+    user_data_dir = os.path.join(base_dir, profile) if base_dir and profile else None
+
+    with sync_playwright() as p:
+        browser = None
+        if user_data_dir:
+            prune_profile(user_data_dir)
+            if asset_cache.cache_dir():
+                drop_profile_http_cache(user_data_dir)
+            os.makedirs(user_data_dir, exist_ok=True)
+            context = p.chromium.launch_persistent_context(
+                user_data_dir, headless=True, viewport=VIEWPORT, user_agent=USER_AGENT,
+            )
+        else:
+            browser = p.chromium.launch(headless=True)
+            context = browser.new_context(viewport=VIEWPORT, user_agent=USER_AGENT)
+        try:
+            with _session_page(context, stats, diag, count_cache_hits=bool(user_data_dir)) as page:
+                yield page
+        finally:
+            if browser is not None:
+                browser.close()
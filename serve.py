@@ -0,0 +1,221 @@
+"""
+Hosszan futó (daemon) mód saját gépre: python main.py --serve
+
+Egy meleg Chromiumot tart életben (scraper_utils.start_shared_browser), és
+belső, cron-szerű ütemezéssel futtatja a színházi ellenőrzést és a heti mozi
+összefoglalót. Minden scraper futás friss browser contextet kap, amit a
+végén bezárunk; a böngészőt csak összeomlás után vagy BROWSER_MAX_SESSIONS
+context után indítjuk újra. Így egy ellenőrzés nem fizeti meg a Python,
+Playwright és Chromium hidegindítását, és sokkal sűrűbben is futtatható.
+
+Állapot: http://127.0.0.1:<port>/status (JSON: feladatok, következő és utolsó
+futás, utolsó eredmény), /healthz. A cron kifejezések Budapest idő szerint
+értendők (perc óra nap hónap hét_napja; *, lista, tartomány, /lépés). Mint
+a szabványos cronnál: ha a nap és a hét napja is korlátozott (egyik sem
+*-gal kezdődik), elég, ha az egyik illeszkedik.
+
+Serve módban a scraperek a processzen belül futnak (a SZINHAZ_ISOLATED
+worker processzei nem tudnák használni a meleg böngészőt), és tartós
+böngészőprofil sincs; az asset cache (SZINHAZ_ASSET_CACHE) működik.
+"""
+
+import json
+import time
+import signal
+import threading
+import traceback
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from zoneinfo import ZoneInfo
+
+import scraper_utils
+
+
+TZ = ZoneInfo("Europe/Budapest")
+DEFAULT_THEATRE_CRON = "1 */3 * * *"
+DEFAULT_CINEMA_CRON = "0 11 * * 0"
+DEFAULT_STATUS_PORT = 8765
+BROWSER_MAX_SESSIONS = 200
+
+CRON_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]   # hét napja: 0 és 7 is vasárnap
+
+
+def budapest_now():
+    return datetime.now(tz=TZ)
+
+
+def parse_cron_field(field: str, lo: int, hi: int) -> set[int]:
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_str = part.split("/", 1)
+            step = int(step_str)
+        if part == "*":
+            start, end = lo, hi
+        elif "-" in part:
+            start, end = (int(x) for x in part.split("-", 1))
+        else:
+            start = int(part)
+            end = hi if step > 1 else start
+        if start < lo or end > hi or start > end or step < 1:
+            raise ValueError(f"érvénytelen cron mező: {field!r}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+def parse_cron(expr: str) -> list:
+    """
+    Mezőnként az illeszkedő értékek halmaza, hatodiknak pedig az, hogy a nap
+    és a hét napja közül elég-e az egyik: akkor, ha egyik sem *-gal kezdődik.
+    """
+    fields = expr.split()
+    if len(fields) != 5:
+        raise ValueError(f"a cron kifejezésnek 5 mezője van: {expr!r}")
+    parsed = [parse_cron_field(f, lo, hi) for f, (lo, hi) in zip(fields, CRON_RANGES)]
+    parsed[4] = {0 if d == 7 else d for d in parsed[4]}
+    parsed.append(not fields[2].startswith("*") and not fields[4].startswith("*"))
+    return parsed
+
+
+def day_matches(days: set[int], weekdays: set[int], either: bool, t: datetime) -> bool:
+    # cron hét napja: 0 = vasárnap; Python: 0 = hétfő
+    in_days = t.day in days
+    in_weekdays = (t.weekday() + 1) % 7 in weekdays
+    return in_days or in_weekdays if either else in_days and in_weekdays
+
+
+def next_run(cron: list, after: datetime) -> datetime:
+    """Az after utáni első időpont (percre kerekítve), ami illeszkedik."""
+    minutes, hours, days, months, weekdays, either = cron
+    t = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    limit = t + timedelta(days=366)
+    while t < limit:
+        if t.month not in months or not day_matches(days, weekdays, either, t):
+            t = (t + timedelta(days=1)).replace(hour=0, minute=0)
+            continue
+        if t.hour not in hours:
+            t = (t + timedelta(hours=1)).replace(minute=0)
+            continue
+        if t.minute in minutes:
+            return t
+        t += timedelta(minutes=1)
+    raise ValueError("a cron kifejezés egy éven belül nem illeszkedik")
+
+
+class Job:
+    def __init__(self, name: str, cron_expr: str, func):
+        self.name = name
+        self.cron_expr = cron_expr
+        self.cron = parse_cron(cron_expr)
+        self.func = func
+        self.next_run = next_run(self.cron, budapest_now())
+        self.last_start = None
+        self.last_duration = None
+        self.last_result = None
+        self.runs = 0
+        self.failures = 0
+
+    def status(self) -> dict:
+        return {
+            "cron": self.cron_expr,
+            "next_run": self.next_run.isoformat(),
+            "last_start": self.last_start.isoformat() if self.last_start else None,
+            "last_duration_s": self.last_duration,
+            "last_result": self.last_result,
+            "runs": self.runs,
+            "failures": self.failures,
+        }
+
+
+class Daemon:
+    def __init__(self, jobs: list[Job], port: int = DEFAULT_STATUS_PORT):
+        self.jobs = jobs
+        self.port = port
+        self.started = budapest_now()
+        self.current = None
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+
+    def status(self) -> dict:
+        with self.lock:
+            return {
+                "started": self.started.isoformat(),
+                "now": budapest_now().isoformat(),
+                "running": self.current,
+                "browser_sessions": scraper_utils._shared["sessions"],
+                "jobs": {job.name: job.status() for job in self.jobs},
+            }
+
+    def serve_status(self) -> ThreadingHTTPServer:
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                content_type = "text/plain; charset=utf-8"
+                if self.path == "/healthz":
+                    body, code = b"ok\n", 200
+                elif self.path in ("/", "/status"):
+                    body = json.dumps(daemon.status(), ensure_ascii=False, indent=2).encode("utf-8")
+                    code, content_type = 200, "application/json; charset=utf-8"
+                else:
+                    body, code = b"not found\n", 404
+                self.send_response(code)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+        threading.Thread(target=server.serve_forever, name="status-http", daemon=True).start()
+        print(f"[SERVE] Állapot: http://127.0.0.1:{self.port}/status")
+        return server
+
+    def run_job(self, job: Job):
+        with self.lock:
+            self.current = job.name
+            job.last_start = budapest_now()
+        started = time.monotonic()
+        try:
+            scraper_utils.ensure_shared_browser(BROWSER_MAX_SESSIONS)
+            result = job.func()
+            outcome = result if isinstance(result, str) else "ok"
+        except Exception as e:
+            traceback.print_exc()
+            outcome = f"hiba: {e}"
+            with self.lock:
+                job.failures += 1
+        with self.lock:
+            job.runs += 1
+            job.last_duration = round(time.monotonic() - started, 1)
+            job.last_result = outcome
+            job.next_run = next_run(job.cron, budapest_now())
+            self.current = None
+        print(f"[SERVE] {job.name}: {outcome} ({job.last_duration:.0f} s), következő: "
+              f"{job.next_run.strftime('%Y.%m.%d. %H:%M')}")
+
+    def loop(self):
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: self.stop.set())
+        server = self.serve_status()
+        scraper_utils.start_shared_browser()
+        for job in self.jobs:
+            print(f"[SERVE] {job.name}: '{job.cron_expr}', első futás {job.next_run.strftime('%Y.%m.%d. %H:%M')}")
+        try:
+            while not self.stop.is_set():
+                now = budapest_now()
+                due = [job for job in self.jobs if job.next_run <= now]
+                for job in sorted(due, key=lambda j: j.next_run):
+                    if self.stop.is_set():
+                        break
+                    self.run_job(job)
+                if not due:
+                    wait = min(job.next_run for job in self.jobs) - budapest_now()
+                    self.stop.wait(timeout=max(1.0, min(wait.total_seconds(), 60.0)))
+        finally:
+            print("[SERVE] Leállítás")
+            server.shutdown()
+            scraper_utils.stop_shared_browser()
@@ -0,0 +1,125 @@
+import os
+
+import asset_cache
+from asset_cache import AssetCache
+
+
+class FakeRequest:
+    def __init__(self, url, resource_type="script", method="GET"):
+        self.url = url
+        self.resource_type = resource_type
+        self.method = method
+        self.headers = {"user-agent": "test"}
+
+
+class FakeResponse:
+    def __init__(self, status=200, headers=None, body=b""):
+        self.status = status
+        self.headers = headers or {}
+        self._body = body
+
+    def body(self):
+        return self._body
+
+
+class FakeRoute:
+    """A route.fetch() a server(headers) válaszát adja; a fulfill-t rögzíti."""
+
+    def __init__(self, server):
+        self.server = server
+        self.fetched = []
+        self.fulfilled = None
+        self.fell_back = False
+
+    def fetch(self, headers):
+        self.fetched.append(headers)
+        return self.server(headers)
+
+    def fulfill(self, status=None, headers=None, body=None, response=None):
+        self.fulfilled = {"status": status or response.status, "body": body}
+
+    def fallback(self):
+        self.fell_back = True
+
+
+def request(cache, url, server, **kwargs):
+    route = FakeRoute(server)
+    cache._handle(route, FakeRequest(url, **kwargs))
+    return route
+
+
+def serve(body, **headers):
+    return lambda request_headers: FakeResponse(200, headers, body)
+
+
+def blobs(cache):
+    return sorted(os.listdir(cache.blob_dir))
+
+
+def test_immutable_and_versioned_assets_skip_network(tmp_path):
+    cache = AssetCache(str(tmp_path))
+    stats = {}
+    cache.attach(type("Context", (), {"route": lambda self, pattern, handler: None})(), stats)
+
+    for url, headers in (("https://mozi.hu/app.js", {"cache-control": "public, max-age=31536000, immutable"}),
+                         ("https://mozi.hu/main.3f9a2c1b7d.js", {})):
+        assert request(cache, url, serve(b"bundle", **headers)).fetched != []
+        route = request(cache, url, serve(b"changed"))
+        assert route.fetched == []
+        assert route.fulfilled == {"status": 200, "body": b"bundle"}
+
+    assert cache.counts["hits"] == 2 and cache.counts["misses"] == 2
+    assert stats["cached"] == 2 and stats["asset_hits"] == 2
+    assert len(blobs(cache)) == 1           # azonos tartalom, egy blob
+
+
+def test_stale_entry_is_revalidated_from_blob(tmp_path):
+    cache = AssetCache(str(tmp_path))
+    url = "https://szinhaz.hu/style.css"
+    request(cache, url, serve(b"body{}", etag='"v1"', **{"cache-control": "max-age=0"}),
+            resource_type="stylesheet")
+
+    not_modified = lambda headers: FakeResponse(304, {"cache-control": "max-age=600"})
+    route = request(cache, url, not_modified, resource_type="stylesheet")
+    assert route.fetched[0]["if-none-match"] == '"v1"'
+    assert route.fulfilled == {"status": 200, "body": b"body{}"}
+    assert cache.counts["revalidated"] == 1
+
+    # A 304 frissítette a lejáratot: a következő már hálózat nélkül
+    assert request(cache, url, not_modified, resource_type="stylesheet").fetched == []
+
+
+def test_no_store_and_errors_are_not_cached(tmp_path):
+    cache = AssetCache(str(tmp_path))
+    request(cache, "https://a.hu/x.js", serve(b"secret", **{"cache-control": "no-store"}))
+    request(cache, "https://a.hu/y.js", lambda headers: FakeResponse(404, {}, b"nincs"))
+    assert cache.index == {} and blobs(cache) == []
+
+    # Nem statikus kérés a cache-en kívül marad
+    route = request(cache, "https://a.hu/api.js", serve(b"{}"), resource_type="xhr")
+    assert route.fell_back and route.fetched == []
+
+
+def test_save_evicts_lru_and_collects_orphan_blobs(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(asset_cache.time, "time", lambda: now[0])
+    cache = AssetCache(str(tmp_path), max_mb=2.5 / 1024)   # 2.5 KB
+    for name in ("old", "mid", "new"):
+        now[0] += 10
+        request(cache, f"https://a.hu/{name}.9f8e7d6c5b.js", serve(name.encode() * 341))
+    now[0] += 10
+    request(cache, "https://a.hu/old.9f8e7d6c5b.js", serve(b""))   # az "old" használata: nem ő a legrégebbi
+    assert len(blobs(cache)) == 3
+
+    cache.save()
+    assert sorted(cache.index) == ["https://a.hu/new.9f8e7d6c5b.js", "https://a.hu/old.9f8e7d6c5b.js"]
+    assert blobs(cache) == sorted(e["blob"] for e in cache.index.values())
+
+    # Egy másik worker ugyanabba a gyökérbe: a mentés összefésül, és az orphan blob törlése nem hiba
+    other = AssetCache(str(tmp_path), max_mb=1)
+    request(other, "https://b.hu/font.woff2", serve(b"font", **{"cache-control": "max-age=60"}),
+            resource_type="font")
+    other.save()
+    cache.save()        # nincs változás: nem ír
+    assert "https://b.hu/font.woff2" in AssetCache(str(tmp_path)).index
+    assert len(AssetCache(str(tmp_path)).index) == 3
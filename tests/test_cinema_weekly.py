@@ -0,0 +1,107 @@
+from datetime import date, timedelta
+
+import pytest
+
+pytest.importorskip("playwright")
+import cinema_weekly
+
+
+class FakeResponse:
+    headers = {"content-type": "application/json"}
+
+    def __init__(self, body: bytes):
+        self._body = body
+
+    def body(self) -> bytes:
+        return self._body
+
+
+class FakeWeekButton:
+    def __init__(self, page, week: int):
+        self.page, self.week = page, week
+
+    def inner_text(self, timeout=None) -> str:
+        return f"{self.week:02d}"
+
+    def click(self):
+        self.page.emit(f"week {self.week}")
+
+
+class FakeLocator:
+    def __init__(self, items):
+        self.items = items
+
+    def all(self):
+        return self.items
+
+
+class FakePage:
+    """Az artmozi widget: minden kattintás / betöltés JSON választ küld."""
+
+    def __init__(self, weeks):
+        self.handlers = []
+        self.weeks = weeks
+
+    def on(self, event, handler):
+        self.handlers.append(handler)
+
+    def emit(self, body: str):
+        for handler in self.handlers:
+            handler(FakeResponse(body.encode()))
+
+    def locator(self, selector):
+        return FakeLocator([FakeWeekButton(self, w) for w in self.weeks])
+
+    def wait_for_timeout(self, ms):
+        pass
+
+    def evaluate(self, script):
+        pass
+
+
+@pytest.fixture
+def fake_site(monkeypatch):
+    scraped = []
+
+    def goto(page, url, **kwargs):
+        page.emit("homepage")
+
+    def click_day_and_scrape(page, d, name):
+        page.emit(f"day {d}")
+        scraped.append(d)
+        return []
+
+    monkeypatch.setattr(cinema_weekly, "goto", goto)
+    monkeypatch.setattr(cinema_weekly, "click_day_and_scrape", click_day_and_scrape)
+    return scraped
+
+
+def run(days, cache, today):
+    weeks = [week for week, _ in cinema_weekly.days_by_cinema_week(days)]
+    page = FakePage(weeks)
+    responses = cinema_weekly.record_json_responses(page)
+    stats = {"reused": 0, "scraped": 0}
+    cinema_weekly.scrape_cinema(page, {"name": "Művész", "url": "https://x"}, days,
+                                cache, today, responses, stats)
+    return stats
+
+
+def test_week_fingerprint_only_covers_the_week_click(fake_site):
+    today = date(2026, 10, 22)       # csütörtök: két teljes mozis hét
+    days = [today + timedelta(days=i) for i in range(14)]
+    cache = {"days": {}, "genres": {}}
+
+    first = run(days, cache, today)
+    assert first == {"reused": 0, "scraped": 14}
+
+    fingerprints = {}
+    for week, dates in cinema_weekly.days_by_cinema_week(days):
+        expected = cinema_weekly.week_fingerprint([FakeResponse(f"week {week}".encode())])
+        fingerprints.update({d: expected for d in dates})
+    assert all(cache["days"]["Művész"][d.isoformat()]["week_fp"] == fp for d, fp in fingerprints.items())
+
+    # Változatlan heti adat: a második futás minden napot a cache-ből vesz
+    fake_site.clear()
+    second = run(days, cache, today)
+    assert second == {"reused": 14, "scraped": 0}
+    assert fake_site == []
@@ -0,0 +1,105 @@
+import json
+import os
+from datetime import date
+
+import pytest
+
+import event_index
+
+KATONA = [["2026-10-20", "Pekingi ősz"], ["2026-11-02", "Ivanov"]]
+VIG = [["2026-10-20", "Hamlet"], ["2026-10-25", "A Pekingi kacsa"]]
+
+
+def write_state(name, events, mtime_ns=None):
+    with open(name, "w", encoding="utf-8") as f:
+        json.dump({"events": events}, f, ensure_ascii=False)
+    if mtime_ns is not None:
+        os.utime(name, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def reads(monkeypatch, tmp_path):
+    """A state fájlokat tmp_path-ban írjuk; a visszaadott lista a load_state hívásokat gyűjti."""
+    monkeypatch.chdir(tmp_path)
+    calls = []
+    real_load_state = event_index.load_state
+
+    def load_state(path):
+        calls.append(path)
+        return real_load_state(path)
+
+    monkeypatch.setattr(event_index, "load_state", load_state)
+    write_state("state.json", KATONA, mtime_ns=1_000_000_000)
+    write_state("vig_state.json", VIG, mtime_ns=1_000_000_000)
+    return calls
+
+
+def rows_of(index, key):
+    return [row for row in index["rows"] if row[1] == key]
+
+
+def test_unchanged_state_is_not_reread(reads):
+    index, rebuilt = event_index.update_index()
+    assert sorted(rebuilt) == ["katona", "vig"]
+    assert sorted(reads) == ["state.json", "vig_state.json"]
+    assert os.path.exists(event_index.INDEX_FILE)
+
+    reads.clear()
+    again, rebuilt = event_index.update_index()
+    assert (rebuilt, reads) == ([], [])
+    assert again == index
+
+
+def test_touched_but_equal_state_only_refreshes_signature(reads):
+    event_index.update_index()
+    write_state("state.json", list(reversed(KATONA)), mtime_ns=2_000_000_000)
+    reads.clear()
+    index, rebuilt = event_index.update_index()
+    assert (rebuilt, reads) == ([], ["state.json"])
+    assert index["sources"]["katona"]["signature"][0] == 2_000_000_000
+
+    reads.clear()
+    assert event_index.update_index()[1] == [] and reads == []
+
+
+def test_changed_state_replaces_only_its_rows(reads):
+    before, _ = event_index.update_index()
+    write_state("state.json", KATONA + [["2026-12-01", "Ivanov"]], mtime_ns=2_000_000_000)
+    reads.clear()
+    index, rebuilt = event_index.update_index()
+    assert (rebuilt, reads) == (["katona"], ["state.json"])
+    assert rows_of(index, "vig") == rows_of(before, "vig")
+    assert rows_of(index, "katona")[-1] == ["2026-12-01", "katona", "Ivanov", "ivanov"]
+    assert index["rows"] == sorted(index["rows"])
+
+    os.remove("state.json")
+    index, rebuilt = event_index.update_index()
+    assert rebuilt == ["katona"] and rows_of(index, "katona") == []
+    assert "katona" not in index["sources"]
+
+
+def test_queries(reads):
+    index, _ = event_index.update_index()
+    assert [r[2] for r in event_index.between(index, date(2026, 10, 20), date(2026, 10, 25))] == [
+        "Pekingi ősz", "Hamlet", "A Pekingi kacsa"]
+    assert event_index.between(index, date(2026, 10, 21), date(2026, 10, 24)) == []
+    assert [r[2] for r in event_index.between(index, date(2026, 10, 1), date(2026, 12, 31), keys=["vig"])] == [
+        "Hamlet", "A Pekingi kacsa"]
+
+    # Ékezet- és kisbetű-független, minden szónak egyeznie kell
+    assert [r[1] for r in event_index.search(index, "PEKINGI")] == ["katona", "vig"]
+    assert [r[2] for r in event_index.search(index, "pekingi osz")] == ["Pekingi ősz"]
+    assert event_index.search(index, "pekingi", keys=["vig"])[0][2] == "A Pekingi kacsa"
+
+    assert event_index.next_performance(index, "pekingi", date(2026, 10, 21))[2] == "A Pekingi kacsa"
+    assert event_index.next_performance(index, "pekingi", date(2026, 10, 20))[2] == "Pekingi ősz"
+    assert event_index.next_performance(index, "hamlet", date(2026, 10, 21)) is None
+
+
+def test_other_index_version_is_rebuilt(reads):
+    event_index.update_index()
+    with open(event_index.INDEX_FILE, "w", encoding="utf-8") as f:
+        json.dump({"version": event_index.INDEX_VERSION + 1, "sources": {}, "rows": []}, f)
+    reads.clear()
+    _, rebuilt = event_index.update_index()
+    assert sorted(rebuilt) == ["katona", "vig"]
@@ -0,0 +1,86 @@
+import os
+from datetime import date, datetime, timezone
+
+import pytest
+
+import history_archive as ha
+
+T1 = datetime(2026, 10, 1, 1, 1, tzinfo=timezone.utc)
+T2 = datetime(2026, 10, 2, 1, 1, tzinfo=timezone.utc)
+T3 = datetime(2026, 10, 3, 1, 1, tzinfo=timezone.utc)
+
+KATONA = [["2026-10-20", "Pekingi ősz"], ["2026-10-21", "Pekingi ősz"], ["2026-11-02", "Ivanov"]]
+RADNOTI = [["2026-10-25", "Három nővér"]]
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "history_archive.bin")
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 300, 2 ** 21, 2 ** 40])
+def test_varint_round_trip(value):
+    out = bytearray()
+    ha.encode_varint(value, out)
+    assert ha.decode_varint(bytes(out) + b"x", 0) == (value, len(out))
+    assert len(out) == max(1, -(-value.bit_length() // 7))
+
+
+def test_items_round_trip_as_sorted_deltas():
+    items = [(date(2026, 11, 2).toordinal(), 5), (date(2026, 10, 20).toordinal(), 1),
+             (date(2026, 10, 20).toordinal(), 0)]
+    out = bytearray()
+    ha._encode_items(items, out)
+    decoded, pos = ha._decode_items(bytes(out), 0)
+    assert decoded == sorted(items) and pos == len(out)
+
+
+def test_snapshot_round_trip(path):
+    assert ha.append_snapshots({"katona": KATONA, "radnoti": RADNOTI}, T1, path) == ["katona", "radnoti"]
+    changed = KATONA[1:] + [["2026-11-03", "Ivanov"]]
+    assert ha.append_snapshots({"katona": changed, "radnoti": RADNOTI}, T2, path) == ["katona"]
+
+    assert ha.snapshot_at(T1, path) == {"katona": sorted(KATONA), "radnoti": RADNOTI}
+    assert ha.snapshot_at(T2, path) == {"katona": sorted(changed), "radnoti": RADNOTI}
+
+    seen = ha.first_seen("ivanov", path)
+    assert [(m["theatre"], m["date"], m["first_seen"]) for m in seen] == [
+        ("katona", "2026-11-02", int(T1.timestamp()))]
+
+
+def test_unchanged_snapshot_writes_nothing(path):
+    ha.append_snapshots({"katona": KATONA}, T1, path)
+    size = os.path.getsize(path)
+    # A sorrend és az ismétlődés nem változás
+    assert ha.append_snapshots({"katona": list(reversed(KATONA)) + KATONA[:1]}, T2, path) == []
+    assert os.path.getsize(path) == size
+
+
+def test_torn_chunk_is_truncated_before_append(path):
+    ha.append_snapshots({"katona": KATONA}, T1, path)
+    good = os.path.getsize(path)
+    ha.append_snapshots({"katona": KATONA + [["2026-12-01", "Ivanov"]]}, T2, path)
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 2)      # megszakadt írás az utolsó R chunkban
+
+    # Olvasáskor a csonka chunk kimarad
+    assert ha.snapshot_at(T3, path) == {"katona": sorted(KATONA)}
+    assert ha.append_snapshots({"katona": RADNOTI}, T3, path) == ["katona"]
+    assert ha.complete_length(open(path, "rb").read()) == os.path.getsize(path) > good
+    assert ha.snapshot_at(T3, path) == {"katona": RADNOTI}
+    assert ha.snapshot_at(T2, path) == {"katona": sorted(KATONA)}
+
+
+def test_torn_header_is_rewritten(path):
+    with open(path, "wb") as f:
+        f.write(ha.MAGIC[:3])
+    assert list(ha.read_archive(path)) == []
+    assert ha.append_snapshots({"katona": KATONA}, T1, path) == ["katona"]
+    assert ha.snapshot_at(T1, path) == {"katona": sorted(KATONA)}
+
+
+def test_unknown_format(path):
+    with open(path, "wb") as f:
+        f.write(b"not an archive")
+    with pytest.raises(ValueError):
+        list(ha.read_archive(path))
@@ -0,0 +1,35 @@
+from datetime import date
+
+import pytest
+
+pytest.importorskip("bs4")
+import html_extract
+
+LINK = html_extract.compile_selector('a[href*="/musor/" i]')
+
+
+def test_nested_tags_and_entities_in_link_text():
+    html = ('<a href="/musor/foo?x=1"><span>Foo &amp;\n  Bar</span></a>'
+            "<a href='/musor/baz'>Baz <strong>2</strong></a>")
+    assert html_extract.select_links(html, LINK) == [("/musor/foo?x=1", "Foo & Bar"),
+                                                     ("/musor/baz", "Baz 2")]
+
+
+def test_image_only_link_has_no_text():
+    html = '<a href="/musor/foo"><img src="poster.jpg"></a><a href="/musor/bar"> </a>'
+    assert html_extract.select_links(html, LINK) == [("/musor/foo", None), ("/musor/bar", "")]
+
+
+def test_scrapers_keep_nested_titles():
+    pytest.importorskip("playwright")
+    import pbest_last_date
+    import vig_last_date
+
+    pbest = ('<a href="https://pbest.hu/musor/foo-bar?event_rdate=20260314190000">'
+             "<span>Foo &amp; Bar</span></a>")
+    assert [(e.date, e.title) for e in pbest_last_date.extract_events_soup(pbest)] == [
+        (date(2026, 3, 14), "Foo & Bar")]
+
+    vig = '<a href="/hu/produkciok/foo_bar/20260314-1900"><span>Foo &amp; Bar</span></a>'
+    assert [(e.date, e.title) for e in vig_last_date.extract_events_soup(vig)] == [
+        (date(2026, 3, 14), "Foo & Bar")]
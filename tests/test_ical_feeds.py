@@ -0,0 +1,74 @@
+import os
+from datetime import datetime, timezone
+
+import ical_feeds
+
+T1 = datetime(2026, 10, 1, 1, 1, tzinfo=timezone.utc)
+T2 = datetime(2026, 10, 2, 1, 1, tzinfo=timezone.utc)
+T3 = datetime(2026, 10, 3, 1, 1, tzinfo=timezone.utc)
+
+
+def make_index(*events):
+    rows = sorted([d, key, t, t.lower()] for d, key, t in events)
+    return {"version": 1, "sources": {"katona": {}, "vig": {}}, "rows": rows}
+
+
+INDEX = make_index(("2026-10-20", "katona", "Pekingi ősz"), ("2026-11-02", "katona", "Ivanov"),
+                   ("2026-10-25", "vig", "Hamlet"))
+
+
+def read_feed(output_dir, name):
+    with open(os.path.join(output_dir, f"{name}.ics"), "rb") as f:
+        return f.read()
+
+
+def vevents(feed: bytes) -> dict:
+    """{SUMMARY: {mező: érték}} a kibontott (unfolded) sorokból."""
+    text = feed.decode("utf-8").replace("\r\n ", "")
+    events = {}
+    for block in text.split("BEGIN:VEVENT\r\n")[1:]:
+        fields = dict(line.split(":", 1) for line in block.split("\r\n") if ":" in line)
+        events[fields["SUMMARY"]] = fields
+    return events
+
+
+def test_unchanged_index_keeps_feeds_byte_identical(tmp_path):
+    out = str(tmp_path)
+    first = ical_feeds.generate(INDEX, out, now=T1)
+    assert {"katona.ics", "vig.ics", "all.ics"} <= set(first)
+    before = {name: read_feed(out, name) for name in ("katona", "vig", "all")}
+
+    assert ical_feeds.generate(INDEX, out, now=T2) == []
+    assert {name: read_feed(out, name) for name in ("katona", "vig", "all")} == before
+
+    event = vevents(before["katona"])["Ivanov (Katona)"]
+    assert event["SEQUENCE"] == "0"
+    assert event["LAST-MODIFIED"] == event["DTSTAMP"] == "20261001T010100Z"
+    assert event["UID"] == ical_feeds.event_uid("katona", "2026-11-02", "Ivanov")
+
+
+def test_removed_event_bumps_sequence(tmp_path):
+    out = str(tmp_path)
+    ical_feeds.generate(INDEX, out, now=T1)
+    vig_before = read_feed(out, "vig")
+
+    without_ivanov = make_index(("2026-10-20", "katona", "Pekingi ősz"), ("2026-10-25", "vig", "Hamlet"))
+    assert ical_feeds.generate(without_ivanov, out, now=T2) == ["katona.ics", "all.ics"]
+    assert read_feed(out, "vig") == vig_before
+    events = vevents(read_feed(out, "katona"))
+    assert (events["Ivanov (Katona)"]["STATUS"], events["Ivanov (Katona)"]["SEQUENCE"]) == ("CANCELLED", "1")
+    assert events["Ivanov (Katona)"]["LAST-MODIFIED"] == "20261002T010100Z"
+    assert events["Pekingi ősz (Katona)"]["SEQUENCE"] == "0"
+    assert events["Pekingi ősz (Katona)"]["LAST-MODIFIED"] == "20261001T010100Z"
+
+    # Visszakerül: újra CONFIRMED, ugyanazzal a UID-dal, SEQUENCE + 1
+    ical_feeds.generate(INDEX, out, now=T3)
+    restored = vevents(read_feed(out, "katona"))["Ivanov (Katona)"]
+    assert (restored["STATUS"], restored["SEQUENCE"]) == ("CONFIRMED", "2")
+    assert restored["UID"] == events["Ivanov (Katona)"]["UID"]
+
+
+def test_feeds_use_crlf(tmp_path):
+    ical_feeds.generate(INDEX, str(tmp_path), now=T1)
+    feed = read_feed(str(tmp_path), "all")
+    assert feed.count(b"\r\n") == feed.count(b"\n")
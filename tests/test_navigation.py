@@ -0,0 +1,73 @@
+import urllib.error
+
+import pytest
+
+pytest.importorskip("playwright")
+import navigation
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch, tmp_path):
+    monkeypatch.setattr(navigation, "CIRCUIT_FILE", str(tmp_path / "circuit_state.json"))
+    monkeypatch.setattr(navigation, "_preflight_ok", set())
+    monkeypatch.setattr(navigation, "_healthy", set())
+    monkeypatch.setattr(navigation.time, "sleep", lambda seconds: None)
+
+
+def fake_urlopen(monkeypatch, outcomes):
+    """Sorban: None = válasz, kivétel = dobjuk."""
+    calls = []
+
+    class Response:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    def urlopen(request, timeout):
+        calls.append(request.get_method())
+        outcome = outcomes[len(calls) - 1]
+        if outcome is not None:
+            raise outcome
+        return Response()
+
+    monkeypatch.setattr(navigation.urllib.request, "urlopen", urlopen)
+    return calls
+
+
+def http_error(code):
+    return urllib.error.HTTPError("https://example.hu/", code, "", {}, None)
+
+
+def test_preflight_retries_before_opening_breaker(monkeypatch):
+    calls = fake_urlopen(monkeypatch, [urllib.error.URLError("timeout"), None])
+    navigation.preflight("https://example.hu/musor")
+    assert calls == ["HEAD", "HEAD"]
+    assert navigation._load_circuits() == {}
+
+
+def test_preflight_fails_after_retries(monkeypatch):
+    error = urllib.error.URLError("dns")
+    calls = fake_urlopen(monkeypatch, [error] * (navigation.RETRIES + 1))
+    with pytest.raises(navigation.SiteDownError):
+        navigation.preflight("https://example.hu/musor")
+    assert len(calls) == navigation.RETRIES + 1
+    assert navigation._load_circuits()["example.hu"]["failures"] == 1
+
+
+def test_preflight_5xx_is_inconclusive(monkeypatch):
+    calls = fake_urlopen(monkeypatch, [http_error(503)])
+    navigation.preflight("https://example.hu/musor")
+    assert calls == ["HEAD"]
+    assert navigation._load_circuits() == {}
+
+
+def test_cooldown_skips_whole_runs(monkeypatch):
+    day = 24 * 60 * 60
+    monkeypatch.setattr(navigation, "RUN_INTERVAL_SECONDS", day)
+    # Első hiba: a következő napi futás már újra próbálkozik
+    assert navigation._cooldown(1) < day
+    # Egymást követő hibák: 1, 2, 4, 4 kihagyott futás, a cron késésére ráhagyással
+    assert [navigation._cooldown(n) // day for n in (2, 3, 4, 5)] == [1, 2, 4, 4]
+    assert navigation._cooldown(2) > 1.25 * day
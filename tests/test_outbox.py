@@ -0,0 +1,114 @@
+import os
+import json
+import smtplib
+
+import pytest
+
+import outbox
+
+
+class FakeSMTP:
+    """smtplib.SMTP_SSL helyett: a failures első send_message hibát dob."""
+    sent = []
+    failures = 0
+    connections = 0
+
+    def __init__(self, host, port, context=None, timeout=None):
+        FakeSMTP.connections += 1
+
+    def login(self, user, password):
+        pass
+
+    def noop(self):
+        return (250, b"OK")
+
+    def send_message(self, msg):
+        if FakeSMTP.failures:
+            FakeSMTP.failures -= 1
+            raise smtplib.SMTPServerDisconnected("kapcsolat megszakadt")
+        FakeSMTP.sent.append(msg["Subject"])
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def spool(monkeypatch, tmp_path):
+    monkeypatch.setenv("SMTP_USER", "bot@example.hu")
+    monkeypatch.setenv("SMTP_PASS", "secret")
+    monkeypatch.setenv("TO_EMAILS", "a@example.hu; b@example.hu")
+    monkeypatch.setattr(outbox, "OUTBOX_DIR", str(tmp_path / "outbox"))
+    monkeypatch.setattr(outbox, "BACKOFF_BASE_SECONDS", 0.01)
+    monkeypatch.setattr(outbox, "DRAIN_POLL_SECONDS", 0.05)
+    monkeypatch.setattr(outbox.smtplib, "SMTP_SSL", FakeSMTP)
+    FakeSMTP.sent, FakeSMTP.failures, FakeSMTP.connections = [], 0, 0
+    yield
+    outbox._stop.set()
+    outbox._wake.set()
+    if outbox._thread is not None:
+        outbox._thread.join(timeout=5)
+    outbox._thread = None
+    outbox._close()
+
+
+def test_without_smtp_nothing_is_spooled(monkeypatch, capsys):
+    monkeypatch.delenv("SMTP_PASS")
+    assert outbox.enqueue("Tárgy", "Szöveg") is None
+    assert outbox.pending() == []
+    assert "Tárgy" in capsys.readouterr().out
+
+
+def test_spool_lifecycle():
+    path = outbox.enqueue("Új előadás", "Katona: 2026-12-01")
+    with open(path, encoding="utf-8") as f:
+        message = json.load(f)
+    assert (message["subject"], message["attempts"], message["last_error"]) == ("Új előadás", 0, None)
+    assert "TO_EMAILS" not in json.dumps(message) and "a@example.hu" not in json.dumps(message)
+
+    outbox.enqueue("Második", "...")
+    assert outbox.drain(timeout=5) == 0
+    assert FakeSMTP.sent == ["Új előadás", "Második"]
+    assert FakeSMTP.connections == 1        # egy kapcsolat az összes üzenetre
+    assert outbox.pending() == []
+
+
+def test_failed_send_is_retried_with_backoff():
+    FakeSMTP.failures = 2
+    outbox.start()
+    outbox.enqueue("Újrapróba", "...")
+    assert outbox.drain(timeout=5) == 0
+    assert FakeSMTP.sent == ["Újrapróba"]
+    assert FakeSMTP.connections == 3        # hiba után új kapcsolat
+
+
+def test_backoff_is_recorded_in_spool(monkeypatch):
+    FakeSMTP.failures = 1
+    path = outbox.enqueue("Hibás", "...")
+    assert outbox._deliver(path) is False
+    with open(path, encoding="utf-8") as f:
+        message = json.load(f)
+    assert message["attempts"] == 1
+    assert "SMTPServerDisconnected" in message["last_error"]
+    assert outbox._due(path) > 0
+
+
+def test_undelivered_message_stays_for_next_run(monkeypatch):
+    monkeypatch.setattr(outbox, "BACKOFF_BASE_SECONDS", 60)
+    FakeSMTP.failures = 100
+    outbox.enqueue("Marad", "...")
+    assert outbox.drain(timeout=0.3) == 1
+    assert not outbox._thread.is_alive()
+    assert FakeSMTP.sent == []
+
+
+def test_drain_sends_message_spooled_after_idle():
+    os.makedirs(outbox.OUTBOX_DIR)
+    outbox.start()
+    assert outbox._idle.wait(timeout=5)
+    # enqueue az _idle törlése előtt: a szál már üresnek jelezte a spoolt
+    outbox._write(f"{outbox.OUTBOX_DIR}/20261018T010101000000_late.json", {
+        "subject": "Késői", "body": "...", "created": "2026-10-18T01:01:01+02:00",
+        "attempts": 0, "next_attempt": 0, "last_error": None,
+    })
+    assert outbox.drain(timeout=5) == 0
+    assert FakeSMTP.sent == ["Késői"]
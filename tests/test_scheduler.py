@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+import scheduler
+
+NOW = datetime(2026, 10, 18, 1, 1)
+
+
+def record(days_ago, status="unchanged", mode=None, key="katona"):
+    r = {"t": (NOW - timedelta(days=days_ago)).isoformat(), "k": key, "s": status}
+    if mode:
+        r["m"] = mode
+    return r
+
+
+def quiet_history(last_full_days_ago):
+    """30 nap változás nélkül; az utolsó teljes scrape óta csak próbák futottak."""
+    return [record(ago, mode="probe" if ago < last_full_days_ago else None)
+            for ago in range(30, 0, -1)]
+
+
+def test_quiet_theatre_is_probed():
+    decision = scheduler.decide(quiet_history(1), "katona", NOW, max_staleness_days=3)
+    assert decision["action"] == "probe"
+
+
+def test_probe_only_runs_do_not_reset_staleness():
+    decision = scheduler.decide(quiet_history(3), "katona", NOW, max_staleness_days=3)
+    assert decision["action"] == "full"
+    assert "3 napja nem volt teljes scrape" in decision["reason"]
+
+
+def test_only_probes_means_full():
+    history = [record(ago, mode="probe") for ago in range(30, 0, -1)]
+    assert scheduler.decide(history, "katona", NOW)["action"] == "full"
+
+
+def test_failed_last_run_means_full():
+    history = quiet_history(1) + [record(0, status="site_down")]
+    assert scheduler.decide(history, "katona", NOW)["action"] == "full"
+
+
+def test_theatre_without_probe_is_skipped():
+    history = [record(ago, key="orkeny") for ago in range(30, 0, -1)]
+    assert scheduler.decide(history, "orkeny", NOW, max_staleness_days=3)["action"] == "skip"
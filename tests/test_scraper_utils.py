@@ -0,0 +1,49 @@
+from datetime import date, timedelta
+
+from scraper_utils import Event, diff_events, move_check, pair_moves, write_if_changed
+
+
+def changes(current, previous):
+    current, previous = sorted(current), sorted(previous)
+    return list(pair_moves(diff_events(current, previous), movable=move_check(current, previous)))
+
+
+def daily(title, first, days):
+    return [Event(first + timedelta(days=i), title) for i in range(days)]
+
+
+def test_sliding_window_of_a_daily_show_is_not_a_move():
+    previous = daily("Napi darab", date(2026, 3, 1), 7)    # 03-01..07
+    current = daily("Napi darab", date(2026, 3, 2), 7)     # 03-02..08
+    assert changes(current, previous) == [
+        ("removed", Event(date(2026, 3, 1), "Napi darab"), None),
+        ("added", Event(date(2026, 3, 8), "Napi darab"), None),
+    ]
+
+
+def test_single_performance_moved():
+    previous = [Event(date(2026, 3, 1), "Egyszeri")]
+    current = [Event(date(2026, 3, 4), "Egyszeri")]
+    assert changes(current, previous) == [("moved", current[0], previous[0])]
+
+
+def test_one_of_several_performances_moved():
+    kept = Event(date(2026, 3, 1), "Repertoár")
+    previous = [kept, Event(date(2026, 3, 10), "Repertoár")]
+    current = [kept, Event(date(2026, 3, 12), "Repertoár")]
+    assert changes(current, previous) == [("moved", current[1], previous[1])]
+
+
+def test_extra_date_keeps_added_and_removed_separate():
+    previous = [Event(date(2026, 3, 1), "Bővült")]
+    current = [Event(date(2026, 3, 3), "Bővült"), Event(date(2026, 3, 5), "Bővült")]
+    kinds = [kind for kind, _, _ in changes(current, previous)]
+    assert sorted(kinds) == ["added", "added", "removed"]
+
+
+def test_write_if_changed_str_and_bytes(tmp_path):
+    path = str(tmp_path / "feed.ics")
+    assert write_if_changed(path, b"A\r\nB\r\n")
+    assert not write_if_changed(path, b"A\r\nB\r\n")
+    assert write_if_changed(path, "A\nB\n")         # a sorvég is változás
+    assert not write_if_changed(path, "A\nB\n".encode("utf-8"))
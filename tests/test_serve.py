@@ -0,0 +1,90 @@
+from datetime import datetime
+
+import pytest
+
+import serve
+from serve import TZ, next_run, parse_cron
+
+
+def at(*args, **kwargs):
+    return datetime(*args, tzinfo=TZ, **kwargs)
+
+
+def runs(expr, after, count):
+    cron, result = parse_cron(expr), []
+    for _ in range(count):
+        after = next_run(cron, after)
+        result.append(after)
+    return result
+
+
+def test_parse_fields():
+    minutes, hours, days, months, weekdays, either = parse_cron("*/15 9-11 1,15 * 1-5")
+    assert either
+    assert minutes == {0, 15, 30, 45}
+    assert hours == {9, 10, 11}
+    assert days == {1, 15}
+    assert months == set(range(1, 13))
+    assert weekdays == {1, 2, 3, 4, 5}
+
+
+def test_starred_day_fields_are_anded():
+    cron = parse_cron("1 */3 * * *")
+    assert not cron[5]
+    assert not parse_cron("0 9 */2 * 1")[5]
+    assert cron[1] == {0, 3, 6, 9, 12, 15, 18, 21}
+
+
+def test_sunday_as_seven():
+    assert parse_cron("0 11 * * 7")[4] == {0}
+    assert parse_cron("0 11 * * 5-7")[4] == {5, 6, 0}
+    # 2026-10-18 vasárnap
+    assert runs("0 11 * * 7", at(2026, 10, 14), 2) == [at(2026, 10, 18, 11), at(2026, 10, 25, 11)]
+
+
+@pytest.mark.parametrize("expr", ["60 * * * *", "* 24 * * *", "* * 0 * *", "* * * 13 *",
+                                  "* * * * 8", "5-1 * * * *", "*/0 * * * *", "* * * *"])
+def test_invalid(expr):
+    with pytest.raises(ValueError):
+        parse_cron(expr)
+
+
+def test_step_and_range():
+    assert runs("*/20 9-10 * * *", at(2026, 10, 18, 10, 30), 3) == [
+        at(2026, 10, 18, 10, 40), at(2026, 10, 19, 9, 0), at(2026, 10, 19, 9, 20)]
+
+
+def test_day_of_month_or_weekday():
+    # Ha mindkettő korlátozott: hétfők és a hónap 1-je is
+    assert runs("0 9 1 * 1", at(2026, 10, 25), 3) == [
+        at(2026, 10, 26, 9), at(2026, 11, 1, 9), at(2026, 11, 2, 9)]
+    # Ha csak az egyik: az dönt
+    assert runs("0 9 * * 1", at(2026, 10, 25), 2) == [at(2026, 10, 26, 9), at(2026, 11, 2, 9)]
+    assert runs("0 9 1 * *", at(2026, 10, 25), 2) == [at(2026, 11, 1, 9), at(2026, 12, 1, 9)]
+    # *-gal kezdődő (lépéses) nap szűr, de ÉS kapcsolatban a hét napjával
+    assert runs("0 9 */2 * 1", at(2026, 10, 25), 1) == [at(2026, 11, 9, 9)]
+
+
+def test_dst_spring_forward():
+    # 2026-03-29 02:00 → 03:00: a kimaradó 02:30 a váltás után azonnal esedékes
+    job_time = next_run(parse_cron("30 2 * * *"), at(2026, 3, 29, 1, 0))
+    assert job_time <= at(2026, 3, 29, 3, 0)
+    assert next_run(parse_cron("30 2 * * *"), at(2026, 3, 29, 3, 0)) == at(2026, 3, 30, 2, 30)
+
+
+def test_dst_fall_back_runs_once():
+    # 2026-10-25 03:00 → 02:00: az ismétlődő órában nem fut újra
+    first = next_run(parse_cron("30 2 * * *"), at(2026, 10, 25, 1, 0))
+    assert first == at(2026, 10, 25, 2, 30)
+    assert next_run(parse_cron("30 2 * * *"), first) == at(2026, 10, 26, 2, 30)
+
+
+def test_never_matching():
+    with pytest.raises(ValueError):
+        next_run(parse_cron("0 0 31 2 *"), at(2026, 1, 1))
+
+
+def test_job_uses_budapest_time(monkeypatch):
+    monkeypatch.setattr(serve, "budapest_now", lambda: at(2026, 10, 18, 10, 59, 30))
+    job = serve.Job("mozi", serve.DEFAULT_CINEMA_CRON, lambda: None)
+    assert job.next_run == at(2026, 10, 18, 11, 0)
@@ -0,0 +1,335 @@
+"""
+Statikus színházi naptár a GitHub Pages-re (docs/szinhaz/).
+
+Az event_index soraiból havonta egy JSON shardot ír, a fájlnévben a
+tartalom hash-ével (data/2026-03.<hash>.json), mellé egy előre kiszámolt
+keresőindexet (data/search.<hash>.json) és egy kis manifest.json-t, ami
+a hónapokat a shardokra képezi le. Az index.html nem tartalmaz adatot,
+csak a manifestet tölti le, és abból a szükséges shardokat.
+
+Futásonként csak azok a fájlok íródnak újra, amelyeknek a tartalma
+változott. Változatlan hónapnál a shard neve és tartalma is ugyanaz
+marad, így sem a Pages deploy diffje, sem a böngésző cache nem
+invalidálódik. A már nem hivatkozott shardok törlődnek.
+
+Használat: python theatre_calendar.py   (a main.py minden futás után meghívja)
+"""
+
+import os
+import json
+import hashlib
+from itertools import groupby
+
+import event_index
+from scraper_utils import write_if_changed
+from theatres import THEATRES
+
+
+OUTPUT_DIR = "docs/szinhaz"
+DATA_DIR = "data"
+HASH_LENGTH = 10
+
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:HASH_LENGTH]
+
+
+def month_shards(rows: list[list]) -> dict:
+    """{"YYYY-MM": [[dátum, színház, cím], ...]} a dátum szerint rendezett sorokból."""
+    return {
+        month: [[d, k, t] for d, k, t, _ in month_rows]
+        for month, month_rows in groupby(rows, key=lambda row: row[0][:7])
+    }
+
+
+def search_entries(rows: list[list]) -> list[list]:
+    """
+    Darabonként egy bejegyzés:
+    [normalizált cím, cím, színház, első dátum, utolsó dátum, előadásszám, [hónapok]]
+    """
+    by_title = {}
+    for d, k, t, norm in rows:
+        entry = by_title.get((k, t))
+        if entry is None:
+            by_title[(k, t)] = entry = [norm, t, k, d, d, 0, []]
+        entry[4] = d
+        entry[5] += 1
+        if not entry[6] or entry[6][-1] != d[:7]:
+            entry[6].append(d[:7])
+    return sorted(by_title.values())
+
+
+def _hashed_file(data_dir: str, stem: str, payload) -> tuple[str, bool]:
+    text = _dumps(payload)
+    name = f"{stem}.{content_hash(text)}.json"
+    return name, write_if_changed(os.path.join(data_dir, name), text)
+
+
+def generate(index: dict | None = None, output_dir: str = OUTPUT_DIR) -> list[str]:
+    """A naptár frissítése. Visszaadja az újraírt fájlok listáját."""
+    if index is None:
+        index, _ = event_index.update_index()
+    data_dir = os.path.join(output_dir, DATA_DIR)
+    os.makedirs(data_dir, exist_ok=True)
+
+    written = []
+    months = {}
+    for month, events in month_shards(index["rows"]).items():
+        name, changed = _hashed_file(data_dir, month, {"month": month, "events": events})
+        months[month] = f"{DATA_DIR}/{name}"
+        if changed:
+            written.append(months[month])
+
+    search_name, changed = _hashed_file(data_dir, "search", search_entries(index["rows"]))
+    if changed:
+        written.append(f"{DATA_DIR}/{search_name}")
+
+    manifest = {
+        "months": months,
+        "search": f"{DATA_DIR}/{search_name}",
+        "theatres": {key: {"label": t["label"], "name": t["name"], "url": t["url"]}
+                     for key, t in THEATRES.items()},
+    }
+    if write_if_changed(os.path.join(output_dir, "manifest.json"), _dumps(manifest)):
+        written.append("manifest.json")
+    if write_if_changed(os.path.join(output_dir, "index.html"), PAGE_HTML):
+        written.append("index.html")
+
+    referenced = {os.path.basename(p) for p in months.values()} | {search_name}
+    for name in os.listdir(data_dir):
+        if name.endswith(".json") and name not in referenced:
+            os.remove(os.path.join(data_dir, name))
+            written.append(f"{DATA_DIR}/{name} (törölve)")
+
+    return written
+
+
+PAGE_HTML = """<!DOCTYPE html>
+<html lang="hu">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>Színházi naptár</title>
+<link rel="preconnect" href="https://fonts.googleapis.com">
+<link href="https://fonts.googleapis.com/css2?family=Space+Mono:wght@400;700&family=DM+Sans:wght@400;500;600;700&display=swap" rel="stylesheet">
+<style>
+* { margin: 0; padding: 0; box-sizing: border-box; }
+
+body {
+  font-family: 'DM Sans', sans-serif;
+  background: #0a0a0a;
+  color: #e8e8e8;
+  min-height: 100vh;
+}
+
+.header {
+  padding: 2rem 1.5rem 1rem;
+  text-align: center;
+  border-bottom: 1px solid #222;
+}
+.header h1 {
+  font-family: 'Space Mono', monospace;
+  font-size: clamp(1.2rem, 4vw, 1.8rem);
+  letter-spacing: -0.02em;
+  color: #fff;
+}
+
+.filters {
+  padding: 1rem 1.5rem;
+  border-bottom: 1px solid #1a1a1a;
+  position: sticky;
+  top: 0;
+  background: #0a0a0a;
+  z-index: 10;
+}
+.filter-section { margin-bottom: 0.75rem; }
+.filter-section:last-child { margin-bottom: 0; }
+.filter-row { display: flex; gap: 0.4rem; flex-wrap: wrap; }
+.filter-label {
+  font-family: 'Space Mono', monospace;
+  font-size: 0.65rem;
+  text-transform: uppercase;
+  letter-spacing: 0.1em;
+  color: #555;
+  margin-bottom: 0.35rem;
+}
+.filter-btn {
+  padding: 0.35rem 0.7rem;
+  border: 1px solid #333;
+  border-radius: 2rem;
+  background: transparent;
+  color: #aaa;
+  font-family: 'DM Sans', sans-serif;
+  font-size: 0.78rem;
+  cursor: pointer;
+  white-space: nowrap;
+}
+.filter-btn:hover { border-color: #666; color: #fff; }
+.filter-btn.active { background: #fff; color: #0a0a0a; border-color: #fff; font-weight: 600; }
+#search {
+  width: 100%;
+  padding: 0.45rem 0.8rem;
+  border: 1px solid #333;
+  border-radius: 2rem;
+  background: #111;
+  color: #e8e8e8;
+  font-family: 'DM Sans', sans-serif;
+}
+
+.content { padding: 1.5rem; max-width: 900px; margin: 0 auto; }
+.day {
+  margin-bottom: 1rem;
+  border: 1px solid #1e1e1e;
+  border-radius: 12px;
+  background: #111;
+  padding: 0.8rem 1.2rem;
+}
+.day-title { font-family: 'Space Mono', monospace; font-size: 0.8rem; color: #888; margin-bottom: 0.4rem; }
+.show { display: flex; gap: 0.75rem; align-items: baseline; margin: 0.2rem 0; }
+.theatre { font-weight: 600; font-size: 0.8rem; min-width: 70px; color: #999; }
+.hit { padding: 0.4rem 0; border-bottom: 1px solid #1a1a1a; }
+.hit .meta { font-family: 'Space Mono', monospace; font-size: 0.7rem; color: #666; }
+.hit a { color: #A0DAE8; cursor: pointer; margin-right: 0.4rem; }
+.empty { text-align: center; padding: 4rem 2rem; color: #555; }
+</style>
+</head>
+<body>
+
+<div class="header"><h1>🎭 Színházi naptár</h1></div>
+
+<div class="filters">
+  <div class="filter-section">
+    <div class="filter-label">Keresés</div>
+    <input id="search" type="search" placeholder="Darab címe…">
+  </div>
+  <div class="filter-section">
+    <div class="filter-label">Színház</div>
+    <div class="filter-row" id="theatre-filters"></div>
+  </div>
+  <div class="filter-section">
+    <div class="filter-label">Hónap</div>
+    <div class="filter-row" id="month-filters"></div>
+  </div>
+</div>
+
+<div class="content" id="content"></div>
+
+<script>
+const DAYS = ['V', 'H', 'K', 'Sze', 'Cs', 'P', 'Szo'];
+let manifest = null;
+let searchIndex = null;
+let activeTheatre = 'all';
+let activeMonth = null;
+const shards = {};
+
+function normalize(s) {
+  return s.normalize('NFKD').replace(/[\\u0300-\\u036f]/g, '').toLowerCase()
+    .replace(/[^\\p{L}\\p{N}]+/gu, ' ').trim();
+}
+function escapeHtml(s) {
+  return s.replace(/[&<>"]/g, c => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}[c]));
+}
+
+async function loadShard(month) {
+  if (!shards[month]) shards[month] = fetch(manifest.months[month]).then(r => r.json());
+  return shards[month];
+}
+
+function button(container, label, value, active, onClick) {
+  const btn = document.createElement('button');
+  btn.className = 'filter-btn' + (active ? ' active' : '');
+  btn.textContent = label;
+  btn.addEventListener('click', () => {
+    container.querySelectorAll('.filter-btn').forEach(b => b.classList.remove('active'));
+    btn.classList.add('active');
+    onClick(value);
+  });
+  container.appendChild(btn);
+}
+
+async function renderMonth() {
+  const shard = await loadShard(activeMonth);
+  const byDay = {};
+  shard.events.forEach(([d, k, t]) => {
+    if (activeTheatre !== 'all' && k !== activeTheatre) return;
+    (byDay[d] = byDay[d] || []).push([k, t]);
+  });
+  const days = Object.keys(byDay).sort();
+  const content = document.getElementById('content');
+  if (!days.length) {
+    content.innerHTML = '<div class="empty">Nincs előadás a szűrésnek megfelelően.</div>';
+    return;
+  }
+  content.innerHTML = days.map(d => {
+    const weekday = DAYS[new Date(d + 'T12:00:00').getDay()];
+    return '<div class="day"><div class="day-title">' + d + ' ' + weekday + '</div>' +
+      byDay[d].map(([k, t]) => '<div class="show"><span class="theatre">' +
+        escapeHtml(manifest.theatres[k].label) + '</span><span>' + escapeHtml(t) + '</span></div>').join('') +
+      '</div>';
+  }).join('');
+}
+
+async function renderSearch(query) {
+  if (!searchIndex) searchIndex = await fetch(manifest.search).then(r => r.json());
+  const words = normalize(query).split(' ');
+  const hits = searchIndex.filter(([n, , k]) =>
+    words.every(w => n.includes(w)) && (activeTheatre === 'all' || k === activeTheatre));
+  const content = document.getElementById('content');
+  if (!hits.length) {
+    content.innerHTML = '<div class="empty">Nincs találat.</div>';
+    return;
+  }
+  content.innerHTML = hits.map(([, t, k, first, last, count, months]) =>
+    '<div class="hit"><div>' + escapeHtml(t) + '</div><div class="meta">' +
+    escapeHtml(manifest.theatres[k].label) + ' · ' + first + ' – ' + last + ' · ' + count + ' előadás · ' +
+    months.map(m => '<a data-month="' + m + '">' + m + '</a>').join('') + '</div></div>').join('');
+  content.querySelectorAll('a[data-month]').forEach(a => a.addEventListener('click', () => {
+    document.getElementById('search').value = '';
+    selectMonth(a.dataset.month);
+  }));
+}
+
+function render() {
+  const query = document.getElementById('search').value.trim();
+  return query ? renderSearch(query) : renderMonth();
+}
+
+function selectMonth(month) {
+  activeMonth = month;
+  document.querySelectorAll('#month-filters .filter-btn').forEach(b =>
+    b.classList.toggle('active', b.textContent === month));
+  render();
+}
+
+async function init() {
+  manifest = await fetch('manifest.json', {cache: 'no-cache'}).then(r => r.json());
+  const months = Object.keys(manifest.months).sort();
+  const current = new Date().toISOString().slice(0, 7);
+  activeMonth = months.find(m => m >= current) || months[months.length - 1];
+
+  const theatreFilters = document.getElementById('theatre-filters');
+  button(theatreFilters, 'Mind', 'all', true, v => { activeTheatre = v; render(); });
+  Object.entries(manifest.theatres).forEach(([k, t]) =>
+    button(theatreFilters, t.label, k, false, v => { activeTheatre = v; render(); }));
+
+  const monthFilters = document.getElementById('month-filters');
+  months.forEach(m => button(monthFilters, m, m, m === activeMonth, selectMonth));
+
+  document.getElementById('search').addEventListener('input', render);
+  render();
+}
+
+init();
+</script>
+</body>
+</html>
+"""
+
+
+if __name__ == "__main__":
+    changed = generate()
+    print(f"[NAPTÁR] {len(changed)} fájl frissítve" + (f": {', '.join(changed)}" if changed else ""))
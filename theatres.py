@@ -0,0 +1,59 @@
+"""
+Színház-nyilvántartás: kulcs → scraper modul, megjelenített név,
+state fájl, műsor URL, és hogy a scraper tud-e olcsó próbát futtatni
+(ujjlenyomat-összevetés a teljes scrape előtt), illetve a közös
+navigációs sort (nav_queue.py) használja-e ("queue").
+
+Szándékosan nem importál scraper modult (és így Playwrightot sem),
+hogy a main.py csak a kiválasztott scrapereket töltse be.
+"""
+
+THEATRES = {
+    "katona": {
+        "module": "katona_last_date",
+        "name": "Katona József Színház",
+        "label": "Katona",
+        "state_file": "state.json",
+        "url": "https://katona.jegymester.hu/main",
+        "probe": True,
+    },
+    "orkeny": {
+        "module": "orkeny_last_date",
+        "name": "Örkény István Színház",
+        "label": "Örkény",
+        "state_file": "orkeny_state.json",
+        "url": "https://orkenyszinhaz.hu/jegyvasarlas/kereses/eloadas",
+    },
+    "radnoti": {
+        "module": "radnoti_last_date",
+        "name": "Radnóti Színház",
+        "label": "Radnóti",
+        "state_file": "radnoti_state.json",
+        "url": "https://radnotiszinhaz.hu/musor/",
+        "probe": True,
+        "queue": True,
+    },
+    "pbest": {
+        "module": "pbest_last_date",
+        "name": "Pintér Béla és Társulata",
+        "label": "PBEST",
+        "state_file": "pbest_state.json",
+        "url": "https://pbest.hu/musor",
+        "queue": True,
+    },
+    "vig": {
+        "module": "vig_last_date",
+        "name": "Vígszínház",
+        "label": "Víg",
+        "state_file": "vig_state.json",
+        "url": "https://vigszinhaz.hu/hu/musor",
+        "probe": True,
+        "queue": True,
+    },
+}
+
+
+def load_scraper(key: str):
+    """A scraper modul importálása csak akkor, amikor tényleg kell."""
+    import importlib
+    return importlib.import_module(THEATRES[key]["module"])
@@ -5,20 +5,38 @@ A https://vigszinhaz.hu/hu/musor oldalról scrape-eli az előadások dátumait 
 Next.js szerver-renderelt oldal, havi megjelenítéssel.
 A dátumok és címek a produkciós URL-ekből nyerhetők ki:
   /hu/produkciok/DARABNEV/YYYYMMDD-HHMM
+
+A hónapokat nem egymás után lapozzuk: a naptár lapozó linkjeiből kiolvassuk
+a hónap-paramétert (sablonként a state-be mentve), és az összes hónapot
+egyszerre töltjük le HTTP-n. Ha ez nem megy, a böngészőben párhuzamos
+fülekkel, végső esetben a régi "következő hónap" kattintással.
+Navigációs sorral (nav_queue.py) a HTTP letöltések és a fülek is a sor
+hostonkénti korlátai alatt futnak; kattintáshoz saját böngésző indul.
 """
 
-import os
 import re
-import json
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date
+from html import unescape
+from urllib.parse import urljoin
 from zoneinfo import ZoneInfo
 
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
-from scraper_utils import compare_events
+import html_extract
+import nav_queue
+from diagnostics import Diagnostics
+from navigation import goto, fetch_html, SiteDownError
+from scraper_utils import (
+    Event, compare_events, browser_session, load_state, save_state,
+    events_from_json, events_to_json, latest_date, track_page_stats, track_cache_hits,
+    fingerprint, probe_allowed, probe_changed_keys, probe_unchanged_result,
+)
 
 
 URL = "https://vigszinhaz.hu/hu/musor"
 STATE_FILE = "vig_state.json"
+MAX_MONTHS = 12
+MONTH_FETCH_WORKERS = 4
 
 HU_MONTHS = {
     "január": 1, "február": 2, "március": 3, "április": 4, "május": 5, "június": 6,
@@ -26,73 +44,302 @@ HU_MONTHS = {
 }
 
 
+EVENT_LINK = html_extract.compile_selector('a[href*="/hu/produkciok/" i]')
+EVENT_LINK_RE = re.compile(
+    r'<a[^>]*href="[^"]*?/hu/produkciok/([^/]+)/(20\d{2})(\d{2})(\d{2})-\d{4}[^"]*"[^>]*>([^<]+)</a>',
+    re.IGNORECASE
+)
+EVENT_PATH = re.compile(r"/hu/produkciok/([^/]+)/(20\d{2})(\d{2})(\d{2})-\d{4}")
+
+
 def budapest_now():
     return datetime.now(tz=ZoneInfo("Europe/Budapest"))
 
 
-def extract_events_from_html(html: str) -> list[tuple[date, str]]:
+def extract_events_from_html(html: str) -> list[Event]:
     """
     (dátum, előadásnév) párok kinyerése a HTML-ből.
     URL formátum: /hu/produkciok/SHOW_NAME/YYYYMMDD-HHMM
     """
+    backend = html_extract.backend()
+    events = extract_events_soup(html) if backend == "soup" else extract_events_regex(html)
+    if not events and backend == "auto":
+        # A markup változott (idézőjel, entitás, beágyazott tag): egy parse-olt próba
+        events = extract_events_soup(html)
+    return events or extract_events_from_paths(html)
+
+
+def _slug_title(slug: str) -> str:
+    return slug.replace("_", " ").replace("-", " ").title()
+
+
+def _event(y: str, mo: str, d: str, title: str) -> Event | None:
+    try:
+        return Event(date(int(y), int(mo), int(d)), title)
+    except ValueError:
+        return None
+
+
+def extract_events_soup(html: str) -> list[Event]:
+    """Egy parse, a produkciós linkek a lefordított EVENT_LINK szelektorral."""
     events = []
+    for href, text in html_extract.select_links(html, EVENT_LINK):
+        m = EVENT_PATH.search(href)
+        if m is None or text is None:
+            continue
+        event = _event(m.group(2), m.group(3), m.group(4), text.strip() or _slug_title(m.group(1)))
+        if event is not None:
+            events.append(event)
+    return events
 
-    # 1) Keresünk <a> tageket produkciós URL-lel ÉS link szöveggel
-    for m in re.finditer(
-        r'<a[^>]*href="[^"]*?/hu/produkciok/([^/]+)/(20\d{2})(\d{2})(\d{2})-\d{4}[^"]*"[^>]*>([^<]+)</a>',
-        html, re.IGNORECASE
-    ):
-        slug = m.group(1)
-        y, mo, d = int(m.group(2)), int(m.group(3)), int(m.group(4))
-        link_text = m.group(5).strip()
-        title = link_text if link_text else slug.replace("_", " ").replace("-", " ").title()
-        try:
-            events.append((date(y, mo, d), title))
-        except ValueError:
-            pass
 
-    # 2) Fallback: ha nincs link szöveg, használjuk a slug-ot
-    if not events:
-        for m in re.finditer(
-            r'/hu/produkciok/([^/]+)/(20\d{2})(\d{2})(\d{2})-\d{4}',
-            html
-        ):
-            slug = m.group(1)
-            y, mo, d = int(m.group(2)), int(m.group(3)), int(m.group(4))
-            title = slug.replace("_", " ").replace("-", " ").title()
-            try:
-                events.append((date(y, mo, d), title))
-            except ValueError:
-                pass
+def extract_events_regex(html: str) -> list[Event]:
+    """Elsődleges út: <a> tagek produkciós URL-lel ÉS link szöveggel, egy lefordított regexszel."""
+    events = []
+    for m in EVENT_LINK_RE.finditer(html):
+        event = _event(m.group(2), m.group(3), m.group(4), m.group(5).strip() or _slug_title(m.group(1)))
+        if event is not None:
+            events.append(event)
+    return events
 
+
+def extract_events_from_paths(html: str) -> list[Event]:
+    """Fallback: ha nincs link szöveggel, a produkciós URL-ek bárhol a dokumentumban, slug címmel."""
+    events = []
+    for m in EVENT_PATH.finditer(html):
+        event = _event(m.group(2), m.group(3), m.group(4), _slug_title(m.group(1)))
+        if event is not None:
+            events.append(event)
     return events
 
 
-def scrape_all_months(page, max_months: int = 12) -> list[tuple[date, str]]:
+def month_template_from_url(url: str) -> str | None:
     """
-    Betölti az aktuális hónapot, kinyeri az előadásokat, majd a következő
-    hónap gombra kattintva továbblép.
+    Hónapot címző URL-ből format-sablon: ...offset=N → {offset},
+    ...YYYY-MM / YYYY/MM / YYYYMM → {year}-{month:02d} (az eredeti elválasztóval).
     """
-    all_events = []
-    empty_streak = 0
+    if "{" in url or "}" in url or "/hu/musor" not in url:
+        return None
+    head, tail = url.split("/hu/musor", 1)
+    head += "/hu/musor"
+    m = re.search(r"[?&]offset=(\d+)", tail)
+    if m:
+        return head + tail[:m.start(1)] + "{offset}" + tail[m.end(1):]
+    m = re.search(r"(?<!\d)(20\d{2})([-/.]?)(0[1-9]|1[0-2])(?![-/.]?\d)", tail)
+    if m:
+        return head + tail[:m.start()] + "{year}" + m.group(2) + "{month:02d}" + tail[m.end():]
+    return None
+
+
+def discover_month_template(html: str, base_url: str = URL) -> str | None:
+    """A naptár hónaplapozó linkjeiből (href a /hu/musor alatt) a hónap-sablon."""
+    for m in re.finditer(r'href="([^"]*/hu/musor[^"]*)"', html):
+        template = month_template_from_url(urljoin(base_url, unescape(m.group(1))))
+        if template:
+            return template
+    return None
+
+
+def month_of(today: date, idx: int) -> tuple[int, int]:
+    y, m = divmod(today.month - 1 + idx, 12)
+    return today.year + y, m + 1
+
+
+def month_urls(template: str, indices, today: date) -> list[str]:
+    urls = []
+    for idx in indices:
+        year, month = month_of(today, idx)
+        urls.append(template.format(offset=idx, year=year, month=month))
+    return urls
+
+
+def month_matches(events: list[Event], today: date, idx: int) -> bool:
+    """Ellenőrzés: a betöltött lap tényleg a kért hónapot mutatja-e."""
+    if not events:
+        return True
+    year, month = month_of(today, idx)
+    return any(e.date.year == year and e.date.month == month for e in events)
 
-    print(f"[VÍG] Oldal betöltése: {URL}")
-    page.goto(URL, wait_until="networkidle", timeout=60000)
-    page.wait_for_timeout(3000)
+
+def trim_months(per_month: list[list]) -> list[list]:
+    """Levágja a listát az első két egymást követő üres hónapnál (mint a lapozásnál)."""
+    kept = []
+    empty_streak = 0
+    for events in per_month:
+        empty_streak = 0 if events else empty_streak + 1
+        if empty_streak >= 2:
+            break
+        kept.append(events)
+    return kept
+
+
+def fetch_months(template: str, indices: list[int], diag, stats: dict) -> dict:
+    """A megadott hónapok párhuzamos letöltése HTTP-n: {index: események}."""
+    today = budapest_now().date()
+    urls = month_urls(template, indices, today)
+    queue = nav_queue.current()
+    if queue:
+        htmls = [future.result() for future in [queue.fetch(url) for url in urls]]
+    else:
+        with ThreadPoolExecutor(max_workers=MONTH_FETCH_WORKERS) as pool:
+            htmls = list(pool.map(fetch_html, urls))
+
+    per_month = {}
+    for idx, url, html in zip(indices, urls, htmls):
+        stats["pages"] = stats.get("pages", 0) + 1
+        stats["requests"] = stats.get("requests", 0) + 1
+        diag.record(None, f"hónap {idx} (HTTP)", html=html, url=url)
+        per_month[idx] = extract_events_from_html(html)
+    return per_month
+
+
+def load_months_http(template: str | None, diag, stats: dict,
+                     max_months: int = MAX_MONTHS) -> tuple[list[list] | None, str | None]:
+    """
+    Böngésző nélküli út: ha nincs még sablon, a kezdőoldal HTML-jéből
+    felderíti, majd az összes hónapot egyszerre tölti le. None, ha a sablon
+    nem található, vagy a válaszok nem a kért hónapokat mutatják.
+    """
+    try:
+        if template is None:
+            print(f"[VÍG] Hónap-paraméter keresése: {URL}")
+            template = discover_month_template(fetch_html(URL))
+            if template is None:
+                print("[VÍG] Nem találtam hónap-paramétert a linkek között")
+                return None, None
+        print(f"[VÍG] Hónapok párhuzamos letöltése: {template}")
+        per_month = fetch_months(template, list(range(max_months)), diag, stats)
+    except (urllib.error.URLError, OSError) as e:
+        print(f"[VÍG] HTTP letöltés sikertelen ({e}), böngészőre váltok")
+        return None, template
+
+    today = budapest_now().date()
+    months = [per_month[idx] for idx in range(max_months)]
+    if not any(months) or not all(month_matches(ev, today, i) for i, ev in enumerate(months)):
+        print("[VÍG] A HTTP válaszok nem a kért hónapokat tartalmazzák, böngészőre váltok")
+        return None, template
+    return trim_months(months), template
+
+
+def load_months_in_tabs(page, diag, stats: dict, template: str,
+                        max_months: int = MAX_MONTHS) -> list[list] | None:
+    """
+    Böngészős út ismert sablonnal: minden hónap külön fülön, a navigációk
+    egyszerre indulnak, és csak utána várunk a betöltésükre.
+    """
+    today = budapest_now().date()
+    urls = month_urls(template, range(max_months), today)
+    tabs = [page] + [page.context.new_page() for _ in urls[1:]]
+    for tab in tabs[1:]:
+        track_page_stats(tab, stats)
+        if "cached" in stats:
+            track_cache_hits(page.context, tab, stats)
+    try:
+        for tab, url in zip(tabs, urls):
+            goto(tab, url, wait_until="commit", timeout=60000)
+        months = []
+        for idx, tab in enumerate(tabs):
+            tab.wait_for_load_state("networkidle", timeout=60000)
+            html = tab.content()
+            diag.record(tab, f"hónap {idx}", html=html)
+            months.append(extract_events_from_html(html))
+    finally:
+        for tab in tabs[1:]:
+            tab.close()
+
+    if not any(months) or not all(month_matches(ev, today, i) for i, ev in enumerate(months)):
+        print("[VÍG] A fülek nem a kért hónapokat mutatják, lapozásra váltok")
+        return None
+    return trim_months(months)
+
+
+def load_months_queued(queue, diag, stats: dict, template: str | None,
+                       max_months: int = MAX_MONTHS) -> tuple[list[list] | None, str | None]:
+    """
+    A load_months_in_tabs megfelelője a navigációs sorral: sablon nélkül a
+    kezdőoldalból deríti fel, majd minden hónap egyszerre kerül a sorba.
+    (None, None), ha nincs sablon, vagy a lapok nem a kért hónapokat mutatják.
+    """
+    if template is None:
+        print(f"[VÍG] Oldal betöltése: {URL} (sor)")
+        snapshot = queue.submit(URL, timeout=60000).result()
+        nav_queue.add_stats(stats, snapshot)
+        template = discover_month_template(snapshot["html"], snapshot["final_url"])
+        if template is None:
+            print("[VÍG] Nem találtam hónap-paramétert a linkek között")
+            return None, None
+
+    print(f"[VÍG] Hónapok a navigációs sorban: {template}")
+    today = budapest_now().date()
+    futures = [queue.submit(url, timeout=60000) for url in month_urls(template, range(max_months), today)]
+    months = []
+    for idx, future in enumerate(futures):
+        snapshot = future.result()
+        nav_queue.add_stats(stats, snapshot)
+        diag.record(None, f"hónap {idx}", html=snapshot["html"], url=snapshot["final_url"])
+        months.append(extract_events_from_html(snapshot["html"]))
+
+    if not any(months) or not all(month_matches(ev, today, i) for i, ev in enumerate(months)):
+        print("[VÍG] A sor lapjai nem a kért hónapokat mutatják, lapozásra váltok")
+        return None, None
+    return trim_months(months), template
+
+
+def click_next_month(page) -> bool:
+    for selector in [
+        "a[href*='offset=1']",
+        "button[aria-label*='next']",
+        "button[aria-label*='Next']",
+        "button[aria-label*='következő']",
+        "[class*='next']",
+        "[class*='forward']",
+        "svg[class*='right'] >> xpath=..",
+        "button >> nth=-1",
+    ]:
+        try:
+            btn = page.locator(selector).first
+            if btn.is_visible(timeout=2000):
+                btn.click()
+                return True
+        except Exception:
+            continue
 
     try:
-        page.screenshot(path="debug_vig_page.png")
+        arrows = page.locator("button, a").all()
+        for arrow in arrows:
+            try:
+                text_content = arrow.inner_text(timeout=500)
+                if text_content.strip() in ["›", "»", ">", "→", ""]:
+                    bbox = arrow.bounding_box()
+                    if bbox and bbox.get("x", 0) > 500:
+                        arrow.click()
+                        return True
+            except Exception:
+                continue
     except Exception:
         pass
+    return False
+
+
+def scrape_by_clicking(page, diag, max_months: int = MAX_MONTHS) -> tuple[list[list], str | None]:
+    """
+    Tartalék út: a következő hónap gombra kattintva lapoz. Ha az első
+    kattintás után az URL hónapot címez, a sablont visszaadja a következő
+    futásoknak.
+    """
+    per_month = []
+    template = None
+    empty_streak = 0
 
     for month_idx in range(max_months):
         html = page.content()
+        diag.record(page, f"hónap {month_idx}", html=html)
         month_events = extract_events_from_html(html)
+        per_month.append(month_events)
 
         if month_events:
-            month_dates = [d for d, _ in month_events]
+            month_dates = [e.date for e in month_events]
             print(f"[VÍG] Hónap {month_idx}: {len(month_events)} előadás, {min(month_dates)} - {max(month_dates)}")
-            all_events.extend(month_events)
             empty_streak = 0
         else:
             print(f"[VÍG] Hónap {month_idx}: nincs előadás")
@@ -102,112 +349,152 @@ def scrape_all_months(page, max_months: int = 12) -> list[tuple[date, str]]:
             print(f"[VÍG] 2 üres hónap, befejezem")
             break
 
-        # Következő hónap
-        next_clicked = False
-        for selector in [
-            "a[href*='offset=1']",
-            "button[aria-label*='next']",
-            "button[aria-label*='Next']",
-            "button[aria-label*='következő']",
-            "[class*='next']",
-            "[class*='forward']",
-            "svg[class*='right'] >> xpath=..",
-            "button >> nth=-1",
-        ]:
-            try:
-                btn = page.locator(selector).first
-                if btn.is_visible(timeout=2000):
-                    btn.click()
-                    next_clicked = True
-                    page.wait_for_timeout(3000)
-                    break
-            except Exception:
-                continue
-
-        if not next_clicked:
-            try:
-                arrows = page.locator("button, a").all()
-                for arrow in arrows:
-                    try:
-                        text_content = arrow.inner_text(timeout=500)
-                        if text_content.strip() in ["›", "»", ">", "→", ""]:
-                            bbox = arrow.bounding_box()
-                            if bbox and bbox.get("x", 0) > 500:
-                                arrow.click()
-                                next_clicked = True
-                                page.wait_for_timeout(3000)
-                                break
-                    except Exception:
-                        continue
-            except Exception:
-                pass
-
-        if not next_clicked:
+        url_before = page.url
+        if not click_next_month(page):
             print(f"[VÍG] Nem találtam következő hónap gombot")
             break
+        page.wait_for_timeout(3000)
+        if template is None and page.url != url_before:
+            template = month_template_from_url(page.url)
 
-    return all_events
+    return trim_months(per_month), template
 
 
-def check() -> dict:
+def load_months_browser(page, diag, stats: dict, template: str | None,
+                        try_tabs: bool = True) -> tuple[list[list], str | None]:
+    """
+    Böngészős út: sablon felderítése a betöltött oldalról, fülek, végül lapozás.
+    try_tabs=False: a füles utat már a navigációs sor kipróbálta, egyből lapoz.
+    """
+    print(f"[VÍG] Oldal betöltése: {URL}")
+    goto(page, URL, wait_until="networkidle", timeout=60000)
+
+    if try_tabs and template is None:
+        template = discover_month_template(page.content(), page.url)
+    if try_tabs and template is not None:
+        months = load_months_in_tabs(page, diag, stats, template)
+        if months is not None:
+            return months, template
+        template = None
+        goto(page, URL, wait_until="networkidle", timeout=60000)
+
+    page.wait_for_timeout(3000)
+    return scrape_by_clicking(page, diag)
+
+
+def full_scrape_fingerprints(per_month: list[list]) -> dict:
+    """Az első hónap, az utolsó nem üres hónap és az utána következő ujjlenyomata."""
+    populated = [i for i, events in enumerate(per_month) if events]
+    if not populated:
+        return {}
+    last = max(populated)
+    return {
+        "0": fingerprint(per_month[0]),
+        str(last): fingerprint(per_month[last]),
+        str(last + 1): fingerprint(per_month[last + 1] if last + 1 < len(per_month) else []),
+    }
+
+
+def probe_months(template: str, diag, stats: dict, stored: dict) -> dict:
+    """A tárolt ujjlenyomatokhoz tartozó hónapok újratöltése HTTP-n."""
+    indices = sorted(int(k) for k in stored)
+    try:
+        per_month = fetch_months(template, indices, diag, stats)
+    except (urllib.error.URLError, OSError):
+        return {str(i): "hiba" for i in indices}
+    return {str(i): fingerprint(events) for i, events in per_month.items()}
+
+
+def check(mode: str = "auto") -> dict:
+    """mode: "auto" – próba, ha lehet, és csak változásnál teljes scrape; "full" – mindig teljes."""
     name = "Vígszínház"
     print(f"\n{'='*50}")
     print(f"[VÍG] Scraper indítása: {budapest_now()}")
 
-    result = {"name": name, "latest": None, "prev": None, "status": "error", "detail": ""}
+    result = {"name": name, "latest": None, "prev": None, "status": "error", "detail": "",
+              "stats": {"pages": 0, "requests": 0}}
 
-    try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context(
-                viewport={"width": 1920, "height": 1080},
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            )
-            page = context.new_page()
-            all_events = scrape_all_months(page)
-            browser.close()
+    diag = Diagnostics("vig")
+    state = load_state(STATE_FILE)
+    template = state.get("month_template")
+    probe_note = None
 
+    try:
+        if template and probe_allowed(state, mode):
+            probed = probe_months(template, diag, result["stats"], state["fingerprints"])
+            changed = probe_changed_keys(state["fingerprints"], probed)
+            if not changed:
+                probe_unchanged_result(result, state, probed)
+                print(f"[VÍG] {result['detail']}")
+                return result
+            probe_note = f"Próba: változás (hónap {', '.join(changed)}) → teljes scrape"
+            result["probe"] = {"pages": sorted(probed), "changed": changed}
+            print(f"[VÍG] {probe_note}")
+
+        queue = nav_queue.current()
+        per_month, template = load_months_http(template, diag, result["stats"])
+        if per_month is None and queue:
+            per_month, template = load_months_queued(queue, diag, result["stats"], template)
+        if per_month is None:
+            with browser_session(result["stats"], diag, profile="vig") as page:
+                per_month, template = load_months_browser(page, diag, result["stats"], template,
+                                                          try_tabs=queue is None)
+
+        all_events = [e for events in per_month for e in events]
         if not all_events:
             result["detail"] = "Nem találtam előadást az oldalon."
             return result
 
-        unique_events = sorted(set((d.isoformat(), t) for d, t in all_events))
-        latest = max(d for d, _ in all_events)
+        unique_events = sorted(set(all_events))
+        latest = latest_date(unique_events)
         event_count = len(unique_events)
-        print(f"[VÍG] {event_count} előadás, max: {latest}")
-
-        state = {}
-        if os.path.exists(STATE_FILE):
-            with open(STATE_FILE, "r", encoding="utf-8") as f:
-                state = json.load(f)
+        result["event_count"] = event_count
+        print(f"[VÍG] {event_count} előadás ({len(per_month)} hónap), max: {latest}")
 
         prev_str = state.get("latest_date")
         prev = datetime.strptime(prev_str, "%Y-%m-%d").date() if prev_str else None
         prev_count = state.get("event_count")
-        prev_events = state.get("events", [])
+        prev_events = events_from_json(state.get("events", []))
 
         state["latest_date"] = latest.isoformat()
         state["event_count"] = event_count
-        state["events"] = [list(e) for e in unique_events]
+        state["events"] = events_to_json(unique_events)
+        if template:
+            state["month_template"] = template
+            state["fingerprints"] = full_scrape_fingerprints(per_month)
+        else:
+            state.pop("month_template", None)
+            state.pop("fingerprints", None)
+        state["last_full_scrape"] = budapest_now().isoformat()
         state["checked_at_budapest"] = budapest_now().isoformat()
-        with open(STATE_FILE, "w", encoding="utf-8") as f:
-            json.dump(state, f, ensure_ascii=False, indent=2)
+        save_state(STATE_FILE, state)
 
         result["latest"] = latest
         result["prev"] = prev
         result["status"], result["detail"] = compare_events(
             latest, event_count, prev, prev_count,
-            [list(e) for e in unique_events], prev_events
+            unique_events, prev_events
         )
+        if probe_note:
+            result["detail"] = f"{probe_note}\n{result['detail']}"
 
         print(f"[VÍG] {result['detail']}")
         return result
 
+    except SiteDownError as e:
+        result["status"] = "site_down"
+        result["detail"] = f"Az oldal nem elérhető, kihagyva: {e}"
+        print(f"[VÍG] {result['detail']}")
+        return result
+
     except Exception as e:
         result["detail"] = f"Hiba: {e}"
         print(f"[VÍG] {result['detail']}")
         return result
 
+    finally:
+        diag.finish(result)
+
 
 if __name__ == "__main__":
     r = check()